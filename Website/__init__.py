@@ -8,11 +8,15 @@ from dotenv import load_dotenv
 from flask_login import LoginManager
 from flask_caching import Cache
 from flask_migrate import Migrate
-import pymysql
+from .trending import TrendingRefresher
+from . import compression
+from . import metrics
+from . import commands
 
 db = SQLAlchemy() #db = database connection that used to interact with database
 cache = Cache()
 login_manager = LoginManager()
+trending_refresher = TrendingRefresher() #background TMDB trending snapshot for the advanced page
 
 def create_app():
     app = Flask(__name__) #name of the file, __init__.py
@@ -25,12 +29,42 @@ def create_app():
     app.config['SECRET_KEY'] = environ.get('SECRET_KEY', 'KDJFASasldfgjsfdfs')
     app.config['SQLALCHEMY_DATABASE_URI'] = environ.get('DATABASE_URI', 'sqlite:///yourdatabase.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['CACHE_TYPE'] = 'SimpleCache'  # Use SimpleCache for in-memory caching
+    # Cache backend shared by the workers and the flask CLI: FileSystemCache (per node) or RedisCache.
+    # It also holds the dataset version, so SimpleCache (per process) never sees an ingest run elsewhere
+    app.config['CACHE_TYPE'] = environ.get('CACHE_TYPE', 'FileSystemCache')
+    app.config['CACHE_DIR'] = environ.get('CACHE_DIR', path.join(app.instance_path, 'cache'))
+    app.config['CACHE_THRESHOLD'] = int(environ.get('CACHE_THRESHOLD', 5000))
+    app.config['CACHE_REDIS_URL'] = environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    app.config['CACHE_KEY_PREFIX'] = environ.get('CACHE_KEY_PREFIX', 'cinesurfer:')
+    app.config['CACHE_DEFAULT_TIMEOUT'] = int(environ.get('CACHE_DEFAULT_TIMEOUT', 300))
+    # Rendered word cloud PNGs (content addressed) and the size of the process pool rendering them
+    app.config['WORDCLOUD_CACHE_DIR'] = environ.get('WORDCLOUD_CACHE_DIR', path.join(app.instance_path, 'wordclouds'))
+    app.config['WORDCLOUD_WORKERS'] = int(environ.get('WORDCLOUD_WORKERS', 2))
+    # Trending radar refresh schedule (seconds) and how old a snapshot may get before it is flagged stale
+    app.config['TRENDING_REFRESH_INTERVAL'] = int(environ.get('TRENDING_REFRESH_INTERVAL', 600))
+    app.config['TRENDING_MAX_STALENESS'] = int(environ.get('TRENDING_MAX_STALENESS', 3600))
+    app.config['TRENDING_REFRESH_ENABLED'] = environ.get('TRENDING_REFRESH_ENABLED', 'true').lower() == 'true'
+    # Prometheus text endpoint with per-route latency, query and cache metrics
+    app.config['METRICS_ENABLED'] = environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Build the Dash filter cube in a background thread once the Dash app is created, instead of on the first callback
+    app.config['WARMUP_ON_START'] = environ.get('WARMUP_ON_START', 'true').lower() == 'true'
+    # How often (seconds) Dash checks the shared dataset version and reloads its snapshot, 0 disables the check
+    app.config['DASH_RELOAD_INTERVAL'] = int(environ.get('DASH_RELOAD_INTERVAL', 60))
+    # Ship the pre-aggregated filter data to the browser and filter the intermediate charts there
+    app.config['DASH_CLIENTSIDE_FILTERING'] = environ.get('DASH_CLIENTSIDE_FILTERING', 'false').lower() == 'true'
+
+    if app.config['CACHE_TYPE'] in ('SimpleCache', 'simple'):
+        print("Warning: CACHE_TYPE=SimpleCache keeps the dataset version per process, "
+              "ingests and syncs run by other processes will not invalidate this one's pages and indexes")
 
     db.init_app(app) #Initialize flask app to the 
     migrate.init_app(app, db) #Set up Flask-Migrate
     cache.init_app(app)
     login_manager.init_app(app)
+    trending_refresher.init_app(app)
+    metrics.init_app(app) #per-route timings at /metrics, registered first so it sees compressed sizes
+    compression.init_app(app) #gzip/brotli for pages, chart JSON and scripts
+    commands.init_app(app) #flask CLI maintenance commands
     
     #Initialize blueprint components to the app
     from .views import views
@@ -47,19 +81,13 @@ def create_app():
     @login_manager.user_loader
     def load_user(user_id):
         return User.query.get(int(user_id))
-   
-   
-    #define class/table (from models.py) before initializing db
-    with app.app_context(): # Required for creating tables in the app context
-        #create database/schema automatically if it doesnt exist
-        create_database_if_not_exists()
-        #create all tables within models
-        db.create_all()
-    
+
+    #the database and tables are created by `flask init-db` (or `flask db upgrade`), not on every start
     return app
 
 def create_database_if_not_exists():
     #Connect to MySQL server without specifying a database
+    import pymysql
     load_dotenv()
     
     connection = pymysql.connect(
@@ -0,0 +1,105 @@
+#Dashboard aggregates computed in the database
+#Each function is one GROUP BY that returns only the rows its chart draws, instead of loading the
+#catalogue and counting in pandas. Movies are filtered with IN (subquery) semi-joins rather than joined
+#to their genres and directors, so a movie with two directors and three genres still counts once (its votes are not
+#multiplied by the join) and the result stays a few kilobytes however large the catalogue gets.
+from Website.lazy_imports import lazy_module
+from sqlalchemy import select, func
+from Website import db
+from Website.models import Movie, Genre, Director, Actor, Country, MovieActor, MovieCountry, MovieGenre, MovieDirector
+
+pd = lazy_module('pandas')
+
+STAR_BILLING = 4  # billing orders 0-3 are Star1..Star4
+
+def listed(movie_id):
+    # Movies with at least one genre and one director, the rows the dashboard has always counted.
+    # Uncorrelated, so the database builds each id set once instead of probing per row
+    return movie_id.in_(select(MovieGenre.c.movie_id)) & movie_id.in_(select(MovieDirector.c.movie_id))
+
+def top_titles_by_votes(limit=10):
+    # title, vote_count: summed over listed movies sharing a title, highest first
+    votes = func.sum(Movie.vote_count)
+    rows = db.session.execute(
+        select(Movie.title, votes)
+        .where(listed(Movie.movie_id))
+        .group_by(Movie.title)
+        .order_by(votes.desc(), Movie.title)
+        .limit(limit)
+    ).all()
+    return pd.DataFrame(rows, columns=['title', 'vote_count'])
+
+def top_directors_by_votes(limit=10):
+    # director, vote_count: every listed movie's votes credited once to each of its directors
+    votes = (select(MovieDirector.c.director_id, func.sum(Movie.vote_count).label('vote_count'))
+             .join(Movie, Movie.movie_id == MovieDirector.c.movie_id)
+             .where(MovieDirector.c.movie_id.in_(select(MovieGenre.c.movie_id)))
+             .group_by(MovieDirector.c.director_id)
+             .order_by(func.sum(Movie.vote_count).desc())
+             .limit(limit)
+             .subquery())
+    rows = db.session.execute(
+        select(Director.name, votes.c.vote_count)
+        .join(votes, votes.c.director_id == Director.director_id)
+        .order_by(votes.c.vote_count.desc(), Director.name)
+    ).all()
+    return pd.DataFrame(rows, columns=['director', 'vote_count'])
+
+def genre_counts():
+    # genre, count: listed movies per genre, genres without any left out
+    movies = (select(MovieGenre.c.genre_id, func.count().label('count'))
+              .where(MovieGenre.c.movie_id.in_(select(MovieDirector.c.movie_id)))
+              .group_by(MovieGenre.c.genre_id)
+              .subquery())
+    rows = db.session.execute(
+        select(Genre.name, movies.c.count)
+        .join(movies, movies.c.genre_id == Genre.genre_id)
+        .order_by(movies.c.count.desc(), Genre.name)
+    ).all()
+    return pd.DataFrame(rows, columns=['genre', 'count'])
+
+def releases_per_year():
+    # release_year, count: listed movies per release year, oldest first
+    rows = db.session.execute(
+        select(Movie.release_year, func.count())
+        .where(Movie.release_year.isnot(None), listed(Movie.movie_id))
+        .group_by(Movie.release_year)
+        .order_by(Movie.release_year)
+    ).all()
+    return pd.DataFrame(rows, columns=['release_year', 'count'])
+
+def adult_split():
+    # adult, count: listed movies flagged adult or not
+    rows = db.session.execute(
+        select(Movie.adult, func.count())
+        .where(Movie.adult.isnot(None), listed(Movie.movie_id))
+        .group_by(Movie.adult)
+        .order_by(Movie.adult)
+    ).all()
+    return pd.DataFrame(rows, columns=['adult', 'count'])
+
+def star_counts():
+    # actor, count: top-billed credits per actor over the listed movies, most credited first
+    credits = (select(MovieActor.c.actor_id, func.count().label('count'))
+               .where(MovieActor.c.billing_order < STAR_BILLING, listed(MovieActor.c.movie_id))
+               .group_by(MovieActor.c.actor_id)
+               .subquery())
+    rows = db.session.execute(
+        select(Actor.name, credits.c.count)
+        .join(credits, credits.c.actor_id == Actor.actor_id)
+        .order_by(credits.c.count.desc(), Actor.name)
+    ).all()
+    return pd.DataFrame(rows, columns=['actor', 'count'])
+
+def country_counts():
+    # country, No_of_Movies: listed movies per production country
+    movies = (select(MovieCountry.c.country_id, func.count().label('count'))
+              .where(listed(MovieCountry.c.movie_id))
+              .group_by(MovieCountry.c.country_id)
+              .subquery())
+    rows = db.session.execute(
+        select(Country.name, movies.c.count)
+        .join(movies, movies.c.country_id == Country.country_id)
+        .order_by(Country.name)
+    ).all()
+    return pd.DataFrame(rows, columns=['country', 'No_of_Movies'])
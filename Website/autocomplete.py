@@ -0,0 +1,99 @@
+#In-memory autocomplete index for the search bar
+#Titles are case-folded and kept sorted so a keystroke is a bisect prefix lookup, and the
+#popularity-ranked suggestions for short prefixes (the ones typed first) are precomputed.
+#Nothing here touches the database on a keystroke; the index rebuilds itself after catalogue changes,
+#whether they were committed here or by another process that bumped the shared dataset version.
+import heapq
+import threading
+from bisect import bisect_left
+from sqlalchemy import select
+from Website import db
+from Website.catalogue import get_dataset_version, on_movies_changed
+from Website.models import Movie
+
+SUGGESTION_LIMIT = 10
+PRECOMPUTED_PREFIX_LENGTH = 3  # prefixes up to this many characters have their top-k stored
+
+class AutocompleteIndex:
+    def __init__(self, limit=SUGGESTION_LIMIT, prefix_length=PRECOMPUTED_PREFIX_LENGTH):
+        self.limit = limit
+        self.prefix_length = prefix_length
+        self.stale = True
+        self.version = None  # dataset version the index was built at
+        self._lock = threading.Lock()
+        self._titles = self._words = self._top = self._popular = None
+
+    def build(self):
+        # Cleared before reading so a change that lands mid-build marks the index stale again
+        self.stale = False
+        self.version = get_dataset_version()
+        rows = db.session.execute(select(Movie.movie_id, Movie.title, Movie.popularity)).all()
+        # Whole titles, for alphabetical completion: (folded title, title)
+        titles = sorted((title.casefold(), title) for movie_id, title, popularity in rows if title)
+        # Every word start of every title, for popular completion, e.g. 'knight' -> 'The Dark Knight'
+        words = []
+        for movie_id, title, popularity in rows:
+            if not title:
+                continue
+            folded = title.casefold()
+            for position, character in enumerate(folded):
+                if position == 0 or (folded[position - 1] == ' ' and character != ' '):
+                    words.append((folded[position:], -(popularity or 0), movie_id, title))
+        words.sort()
+        top = [(-(popularity or 0), movie_id, title) for movie_id, title, popularity in rows if title]
+        top = [title for _, _, title in heapq.nsmallest(self.limit, top)]
+
+        # Top-k by popularity for every short prefix, built in one pass over the sorted word starts
+        candidates = {}
+        for key, negative_popularity, movie_id, title in words:
+            for length in range(1, min(self.prefix_length, len(key)) + 1):
+                candidates.setdefault(key[:length], {})[movie_id] = (negative_popularity, movie_id, title)
+        popular = {prefix: [title for _, _, title in heapq.nsmallest(self.limit, entries.values())]
+                   for prefix, entries in candidates.items()}
+
+        with self._lock:
+            self._titles = ([key for key, _ in titles], [title for _, title in titles])
+            self._words = ([entry[0] for entry in words], words)
+            self._top = top
+            self._popular = popular
+
+    def ensure_current(self):
+        if self.stale or self.version != get_dataset_version():
+            self.build()
+
+    def memory_bytes(self):
+        from Website.movie_data import deep_bytes
+        with self._lock:
+            return deep_bytes((self._titles, self._words, self._top, self._popular))
+
+    def alphabetical(self, query):
+        # Titles starting with the query, in title order
+        self.ensure_current()
+        keys, titles = self._titles
+        if not query:
+            return titles[:self.limit]
+        prefix = query.casefold()
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + '\uffff', start)
+        return titles[start:min(end, start + self.limit)]
+
+    def popular(self, query):
+        # Most popular titles containing a word that starts with the query
+        self.ensure_current()
+        if not query:
+            return self._top
+        prefix = query.casefold()
+        if len(prefix) <= self.prefix_length:
+            return self._popular.get(prefix, [])
+        keys, words = self._words
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + '\uffff', start)
+        # A title can match on several of its words, keep each movie once
+        matches = {entry[2]: (entry[1], entry[2], entry[3]) for entry in words[start:end]}
+        return [title for _, _, title in heapq.nsmallest(self.limit, matches.values())]
+
+autocomplete_index = AutocompleteIndex()
+
+@on_movies_changed
+def _mark_stale(movie_ids):
+    autocomplete_index.stale = True
@@ -0,0 +1,63 @@
+#Catalogue change notifications and the shared dataset version
+#In-process indexes (search, autocomplete, ...) subscribe here to hear which movies changed.
+#ORM writes to Movie are picked up automatically once their commit lands; bulk loaders that go
+#through Core inserts call notify_movies_changed() themselves.
+#The dataset version lives in the cache backend, so every worker sharing that backend sees a
+#bump at the same moment and all version-namespaced cache keys go cold together.
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from Website import cache
+from Website.models import Movie
+
+DATASET_VERSION_KEY = 'dataset_version'
+
+_subscribers = []
+
+def _new_version():
+    # Time-ordered token, unique even if the key was evicted and has to be recreated
+    return format(time.time_ns(), 'x')
+
+def get_dataset_version():
+    version = cache.get(DATASET_VERSION_KEY)
+    if version is None:
+        cache.add(DATASET_VERSION_KEY, _new_version(), timeout=0)
+        version = cache.get(DATASET_VERSION_KEY)
+    return version
+
+def bump_dataset_version():
+    # Called after an ingest or refresh; never expires so it only changes when the data does
+    version = _new_version()
+    cache.set(DATASET_VERSION_KEY, version, timeout=0)
+    return version
+
+def on_movies_changed(callback):
+    # Register callback(movie_ids); usable as a decorator
+    _subscribers.append(callback)
+    return callback
+
+def notify_movies_changed(movie_ids):
+    movie_ids = set(movie_ids)
+    if movie_ids:
+        bump_dataset_version()
+        for callback in _subscribers:
+            callback(movie_ids)
+
+@event.listens_for(Movie, 'after_insert')
+@event.listens_for(Movie, 'after_update')
+@event.listens_for(Movie, 'after_delete')
+def _queue_movie(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_movie_ids', set()).add(target.movie_id)
+
+@event.listens_for(Session, 'after_commit')
+def _flush_queue(session):
+    # Subscribers must not emit SQL here; they record the ids and catch up on their next read
+    changed = session.info.pop('changed_movie_ids', None)
+    if changed:
+        notify_movies_changed(changed)
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_queue(session):
+    session.info.pop('changed_movie_ids', None)
@@ -0,0 +1,49 @@
+#Chart rendering helpers
+#Figures are emitted as a <div> plus their JSON only. plotly.js itself is served once per page
+#from a fingerprinted, pre-compressed asset (/assets/plotly-<hash>.min.js) that browsers cache
+#for a year, instead of being inlined into every chart fragment.
+import gzip
+import hashlib
+import threading
+from markupsafe import Markup
+from Website.lazy_imports import lazy_module
+from Website.metrics import timed
+
+pio = lazy_module('plotly.io')
+
+try:
+    import brotli  # optional, gzip is used when it is not installed
+except ImportError:
+    brotli = None
+
+_bundle = None
+_bundle_lock = threading.Lock()
+
+class PlotlyBundle:
+    def __init__(self, source):
+        self.raw = source.encode('utf-8')
+        self.fingerprint = hashlib.sha256(self.raw).hexdigest()[:16]
+        self.filename = f"plotly-{self.fingerprint}.min.js"
+        # Compressed once at startup, not per request
+        self.encoded = {'gzip': gzip.compress(self.raw, compresslevel=9)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.raw, quality=11)
+
+def plotly_bundle():
+    global _bundle
+    if _bundle is None:
+        with _bundle_lock:
+            if _bundle is None:
+                from plotly.offline import get_plotlyjs
+                _bundle = PlotlyBundle(get_plotlyjs())
+    return _bundle
+
+def render_chart(fig, config=None):
+    # Chart fragment for a template: container div and figure JSON, no plotly.js
+    with timed('plotly'):
+        return Markup(pio.to_html(fig, full_html=False, include_plotlyjs=False, config=config))
+
+def chart_json(fig):
+    # Figure JSON string for endpoints that hand the figure to Plotly.newPlot on the client
+    with timed('plotly'):
+        return pio.to_json(fig, validate=False)
@@ -0,0 +1,145 @@
+#Maintenance commands run with the flask CLI, e.g. `flask build-neighbours`
+import time
+import click
+from flask.cli import with_appcontext
+
+@click.command('build-neighbours')
+@click.option('--top-k', default=10, show_default=True, help='Neighbours stored per movie.')
+@click.option('--workers', type=int, help='Processes scoring blocks of movies (default: all cores).')
+@with_appcontext
+def build_neighbours_command(top_k, workers):
+    # Offline rebuild of the similar-movie graph behind the movie dashboard
+    from Website.similarity import build_movie_neighbours
+    started = time.perf_counter()
+    written = build_movie_neighbours(top_k, workers=workers)
+    click.echo(f"Stored {written} neighbour rows in {time.perf_counter() - started:.1f}s")
+
+@click.command('refresh-metrics')
+@with_appcontext
+def refresh_metrics_command():
+    # Recompute the per-movie metrics table; run after loading new data
+    from Website.movie_metrics import refresh_movie_metrics
+    started = time.perf_counter()
+    written = refresh_movie_metrics()
+    click.echo(f"Stored metrics for {written} movies in {time.perf_counter() - started:.1f}s")
+
+@click.command('ingest')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=10000, show_default=True, help='CSV rows loaded per transaction.')
+@with_appcontext
+def ingest_command(path, chunk_size):
+    # Load the movie CSV (e.g. IMDb_Dataset_Edited.csv); safe to re-run, stored titles are skipped
+    from Website.ingest import ingest_csv
+    from Website.catalogue import notify_movies_changed
+    from Website.movie_metrics import refresh_movie_metrics
+    started = time.perf_counter()
+    inserted = ingest_csv(path, chunk_size, report=click.echo)
+    if inserted:
+        refresh_movie_metrics()
+        notify_movies_changed(inserted)
+    click.echo(f"Inserted {len(inserted)} movies in {time.perf_counter() - started:.1f}s")
+    if inserted:
+        click.echo("Run `flask build-neighbours` to refresh the similar-movie graph")
+
+@click.command('sync-tmdb')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), help='Start of the change window (default: yesterday).')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), help='End of the change window (default: today).')
+@with_appcontext
+def sync_tmdb_command(since, until):
+    # Nightly delta sync: only movies TMDB reports as changed are fetched and written
+    from Website.movie_api import get_client
+    from Website.tmdb_sync import sync_changes
+    from Website.catalogue import notify_movies_changed
+    from Website.movie_metrics import refresh_movie_metrics
+    started = time.perf_counter()
+    result = sync_changes(get_client(), since and since.date(), until and until.date(), report=click.echo)
+    if result['changed']:
+        refresh_movie_metrics()
+        notify_movies_changed(result['changed'])
+    click.echo(f"{len(result['changed'])} movies written ({result['inserted']} new), {result['unchanged']} unchanged, "
+               f"{result['reported']} reported by TMDB, in {time.perf_counter() - started:.1f}s")
+
+@click.command('refresh-recommendations')
+@click.option('--count', default=5, show_default=True, help='Recommendations stored per user.')
+@click.option('--workers', type=int, help='Processes scoring blocks of users (default: all cores).')
+@with_appcontext
+def refresh_recommendations_command(count, workers):
+    # Batch job: rewrite user_recommendations for every user from their favourites
+    from Website.recommender import refresh_all_recommendations
+    started = time.perf_counter()
+    users, written = refresh_all_recommendations(count, workers=workers)
+    click.echo(f"Stored {written} recommendations for {users} users in {time.perf_counter() - started:.1f}s")
+
+def _default_dash_request(output, callback):
+    # Body of a Dash callback request with nothing selected, what a first page view sends
+    outputs = callback['output'] if isinstance(callback['output'], list) else [callback['output']]
+    return {
+        'output': output,
+        'outputs': [{'id': o.component_id, 'property': o.component_property} for o in outputs],
+        'inputs': [dict(spec, value=None) for spec in callback['inputs']],
+        'state': [],
+        'changedPropIds': [],
+    }
+
+@click.command('memory-report')
+@with_appcontext
+def memory_report_command():
+    # Build what a worker holds after serving its first /dash/ page and searches, and print the
+    # bytes of each: the snapshot columns, the filter cube, the search, autocomplete and
+    # recommender indexes and the figure LRU
+    from flask import current_app
+    from Website.movie_data import get_movie_snapshot
+    from Website.movie_cube import get_filter_cube
+    from Website.search_index import search_index
+    from Website.autocomplete import autocomplete_index
+    from Website.recommender import item_vectors
+    from Website.views import create_dash_app
+    from Website.metrics import resident_bytes
+    snapshot = get_movie_snapshot()
+    get_filter_cube(snapshot)
+    sizes = snapshot.memory_report()
+    for name, index in (('search', search_index), ('autocomplete', autocomplete_index), ('recommender', item_vectors)):
+        index.ensure_current()
+        sizes[name] = index.memory_bytes()
+    # No background threads in a one-off command, the figures are rendered here
+    current_app.config.update(WARMUP_ON_START=False, DASH_RELOAD_INTERVAL=0)
+    dash_app = create_dash_app(current_app)
+    client = current_app.test_client()
+    for output, callback in dash_app.callback_map.items():
+        client.post('/dash/_dash-update-component', json=_default_dash_request(output, callback))
+    figure_cache = current_app.extensions['dash_figure_cache']
+    sizes['figures'] = figure_cache.memory_bytes()
+    for name, size in sizes.items():
+        click.echo(f"{name:<12}{size / 1e6:10.1f} MB")
+    # Only the default selections are cached here, a busy worker fills the LRU up to its capacity
+    click.echo(f"{'':<12}{len(figure_cache)} of {figure_cache.max_entries} figures cached")
+    click.echo(f"{'resident':<12}{resident_bytes() / 1e6:10.1f} MB")
+
+@click.command('init-db')
+@click.option('--stamp/--no-stamp', default=True, show_default=True,
+              help='Record the new schema as the latest migration, so `flask db upgrade` starts from there.')
+@with_appcontext
+def init_db_command(stamp):
+    # One-off bootstrap of an empty database; the app no longer creates the schema on every start
+    from flask import current_app
+    from flask_migrate import stamp as stamp_head
+    from Website import db, create_database_if_not_exists
+    started = time.perf_counter()
+    if current_app.config['SQLALCHEMY_DATABASE_URI'].startswith('mysql'):
+        create_database_if_not_exists()  # SQLite creates the file itself
+    if db.inspect(db.engine).get_table_names():
+        click.echo("Database already has tables, run `flask db upgrade` to bring it up to date")
+        return
+    db.create_all()
+    if stamp:
+        stamp_head()
+    click.echo(f"Created {len(db.metadata.tables)} tables in {time.perf_counter() - started:.1f}s")
+
+def init_app(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(memory_report_command)
+    app.cli.add_command(build_neighbours_command)
+    app.cli.add_command(refresh_metrics_command)
+    app.cli.add_command(ingest_command)
+    app.cli.add_command(sync_tmdb_command)
+    app.cli.add_command(refresh_recommendations_command)
@@ -0,0 +1,60 @@
+#Memoization helpers for the intermediate Dash app
+#Dropdown values are normalized into sorted tuples so that the same selection made in a
+#different order shares one cache entry, and finished figures are kept in a bounded LRU.
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+def normalize_selection(values):
+    # None, [] and a single value all normalize to a hashable, order-independent tuple
+    if values is None:
+        return ()
+    if not isinstance(values, (list, tuple, set)):
+        values = [values]
+    return tuple(sorted(set(values), key=str))
+
+class LRUCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key, build):
+        # Two callers racing on a cold key may both build, the last one to finish wins
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            self.set(key, value)
+        return value
+
+    def memory_bytes(self):
+        # The cached values and their keys; the sizing helper lives with the snapshot code
+        from Website.movie_data import deep_bytes
+        with self._lock:
+            return deep_bytes(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
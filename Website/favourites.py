@@ -0,0 +1,42 @@
+#Set-based writes and membership checks for user_favourites and user_recommendations
+#Each call is one statement however many movies it touches or the user already has: INSERT IGNORE
+#... SELECT to add (unknown movie ids and existing rows are skipped by the database), DELETE ... IN to
+#remove, and EXISTS for membership instead of loading the whole relationship list.
+from sqlalchemy import select, delete, insert, exists, literal
+from Website import db
+from Website.models import Movie
+
+MAX_IDS_PER_CALL = 1000
+
+def requested_movie_ids(request):
+    # movie_id / movie_ids from the query string (repeated or comma separated) or the JSON body
+    values = request.args.getlist('movie_id') + request.args.getlist('movie_ids')
+    payload = request.get_json(silent=True) if request.is_json else None
+    if isinstance(payload, dict):
+        for key in ('movie_id', 'movie_ids'):
+            value = payload.get(key)
+            values += value if isinstance(value, list) else [value] if value is not None else []
+    movie_ids = []
+    for value in values:
+        for part in str(value).split(','):
+            if part.strip().isdigit():
+                movie_ids.append(int(part))
+    return list(dict.fromkeys(movie_ids))[:MAX_IDS_PER_CALL]
+
+def add_movies(table, user_id, movie_ids):
+    # Link the movies that exist and are not linked yet; returns how many rows were added
+    if not movie_ids:
+        return 0
+    statement = (insert(table)
+                 .from_select(['user_id', 'movie_id'], select(literal(user_id), Movie.movie_id).where(Movie.movie_id.in_(movie_ids)))
+                 .prefix_with('IGNORE', dialect='mysql')
+                 .prefix_with('OR IGNORE', dialect='sqlite'))
+    return db.session.execute(statement).rowcount
+
+def remove_movies(table, user_id, movie_ids):
+    if not movie_ids:
+        return 0
+    return db.session.execute(delete(table).where(table.c.user_id == user_id, table.c.movie_id.in_(movie_ids))).rowcount
+
+def has_movie(table, user_id, movie_id):
+    return db.session.execute(select(exists().where(table.c.user_id == user_id, table.c.movie_id == movie_id))).scalar()
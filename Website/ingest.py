@@ -0,0 +1,142 @@
+#Bulk, streaming CSV loader behind `flask ingest` (replaces the loader cells of Data_preprocessing.ipynb)
+#The CSV is read in chunks. Genre/actor/director names and existing titles are resolved to ids in
+#memory, new ids are allocated locally, and each chunk goes in as one driver-level executemany per
+#table in a single transaction. Movies whose title is already stored are skipped, so a re-run only loads
+#what is missing.
+import time
+from Website.lazy_imports import lazy_module
+from sqlalchemy import select, func
+from Website import db
+from Website.models import Movie, Genre, Actor, Director, Country, MovieGenre, MovieActor, MovieDirector, MovieCountry
+
+pd = lazy_module('pandas')
+
+MOVIE_COLUMNS = ['title', 'overview', 'status', 'release_year', 'popularity', 'vote_average', 'vote_count', 'adult',
+                 'overview_sentiment', 'all_combined_keywords', 'runtime', 'production_countries',
+                 'Star1', 'Star2', 'Star3', 'Star4']
+STAR_COLUMNS = ['Star1', 'Star2', 'Star3', 'Star4']
+INTEGER_COLUMNS = ['release_year', 'vote_count', 'runtime']
+FLOAT_COLUMNS = ['popularity', 'vote_average', 'overview_sentiment']
+# CSV list column -> (dimension model, id column, association table)
+DIMENSIONS = {
+    'genres_list': (Genre, 'genre_id', MovieGenre),
+    'Cast_list': (Actor, 'actor_id', MovieActor),
+    'Director': (Director, 'director_id', MovieDirector),
+    'production_countries': (Country, 'country_id', MovieCountry),
+}
+# Cast links carry billing_order: Star1..Star4 first, then the rest of the cast list in order
+BILLED_DIMENSION = 'Cast_list'
+
+def clean_and_split(input_string):
+    if pd.isna(input_string):
+        return []
+    items = input_string.replace('[', '').replace(']', '').replace("'", "").replace("\"", "").split(',')
+    return [item.strip() for item in items if item.strip()]
+
+def _to_bool(value):
+    if pd.isna(value):
+        return None
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    return bool(value)
+
+class DimensionIds:
+    # name -> id for one dimension table, allocating ids for names it has not seen yet
+    def __init__(self, model, id_column):
+        self.model = model
+        self.id_column = id_column
+        rows = db.session.execute(select(getattr(model, id_column), model.name)).all()
+        self.ids = {name: row_id for row_id, name in rows}
+        self.next_id = max(self.ids.values(), default=0) + 1
+        self.new_rows = []
+
+    def resolve(self, name):
+        row_id = self.ids.get(name)
+        if row_id is None:
+            row_id = self.ids[name] = self.next_id
+            self.next_id += 1
+            self.new_rows.append((row_id, name))
+        return row_id
+
+    def flush(self):
+        bulk_insert(self.model.__table__, [self.id_column, 'name'], self.new_rows)
+        self.new_rows = []
+
+def bulk_insert(table, columns, rows):
+    # Plain INSERT ... VALUES executemany straight on the DBAPI cursor; rows are tuples in column order
+    if not rows:
+        return
+    connection = db.session.connection()
+    quote = connection.dialect.identifier_preparer.quote
+    marker = '?' if connection.dialect.paramstyle == 'qmark' else '%s'
+    statement = (f"INSERT INTO {quote(table.name)} ({', '.join(quote(column) for column in columns)}) "
+                 f"VALUES ({', '.join([marker] * len(columns))})")
+    connection.exec_driver_sql(statement, rows)
+
+def _prepare(chunk, seen_overviews):
+    # Same cleaning as the notebook: no "Unknown" genres or directors, one movie per overview
+    chunk = chunk[~chunk['genres_list'].fillna('').str.contains('Unknown', regex=False)]
+    chunk = chunk[~chunk['Director'].fillna('').str.contains('Unknown', regex=False)]
+    chunk = chunk.dropna(subset=['overview', 'title'])
+    chunk = chunk.drop_duplicates(subset=['overview'])
+    chunk = chunk[~chunk['overview'].isin(seen_overviews)].copy()
+    seen_overviews.update(chunk['overview'])
+
+    for column in INTEGER_COLUMNS:
+        chunk[column] = pd.to_numeric(chunk[column], errors='coerce').round().astype('Int64')
+    for column in FLOAT_COLUMNS:
+        chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+    chunk['adult'] = chunk['adult'].map(_to_bool)
+    return chunk
+
+def _rows(frame):
+    # Row tuples of plain python values, None for missing ones, converted column by column
+    columns = [frame[column].astype(object).where(frame[column].notna(), None).tolist() for column in frame.columns]
+    return list(zip(*columns))
+
+def ingest_csv(path, chunk_size=10000, report=print):
+    # Returns the ids of the movies inserted by this run
+    started = time.perf_counter()
+    dimensions = {column: DimensionIds(model, id_column) for column, (model, id_column, _) in DIMENSIONS.items()}
+    titles = set(db.session.execute(select(Movie.title)).scalars())
+    next_movie_id = (db.session.execute(select(func.max(Movie.movie_id))).scalar() or 0) + 1
+    seen_overviews = set()
+    inserted = []
+    rows_read = 0
+
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        rows_read += len(chunk)
+        chunk = _prepare(chunk, seen_overviews)
+        chunk = chunk[~chunk['title'].isin(titles)].drop_duplicates(subset=['title'])
+        if chunk.empty:
+            continue
+        titles.update(chunk['title'])
+
+        movie_ids = list(range(next_movie_id, next_movie_id + len(chunk)))
+        next_movie_id += len(chunk)
+        links = {column: [] for column in DIMENSIONS}
+        for column in DIMENSIONS:
+            resolve = dimensions[column].resolve
+            names_per_movie = [clean_and_split(names) for names in chunk[column]]
+            if column == BILLED_DIMENSION:
+                stars = chunk[STAR_COLUMNS].itertuples(index=False, name=None)
+                names_per_movie = [[star.strip() for star in row if isinstance(star, str) and star.strip()] + names
+                                   for row, names in zip(stars, names_per_movie)]
+                for movie_id, names in zip(movie_ids, names_per_movie):
+                    ordered = dict.fromkeys(resolve(name) for name in names)
+                    links[column].extend((movie_id, row_id, order) for order, row_id in enumerate(ordered))
+            else:
+                for movie_id, names in zip(movie_ids, names_per_movie):
+                    links[column].extend((movie_id, row_id) for row_id in dict.fromkeys(resolve(name) for name in names))
+
+        for dimension in dimensions.values():
+            dimension.flush()
+        bulk_insert(Movie.__table__, ['movie_id'] + MOVIE_COLUMNS, [(movie_id, *row) for movie_id, row in zip(movie_ids, _rows(chunk[MOVIE_COLUMNS]))])
+        for column, (_, id_column, table) in DIMENSIONS.items():
+            bulk_insert(table, ['movie_id', id_column] + (['billing_order'] if column == BILLED_DIMENSION else []), links[column])
+        db.session.commit()
+
+        inserted.extend(movie_ids)
+        elapsed = time.perf_counter() - started
+        report(f"{rows_read} rows read, {len(inserted)} movies inserted ({rows_read / elapsed:.0f} rows/s)")
+    return inserted
@@ -0,0 +1,21 @@
+#Deferred imports for the heavy scientific libraries (pandas, numpy, scipy, plotly)
+#`pd = lazy_module('pandas')` binds a placeholder module; the real import happens on the first
+#attribute access, so importing the app (and every flask CLI command) only pays for what a request
+#actually uses. importlib's LazyLoader is not safe to trigger from several threads at once, the
+#placeholder imports under a lock and then mirrors the real module's namespace.
+import importlib
+import threading
+import types
+
+_lock = threading.RLock()
+
+class LazyModule(types.ModuleType):
+    def __getattr__(self, attr):
+        # Only called for names not copied yet: the first access, or a submodule imported later
+        with _lock:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+def lazy_module(name):
+    return LazyModule(name)
@@ -0,0 +1,245 @@
+#Per-route performance metrics in the Prometheus text format, served at /metrics
+#Every Flask route and Dash callback gets a latency and response size histogram plus counters for its
+#SQL queries, cache lookups and the time spent in each phase: db (SQLAlchemy engine events), pandas,
+#figure building, plotly serialization (to_html/to_json) and template rendering. Phase times are
+#exclusive, a query run while building a pandas frame counts as db only, so they add up to at most the
+#request time. Gauges registered with register_gauge() (worker RSS, bytes per in-memory dataset) are
+#read at scrape time. Like cache_stats() the numbers are kept per worker process; Prometheus tells the
+#workers apart by the scrape target.
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+DASH_CALLBACK_PATH = '_dash-update-component'
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}'
+        yield f'{name}_bucket{_labels(labels, le="+Inf")} {self.total}'
+        yield f'{name}_sum{_labels(labels)} {_number(self.sum)}'
+        yield f'{name}_count{_labels(labels)} {self.total}'
+
+_lock = threading.Lock()
+_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # endpoint -> seconds
+_sizes = defaultdict(lambda: Histogram(SIZE_BUCKETS))  # endpoint -> response bytes
+_requests = defaultdict(int)  # (endpoint, method, status) -> count
+_queries = defaultdict(int)  # endpoint -> SQL statements
+_phases = defaultdict(float)  # (endpoint, phase) -> seconds
+_cache = defaultdict(int)  # (endpoint, cache, outcome) -> lookups
+_gauges = {}  # name -> (help text, collect() returning [(labels, value)]), read at scrape time
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels, **extra):
+    pairs = list(labels.items()) + list(extra.items())
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}' if pairs else ''
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class RequestTimer:
+    # Per-request state on flask.g; the phase stack pauses the outer phase while an inner one runs
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.phases = defaultdict(float)
+        self.cache = []
+        self.stack = []
+        self.status = None
+        self.size = None
+
+    def push(self, phase):
+        now = time.perf_counter()
+        if self.stack:
+            outer, since = self.stack[-1]
+            self.phases[outer] += now - since
+        self.stack.append((phase, now))
+
+    def pop(self, phase):
+        # Tolerates an unbalanced pop (e.g. a template that raised) by unwinding to the matching phase
+        now = time.perf_counter()
+        while self.stack:
+            current, since = self.stack.pop()
+            self.phases[current] += now - since
+            if current == phase:
+                break
+        if self.stack:
+            outer, _ = self.stack[-1]
+            self.stack[-1] = (outer, now)
+
+def _current():
+    if has_request_context():
+        return g.get('_metrics')
+    return None
+
+@contextmanager
+def timed(phase):
+    # with timed('pandas'): ... charges the block to a phase of the current request, no-op outside one
+    timer = _current()
+    if timer is None:
+        yield
+        return
+    timer.push(phase)
+    try:
+        yield
+    finally:
+        timer.pop(phase)
+
+def record_cache(cache, outcome):
+    timer = _current()
+    if timer is not None:
+        timer.cache.append((cache, outcome))
+
+def endpoint_label():
+    # Dash callbacks are named after their outputs, e.g. dash:chart1.figure,chart2.figure
+    if request.path.endswith(DASH_CALLBACK_PATH):
+        payload = request.get_json(silent=True) or {}
+        outputs = payload.get('outputs')
+        outputs = outputs if isinstance(outputs, list) else [outputs] if outputs else []
+        names = [f"{output.get('id')}.{output.get('property')}" for output in outputs if isinstance(output, dict)]
+        return 'dash:' + (','.join(names) or 'callback')
+    # Unmatched paths share one label so 404 scans cannot grow the series without bound
+    return request.endpoint or 'unmatched'
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_query(conn, cursor, statement, parameters, context, executemany):
+    timer = _current()
+    if timer is not None:
+        timer.queries += 1
+        timer.push('db')
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_query(conn, cursor, statement, parameters, context, executemany):
+    timer = _current()
+    if timer is not None:
+        timer.pop('db')
+
+@event.listens_for(Engine, 'handle_error')
+def _query_failed(context):
+    timer = _current()
+    if timer is not None:
+        timer.pop('db')
+
+def _template_started(sender, template, context, **extra):
+    timer = _current()
+    if timer is not None:
+        timer.push('template')
+
+def _template_finished(sender, template, context, **extra):
+    timer = _current()
+    if timer is not None:
+        timer.pop('template')
+
+def _finish(timer, endpoint, method, exception):
+    elapsed = time.perf_counter() - timer.started
+    status = 500 if exception is not None else timer.status or 500
+    with _lock:
+        _latency[endpoint].observe(elapsed)
+        if timer.size is not None:
+            _sizes[endpoint].observe(timer.size)
+        _requests[(endpoint, method, status)] += 1
+        _queries[endpoint] += timer.queries
+        for phase, seconds in timer.phases.items():
+            _phases[(endpoint, phase)] += seconds
+        for cache, outcome in timer.cache:
+            _cache[(endpoint, cache, outcome)] += 1
+
+def register_gauge(name, help_text, collect):
+    _gauges[name] = (help_text, collect)
+
+def resident_bytes():
+    # Current resident set size of this worker, peak RSS where /proc is not available
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+register_gauge('cinesurfer_process_resident_bytes', 'Resident memory of this worker process', lambda: [({}, resident_bytes())])
+
+def render_metrics():
+    gauges = []
+    for name, (help_text, collect) in sorted(_gauges.items()):
+        gauges += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+        gauges += [f'{name}{_labels(labels)} {_number(value)}' for labels, value in collect()]
+    with _lock:
+        lines = ['# HELP cinesurfer_request_duration_seconds Time from the start of the request to the response, per endpoint',
+                 '# TYPE cinesurfer_request_duration_seconds histogram']
+        for endpoint, histogram in sorted(_latency.items()):
+            lines.extend(histogram.lines('cinesurfer_request_duration_seconds', {'endpoint': endpoint}))
+        lines += ['# HELP cinesurfer_response_size_bytes Response body size as sent, after compression',
+                  '# TYPE cinesurfer_response_size_bytes histogram']
+        for endpoint, histogram in sorted(_sizes.items()):
+            lines.extend(histogram.lines('cinesurfer_response_size_bytes', {'endpoint': endpoint}))
+        lines += ['# HELP cinesurfer_requests_total Requests handled, by endpoint, method and status',
+                  '# TYPE cinesurfer_requests_total counter']
+        for (endpoint, method, status), count in sorted(_requests.items()):
+            lines.append(f'cinesurfer_requests_total{_labels({"endpoint": endpoint, "method": method, "status": status})} {count}')
+        lines += ['# HELP cinesurfer_db_queries_total SQL statements executed while handling requests',
+                  '# TYPE cinesurfer_db_queries_total counter']
+        for endpoint, count in sorted(_queries.items()):
+            lines.append(f'cinesurfer_db_queries_total{_labels({"endpoint": endpoint})} {count}')
+        lines += ['# HELP cinesurfer_phase_seconds_total Exclusive time spent per phase (db, pandas, figure, plotly, template)',
+                  '# TYPE cinesurfer_phase_seconds_total counter']
+        for (endpoint, phase), seconds in sorted(_phases.items()):
+            lines.append(f'cinesurfer_phase_seconds_total{_labels({"endpoint": endpoint, "phase": phase})} {_number(seconds)}')
+        lines += ['# HELP cinesurfer_cache_lookups_total Page and figure cache lookups by outcome',
+                  '# TYPE cinesurfer_cache_lookups_total counter']
+        for (endpoint, cache, outcome), count in sorted(_cache.items()):
+            lines.append(f'cinesurfer_cache_lookups_total{_labels({"endpoint": endpoint, "cache": cache, "outcome": outcome})} {count}')
+    return '\n'.join(lines + gauges) + '\n'
+
+def init_app(app):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+
+    @app.before_request
+    def start_timer():
+        g._metrics = RequestTimer()
+
+    # Registered before compression.init_app, so it runs after it and sees the compressed size
+    @app.after_request
+    def note_response(response):
+        timer = _current()
+        if timer is not None:
+            timer.status = response.status_code
+            timer.size = response.content_length
+        return response
+
+    @app.teardown_request
+    def finish_timer(exception=None):
+        timer = g.pop('_metrics', None)
+        if timer is not None:
+            _finish(timer, endpoint_label(), request.method, exception)
+
+    @app.route('/metrics')
+    def metrics_page():
+        return app.response_class(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
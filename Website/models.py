@@ -31,6 +31,15 @@ class Director(db.Model):
         Index('ix_director_id', 'director_id'),
     )
 
+class Country(db.Model):
+    __tablename__ = 'countries'
+    country_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    extend_existing=True
+    __table_args__ = (
+        Index('ix_country_id', 'country_id'),
+    )
+
 class Movie(db.Model):
     __tablename__ = 'movies'
     movie_id = db.Column(db.Integer, primary_key=True)
@@ -50,15 +59,19 @@ class Movie(db.Model):
     Star2 = db.Column(db.String(100), nullable=True)
     Star3 = db.Column(db.String(100), nullable=True)
     Star4 = db.Column(db.String(100), nullable=True)
+    tmdb_id = db.Column(db.Integer, nullable=True)  # TMDB movie id, set by the delta sync
+    content_hash = db.Column(db.String(64), nullable=True)  # sha256 of the synced record, unchanged rows are skipped
     extend_existing=True
 
     genres = db.relationship('Genre', secondary='movie_genres', backref=db.backref('movies', lazy='dynamic'))
     actors = db.relationship('Actor', secondary='movie_actors', backref=db.backref('movies', lazy='dynamic'))
     directors = db.relationship('Director', secondary='movie_directors', backref=db.backref('movies', lazy='dynamic'))
+    countries = db.relationship('Country', secondary='movie_countries', backref=db.backref('movies', lazy='dynamic'))
     
     # Declare an index for the movie_id column
     __table_args__ = (
         Index('ix_movie_id', 'movie_id'),
+        Index('ix_movie_tmdb_id', 'tmdb_id', unique=True),
     )
 
 # Association table for movies and genres
@@ -74,8 +87,10 @@ MovieGenre = db.Table('movie_genres',
 MovieActor = db.Table('movie_actors',
     db.Column('movie_id', db.Integer, db.ForeignKey('movies.movie_id'), primary_key=True),
     db.Column('actor_id', db.Integer, db.ForeignKey('actors.actor_id'), primary_key=True),
+    db.Column('billing_order', db.Integer, nullable=True),  # 0-3 = Star1..Star4, then the rest of the cast list
     Index('ix_movie_actor_movie_id', 'movie_id'),  # Index on movie_id for faster lookups
     Index('ix_movie_actor_actor_id', 'actor_id'),  # Index on actor_id for faster lookups
+    Index('ix_movie_actor_billing_order', 'billing_order', 'actor_id'),  # Star counts read only the top-billed links
     extend_existing=True
 )
 
@@ -88,6 +103,42 @@ MovieDirector = db.Table('movie_directors',
     extend_existing=True
 )
 
+# Association table for movies and production countries
+MovieCountry = db.Table('movie_countries',
+    db.Column('movie_id', db.Integer, db.ForeignKey('movies.movie_id'), primary_key=True),
+    db.Column('country_id', db.Integer, db.ForeignKey('countries.country_id'), primary_key=True),
+    Index('ix_movie_country_movie_id', 'movie_id'),  # Index on movie_id for faster lookups
+    Index('ix_movie_country_country_id', 'country_id'),  # Index on country_id for faster lookups
+    extend_existing=True
+)
+
+# Precomputed similar-movie graph: top-k neighbours per movie and their position in its graph
+class MovieNeighbour(db.Model):
+    __tablename__ = 'movie_neighbours'
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.movie_id'), primary_key=True)
+    neighbour_rank = db.Column(db.Integer, primary_key=True)
+    neighbour_id = db.Column(db.Integer, db.ForeignKey('movies.movie_id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    shared = db.Column(db.String(300), nullable=True)  # shared genres/directors/cast, shown on the edge
+    x = db.Column(db.Float, nullable=False)
+    y = db.Column(db.Float, nullable=False)
+    extend_existing=True
+
+# Per-movie metrics materialized by refresh_movie_metrics(); norm_* columns are min-max scaled over the catalogue
+class MovieMetrics(db.Model):
+    __tablename__ = 'movie_metrics'
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.movie_id'), primary_key=True)
+    weighted_rating = db.Column(db.Float, nullable=True)
+    trend_score = db.Column(db.Float, nullable=True)
+    norm_vote_average = db.Column(db.Float, nullable=True)
+    norm_popularity = db.Column(db.Float, nullable=True)
+    norm_vote_count = db.Column(db.Float, nullable=True)
+    norm_runtime = db.Column(db.Float, nullable=True)
+    norm_weighted_rating = db.Column(db.Float, nullable=True)
+    norm_trend_score = db.Column(db.Float, nullable=True)
+    combined_metric = db.Column(db.Float, nullable=True)
+    extend_existing=True
+
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
     __table_args__ = {'extend_existing': True}
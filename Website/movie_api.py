@@ -1,33 +1,117 @@
-import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from os import environ
 from datetime import datetime
-from sklearn.preprocessing import MinMaxScaler
+from Website.lazy_imports import lazy_module
+
+pd = lazy_module('pandas')
 
 load_dotenv()
 
 TOKEN = environ.get("API_TOKEN")
 API_KEY = environ.get("API_KEY")
 
-if not TOKEN:
-    raise ValueError("API_TOKEN is not set. Please set it in your .env file.")
+# Client settings, TMDB_BASE_URL can point at a local stub server
+BASE_URL = environ.get("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+PAGE_COUNT = int(environ.get("TMDB_PAGE_COUNT", 9))
+MAX_WORKERS = int(environ.get("TMDB_MAX_WORKERS", 4))
+TIMEOUT = float(environ.get("TMDB_TIMEOUT", 5))
+RETRIES = int(environ.get("TMDB_RETRIES", 3))
+BACKOFF = float(environ.get("TMDB_BACKOFF", 0.5))
 
-headers = {
-    "accept": "application/json",
-    "Authorization": f"Bearer {TOKEN}"
-}
+class TMDBClient:
+    def __init__(self, base_url=BASE_URL, max_workers=MAX_WORKERS, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF, token=None):
+        # Checked here rather than at import, so the app and CLI start without TMDB credentials
+        token = token or TOKEN
+        if not token:
+            raise ValueError("API_TOKEN is not set. Please set it in your .env file.")
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # One pooled session, retried with exponential backoff on rate limits and server errors
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update({
+            "accept": "application/json",
+            "Authorization": f"Bearer {token}"
+        })
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
-def fetch_api_data(page=1):
-    url = f"https://api.themoviedb.org/3/discover/movie?include_adult=false&include_video=false&language=en-US&page={page}&sort_by=popularity.desc&api_key={API_KEY}"
-    response = requests.get(url, headers=headers)
-    print(f"Fetching data for page {page}: Status Code {response.status_code}")  # Debugging: Print status code
-    if response.status_code == 200:
-        return response.json()  # Should return a dictionary with 'results'
-    else:
-        print(f"Failed to fetch data: {response.content}")  # Debugging: Print response content
+    def get(self, path, **params):
+        if API_KEY:
+            params.setdefault('api_key', API_KEY)
+        try:
+            response = self.session.get(f"{self.base_url}/{path.lstrip('/')}", params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"Request to {path} failed: {e}")
+            return None
+        if response.status_code == 200:
+            return response.json()
+        print(f"Failed to fetch {path}: Status Code {response.status_code} {response.content[:200]}")
         return None
 
+    def fetch_discover_page(self, page=1):
+        return self.get('discover/movie', include_adult='false', include_video='false', language='en-US',
+                        page=page, sort_by='popularity.desc')
+
+    def fetch_discover_pages(self, page_count=PAGE_COUNT):
+        # Fetch pages 1..page_count concurrently, results come back in page order with None for failures
+        pages = range(1, page_count + 1)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, page_count) or 1) as executor:
+            return list(executor.map(self.fetch_discover_page, pages))
+
+    def fetch_changed_movie_ids(self, start_date, end_date):
+        # Ids of movies created or edited on TMDB between the two dates (at most 14 days apart)
+        dates = {'start_date': start_date.isoformat(), 'end_date': end_date.isoformat()}
+        first = self.get('movie/changes', page=1, **dates)
+        if first is None:
+            return None
+        pages = [first]
+        remaining = range(2, (first.get('total_pages') or 1) + 1)
+        if remaining:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(remaining))) as executor:
+                pages += executor.map(lambda page: self.get('movie/changes', page=page, **dates), remaining)
+        ids = []
+        for data in pages:
+            if data is None:
+                return None  # a missing page would silently skip changes, let the caller retry the window
+            ids += [item['id'] for item in data.get('results', []) if not item.get('adult')]
+        return list(dict.fromkeys(ids))
+
+    def fetch_movie_details(self, tmdb_ids):
+        # Full records with credits and keywords, concurrently, None for movies that failed or were removed
+        def fetch(tmdb_id):
+            return self.get(f'movie/{tmdb_id}', append_to_response='credits,keywords', language='en-US')
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(fetch, tmdb_ids))
+
+_client = None
+
+def get_client():
+    # Shared client so every caller reuses the same connection pool
+    global _client
+    if _client is None:
+        _client = TMDBClient()
+    return _client
+
+def fetch_api_data(page=1):
+    return get_client().fetch_discover_page(page)  # Should return a dictionary with 'results'
+
+def fetch_api_pages(page_count=PAGE_COUNT):
+    return get_client().fetch_discover_pages(page_count)
+
 def process_movie_data(movie):
     movie_data = {
         'title': movie.get('title'),
@@ -49,7 +133,8 @@ def feature_extraction(df):
     
     #Trend score (release year...)
     current_year = datetime.now().year
-    df['release_year'] = pd.to_datetime(df['release_date']).dt.year
+    if 'release_date' in df:
+        df['release_year'] = pd.to_datetime(df['release_date']).dt.year
     df['trend_score'] = df['popularity'] / (current_year - df['release_year'] + 1)
     
     # Clean the data
@@ -57,6 +142,7 @@ def feature_extraction(df):
     df.dropna(subset=['vote_average', 'popularity', 'vote_count', 'weighted_rating', 'trend_score'], inplace=True)  # Drop rows with NaN values
     
     # Normalize the features using Min-Max scaling
+    from sklearn.preprocessing import MinMaxScaler
     scaler = MinMaxScaler()
     df[['vote_average', 'popularity', 'vote_count', 'weighted_rating', 'trend_score']] = scaler.fit_transform(
         df[['vote_average', 'popularity', 'vote_count', 'weighted_rating', 'trend_score']]
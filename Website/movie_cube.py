@@ -0,0 +1,209 @@
+#Pre-aggregated filter cube behind the intermediate Dash callbacks
+#Every aggregate the five charts need is computed once per snapshot, indexed by year, genre, star
+#and director codes. A dropdown change then slices and sums these small arrays instead of
+#copying and regrouping the whole exploded frame.
+from Website.lazy_imports import lazy_module
+from Website.dash_cache import LRUCache, normalize_selection
+from Website.movie_data import get_movie_snapshot
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+class FilterCube:
+    def __init__(self, snapshot):
+        self.version = snapshot.version
+        self.genre_names = snapshot.genre_names
+        self.director_names = snapshot.director_names
+        self.star_names = snapshot.star_names
+        self.genre_codes = {name: code for code, name in enumerate(snapshot.genre_names)}
+        self.director_codes = {name: code for code, name in enumerate(snapshot.director_names)}
+        self._views = LRUCache(512)
+
+        movies = snapshot.movies
+        listed = snapshot.listed
+        n_genres = len(self.genre_names)
+        n_directors = len(self.director_names)
+
+        # Links restricted to the listed movies, as plain integer arrays
+        genre_links = snapshot.movie_genres[listed[snapshot.movie_genres['movie'].to_numpy()]]
+        director_links = snapshot.movie_directors[listed[snapshot.movie_directors['movie'].to_numpy()]]
+        genre_movie = genre_links['movie'].to_numpy()
+        genre_code = genre_links['genre'].to_numpy()
+
+        popularity = movies['popularity'].to_numpy(dtype=float, na_value=np.nan)
+        sentiment = movies['overview_sentiment'].to_numpy(dtype=float, na_value=np.nan)
+        vote_count = movies['vote_count'].to_numpy(dtype=float, na_value=0)
+
+        ##(release_year, genre) counts
+        years = movies['release_year'].to_numpy(dtype=float, na_value=np.nan)
+        self.years = np.unique(years[listed & ~np.isnan(years)]).astype(int)
+        self.year_rows = {year: row for row, year in enumerate(self.years)}
+        year_row = np.full(len(movies), -1)
+        has_year = ~np.isnan(years)
+        year_row[has_year] = np.searchsorted(self.years, years[has_year].astype(int))
+        rows = year_row[genre_movie]
+        keep = rows >= 0
+        self.year_genre_counts = np.bincount(
+            rows[keep] * n_genres + genre_code[keep], minlength=len(self.years) * n_genres
+        ).astype(np.int32).reshape(len(self.years), n_genres)
+
+        ##(year) runtime quartiles, one distribution per movie
+        runtimes = pd.DataFrame({'release_year': years, 'runtime': movies['runtime'].to_numpy(dtype=float, na_value=np.nan)})[listed]
+        runtimes = runtimes.dropna().astype({'release_year': int})
+        self.runtime_stats = runtimes.groupby('release_year')['runtime'].apply(_box_stats).unstack().reindex(self.years)
+
+        ##(actor, genre) counts on the lead star (Star1)
+        star = movies['Star1'].to_numpy()[genre_movie]
+        keep = star >= 0
+        self.star_genre_counts = np.bincount(
+            star[keep] * n_genres + genre_code[keep], minlength=len(self.star_names) * n_genres
+        ).astype(np.int32).reshape(len(self.star_names), n_genres)
+
+        ##(genre) popularity and sentiment sums with their non-null counts, means are sum / count
+        self.genre_popularity_sum, self.genre_popularity_n = _sum_count(genre_code, popularity[genre_movie], n_genres)
+        self.genre_sentiment_sum, self.genre_sentiment_n = _sum_count(genre_code, sentiment[genre_movie], n_genres)
+
+        ##(director, genre) popularity sums and counts, plus vote totals per director
+        pairs = director_links.merge(genre_links, on='movie')
+        pair_index = pairs['director'].to_numpy() * n_genres + pairs['genre'].to_numpy()
+        total, count = _sum_count(pair_index, popularity[pairs['movie'].to_numpy()], n_directors * n_genres)
+        self.director_genre_popularity_sum = total.reshape(n_directors, n_genres)
+        self.director_genre_popularity_n = count.reshape(n_directors, n_genres)
+        self.director_votes = np.bincount(
+            director_links['director'].to_numpy(), weights=vote_count[director_links['movie'].to_numpy()], minlength=n_directors
+        )
+
+    def _view(self, kind, values, lookup, size):
+        # Sorted codes for a selection, shared by every chart filtered on it; empty selects everything
+        selection = normalize_selection(values)
+        def build():
+            if not selection:
+                return np.arange(size)
+            return np.unique(np.array([lookup[value] for value in selection if value in lookup], dtype=int))
+        return self._views.get_or_build((kind, selection), build)
+
+    def year_view(self, years=None):
+        return self._view('year', years, self.year_rows, len(self.years))
+
+    def genre_view(self, genres=None):
+        return self._view('genre', genres, self.genre_codes, len(self.genre_names))
+
+    def director_view(self, directors=None):
+        return self._view('director', directors, self.director_codes, len(self.director_names))
+
+    def year_options(self):
+        return self.years.tolist()
+
+    def top_directors(self, limit=10, codes=None):
+        if codes is None:
+            codes = self.director_view()
+        order = np.argsort(-self.director_votes[codes], kind='stable')[:limit]
+        return codes[order]
+
+    def releases_by_genre(self, rows):
+        # Long (release_year, genre, count) frame for the selected year rows
+        counts = self.year_genre_counts[rows]
+        year_index, genre_code = np.nonzero(counts)
+        return pd.DataFrame({
+            'release_year': self.years[rows][year_index],
+            'genre': self.genre_names[genre_code],
+            'count': counts[year_index, genre_code],
+        })
+
+    def runtime_box(self, rows):
+        # Precomputed box statistics per selected year row
+        return self.runtime_stats.iloc[rows].dropna().rename_axis('release_year').reset_index()
+
+    def star_genre_matrix(self, columns, limit=10):
+        # Actor x genre counts for the top actors within the selected genre codes
+        counts = self.star_genre_counts[:, columns]
+        totals = counts.sum(axis=1)
+        top = np.argsort(-totals, kind='stable')[:limit]
+        top = top[totals[top] > 0]
+        matrix = counts[top]
+        used = matrix.sum(axis=0) > 0
+        return pd.DataFrame(matrix[:, used], index=pd.Index(self.star_names[top], name='actor'),
+                            columns=pd.Index(self.genre_names[columns][used], name='genre')).sort_index()
+
+    def genre_popularity(self, codes):
+        # Mean popularity and overview sentiment per selected genre code
+        frame = pd.DataFrame({
+            'genre': self.genre_names[codes],
+            'popularity': _mean(self.genre_popularity_sum[codes], self.genre_popularity_n[codes]),
+            'overview_sentiment': _mean(self.genre_sentiment_sum[codes], self.genre_sentiment_n[codes]),
+        })
+        return frame[(self.genre_popularity_n[codes] + self.genre_sentiment_n[codes]) > 0].sort_values('genre').reset_index(drop=True)
+
+    def director_genre_popularity(self, codes, limit=10):
+        # Mean popularity per (director, genre) for the top directors of the selected codes
+        codes = self.top_directors(limit, codes)
+        director_index, genre_code = np.nonzero(self.director_genre_popularity_n[codes])
+        rows = codes[director_index]
+        frame = pd.DataFrame({
+            'director': self.director_names[rows],
+            'genre': self.genre_names[genre_code],
+            'popularity': self.director_genre_popularity_sum[rows, genre_code] / self.director_genre_popularity_n[rows, genre_code],
+        })
+        return frame.sort_values(by=['popularity'], ascending=False).reset_index(drop=True)
+
+    def client_data(self, stars_per_genre=50, directors=10):
+        # The aggregates the clientside callbacks filter in the browser, as plain JSON lists.
+        # Directors are cut to the ones the dropdown offers, so chart 5 stays exact. Stars are cut to
+        # the top stars_per_genre of each genre: chart 3 then ranks those candidates, which only
+        # differs from the server when a star outside every selected genre's top list would make
+        # the combined top 10.
+        candidates = set(np.argsort(-self.star_genre_counts.sum(axis=1), kind='stable')[:stars_per_genre].tolist())
+        for column in self.star_genre_counts.T:
+            candidates.update(np.argsort(-column, kind='stable')[:stars_per_genre].tolist())
+        stars = np.array(sorted(code for code in candidates if self.star_genre_counts[code].any()), dtype=int)
+        top = self.top_directors(directors)
+        return {
+            'version': self.version,
+            'genres': self.genre_names.tolist(),
+            'years': self.years.tolist(),
+            'year_genre_counts': self.year_genre_counts.tolist(),
+            'runtime': {column: _json_list(self.runtime_stats[column].to_numpy(dtype=float))
+                        for column in ('lowerfence', 'q1', 'median', 'q3', 'upperfence')},
+            'stars': self.star_names[stars].tolist(),
+            'star_genre_counts': self.star_genre_counts[stars].tolist(),
+            'genre_popularity_sum': self.genre_popularity_sum.tolist(),
+            'genre_popularity_n': self.genre_popularity_n.tolist(),
+            'genre_sentiment_sum': self.genre_sentiment_sum.tolist(),
+            'genre_sentiment_n': self.genre_sentiment_n.tolist(),
+            'directors': self.director_names[top].tolist(),
+            'director_genre_popularity_sum': self.director_genre_popularity_sum[top].tolist(),
+            'director_genre_popularity_n': self.director_genre_popularity_n[top].tolist(),
+        }
+
+def _json_list(values):
+    # NaN is not valid JSON, the browser gets null
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+def _box_stats(values):
+    # Tukey box statistics, matching what plotly computes for a raw box trace
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    return pd.Series({
+        'lowerfence': values[values >= q1 - 1.5 * iqr].min(),
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'upperfence': values[values <= q3 + 1.5 * iqr].max(),
+    })
+
+def _sum_count(index, values, size):
+    # Per-index sum and count of the non-null values
+    valid = ~np.isnan(values)
+    total = np.bincount(index[valid], weights=values[valid], minlength=size)
+    count = np.bincount(index[valid], minlength=size).astype(np.int32)  # counts are small, sums stay float64
+    return total, count
+
+def _mean(total, count):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+def get_filter_cube(snapshot=None):
+    # The cube lives on the snapshot it was built from, so a snapshot reload brings a fresh cube
+    if snapshot is None:
+        snapshot = get_movie_snapshot()
+    return snapshot.derived('cube', lambda: FilterCube(snapshot))
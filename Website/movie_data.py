@@ -0,0 +1,324 @@
+#In-process columnar snapshot of the movie catalogue
+#Built once per worker from flat column queries (no ORM objects, no join fan-out) and shared by
+#the Dash callbacks. Genres, directors and stars are integer coded, the filter cube the charts slice
+#is derived lazily and cached on the snapshot. When the catalogue changes a new version is
+#built in the background and swapped in, callbacks pin the version they started on.
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from Website.lazy_imports import lazy_module
+from sqlalchemy import select
+from Website import db
+from Website.models import Movie, Genre, Director, MovieGenre, MovieDirector
+from Website.catalogue import get_dataset_version, on_movies_changed
+from Website.metrics import timed, register_gauge, resident_bytes
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+STAR_COLUMNS = ['Star1', 'Star2', 'Star3', 'Star4']
+
+class MovieSnapshot:
+    def __init__(self, version, movies, genre_names, director_names, star_names, movie_genres, movie_directors, dataset_version=None):
+        self.version = version
+        self.dataset_version = dataset_version  # catalogue token the data was read at
+        self.built_at = datetime.now()
+        # One row per movie with downcast numeric columns, the title as a category and star codes (-1 = missing)
+        self.movies = movies
+        # Code -> name lookup arrays
+        self.genre_names = genre_names
+        self.director_names = director_names
+        self.star_names = star_names
+        # Link tables as (movie position, code) integer pairs
+        self.movie_genres = movie_genres
+        self.movie_directors = movie_directors
+        # Movies with at least one director and one genre, same rows the old inner joins returned
+        listed = np.zeros(len(movies), dtype=bool)
+        listed[np.intersect1d(movie_genres['movie'].to_numpy(), movie_directors['movie'].to_numpy())] = True
+        self.listed = listed
+        self._frames = {}
+        self._lock = threading.RLock()
+        # Bytes held per dataset, measured once when it is built
+        self.sizes = {
+            'columns': deep_bytes(movies),
+            'links': deep_bytes(movie_genres) + deep_bytes(movie_directors) + listed.nbytes,
+            'names': deep_bytes(genre_names) + deep_bytes(director_names) + deep_bytes(star_names),
+        }
+
+    def __len__(self):
+        return len(self.movies)
+
+    def release(self):
+        # Drop the filter cube and other derived structures of a replaced version; derived() rebuilds them
+        # if a straggler that never pinned the version still asks
+        with self._lock:
+            self._frames.clear()
+            self.sizes = {name: size for name, size in self.sizes.items() if name in ('columns', 'links', 'names')}
+
+    def derived(self, name, build):
+        # Build a derived structure once per snapshot and share it between callers
+        frame = self._frames.get(name)
+        if frame is None:
+            with self._lock:
+                frame = self._frames.get(name)
+                if frame is None:
+                    with timed('pandas'):
+                        frame = build()
+                    self._frames[name] = frame
+                    self.sizes[name] = deep_bytes(frame)
+                    _log_memory(self, [name])
+        return frame
+
+    def memory_report(self):
+        # dataset -> bytes, for the base columns and every derived structure built so far
+        with self._lock:
+            return dict(self.sizes)
+
+def deep_bytes(value, seen=None):
+    # Memory held by a frame, array or derived structure, including the Python strings it points to.
+    # An object reachable twice (a token in both the postings and a document's token set) counts once
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        # Categorical columns sharing one name table (Star1..Star4) count its strings once
+        total = int(value.index.memory_usage(deep=True))
+        for _, column in value.items():
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                total += column.cat.codes.nbytes
+                if id(column.cat.categories) not in seen:
+                    seen.add(id(column.cat.categories))
+                    total += int(column.cat.categories.memory_usage(deep=True))
+            else:
+                total += int(column.memory_usage(index=False, deep=True))
+        return total
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return value.nbytes + sum(deep_bytes(item, seen) for item in value.ravel())
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(deep_bytes(key, seen) + deep_bytes(item, seen) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(deep_bytes(item, seen) for item in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        # e.g. the filter cube or a sparse matrix, the sum of its arrays and lookups
+        return deep_bytes(vars(value), seen)
+    return sys.getsizeof(value)
+
+def _code_links(links, positions, code_of, code_column):
+    # Map (movie_id, dimension_id) rows onto (movie position, code) integer pairs
+    frame = pd.DataFrame({
+        'movie': positions.reindex(links.iloc[:, 0].to_numpy()).to_numpy(),
+        code_column: code_of.reindex(links.iloc[:, 1].to_numpy()).to_numpy(),
+    }).dropna()
+    return frame.astype({'movie': np.int32, code_column: np.int32}).reset_index(drop=True)
+
+def build_movie_snapshot(version=1):
+    # Read the token first, a change committed while the queries run triggers another reload
+    dataset_version = get_dataset_version()
+    connection = db.session.connection()
+    movies = pd.read_sql(select(
+        Movie.movie_id, Movie.title, Movie.vote_count, Movie.vote_average, Movie.popularity, Movie.runtime,
+        Movie.release_year, Movie.overview_sentiment, Movie.adult, *[getattr(Movie, column) for column in STAR_COLUMNS]
+    ).order_by(Movie.movie_id), connection)
+    genres = pd.read_sql(select(Genre.genre_id, Genre.name).order_by(Genre.genre_id), connection)
+    directors = pd.read_sql(select(Director.director_id, Director.name).order_by(Director.director_id), connection)
+    movie_genres = pd.read_sql(select(MovieGenre.c.movie_id, MovieGenre.c.genre_id), connection)
+    movie_directors = pd.read_sql(select(MovieDirector.c.movie_id, MovieDirector.c.director_id), connection)
+
+    # Narrowest type that holds each column, missing integers stay nullable instead of turning into
+    # float/object; scores only feed charts, so float32 precision is plenty
+    movies = movies.astype({
+        'movie_id': np.int32,
+        'title': 'category',
+        'vote_count': 'Int32',
+        'runtime': 'Int16',
+        'release_year': 'Int16',
+        'vote_average': np.float32,
+        'popularity': np.float32,
+        'overview_sentiment': np.float32,
+        'adult': 'boolean',
+    })
+
+    # Integer-code the four star columns against one shared name table
+    star_codes, star_names = pd.factorize(pd.concat([movies[column] for column in STAR_COLUMNS], ignore_index=True))
+    star_codes = star_codes.astype(np.int32).reshape(len(STAR_COLUMNS), len(movies))
+    for i, column in enumerate(STAR_COLUMNS):
+        movies[column] = star_codes[i]
+
+    positions = pd.Series(np.arange(len(movies)), index=movies['movie_id'].to_numpy())
+    genre_codes = pd.Series(np.arange(len(genres)), index=genres['genre_id'].to_numpy())
+    director_codes = pd.Series(np.arange(len(directors)), index=directors['director_id'].to_numpy())
+
+    return MovieSnapshot(
+        version=version,
+        movies=movies,
+        genre_names=genres['name'].to_numpy(dtype=object),
+        director_names=directors['name'].to_numpy(dtype=object),
+        star_names=np.asarray(star_names, dtype=object),
+        movie_genres=_code_links(movie_genres, positions, genre_codes, 'genre'),
+        movie_directors=_code_links(movie_directors, positions, director_codes, 'director'),
+        dataset_version=dataset_version,
+    )
+
+class SnapshotHandle:
+    # The current snapshot plus a reader count per version. A reload builds the next version while
+    # readers keep using the current one, swaps the reference under the lock, and releases the
+    # replaced version once the last callback reading it has finished.
+    def __init__(self):
+        self.current = None
+        self._readers = Counter()  # version -> callbacks reading it
+        self._retired = {}  # version -> replaced snapshot still being read
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def get(self):
+        # Build the snapshot on first use (needs an app context) and share it afterwards
+        if self.current is None:
+            with self._build_lock:
+                if self.current is None:
+                    with timed('pandas'):
+                        self.swap(build_movie_snapshot())
+        return self.current
+
+    @contextmanager
+    def reading(self):
+        # Pin the current version for the duration of a callback
+        self.get()
+        with self._lock:
+            snapshot = self.current
+            self._readers[snapshot.version] += 1
+        try:
+            yield snapshot
+        finally:
+            released = None
+            with self._lock:
+                self._readers[snapshot.version] -= 1
+                if not self._readers[snapshot.version]:
+                    del self._readers[snapshot.version]
+                    released = self._retired.pop(snapshot.version, None)
+            if released is not None:
+                released.release()
+
+    def swap(self, snapshot):
+        released = None
+        with self._lock:
+            previous, self.current = self.current, snapshot
+            if previous is not None:
+                if self._readers[previous.version]:
+                    self._retired[previous.version] = previous
+                else:
+                    released = previous
+        if released is not None:
+            released.release()
+        _log_memory(snapshot, ['columns', 'links', 'names'])
+        return snapshot
+
+    def reload(self):
+        # Build the next version off to the side, one build at a time, then swap it in
+        with self._build_lock:
+            version = self.current.version + 1 if self.current is not None else 1
+            with timed('pandas'):
+                snapshot = build_movie_snapshot(version)
+            return self.swap(snapshot)
+
+    def versions_in_use(self):
+        with self._lock:
+            return sorted(self._readers)
+
+    def memory_report(self):
+        # [(version, dataset, bytes)] for the current snapshot and replaced ones still being read
+        with self._lock:
+            snapshots = [snapshot for snapshot in (self.current, *self._retired.values()) if snapshot is not None]
+        return [(snapshot.version, name, size) for snapshot in snapshots for name, size in snapshot.memory_report().items()]
+
+_handle = SnapshotHandle()
+register_gauge('cinesurfer_dataset_bytes', 'Memory held by each in-memory dataset of the movie snapshot',
+               lambda: [({'dataset': name, 'version': version}, size) for version, name, size in _handle.memory_report()])
+
+def _log_memory(snapshot, names):
+    # One line per dataset and worker, RSS is what limits the workers a node can run
+    for name in names:
+        print(f"Worker {os.getpid()} snapshot v{snapshot.version} {name}: {snapshot.sizes[name] / 1e6:.1f} MB "
+              f"(resident {resident_bytes() / 1e6:.0f} MB)")
+
+def memory_report():
+    return _handle.memory_report()
+
+def get_movie_snapshot():
+    return _handle.get()
+
+def reading_snapshot():
+    # with reading_snapshot() as snapshot: ... keeps that version alive until the block exits
+    return _handle.reading()
+
+def reload_movie_snapshot():
+    return _handle.reload()
+
+class SnapshotReloader:
+    # Background reloads for long-running workers: another worker's ingest bumps the shared dataset
+    # version (picked up every interval), an ingest in this process wakes the thread right away.
+    # Nothing is reloaded before the snapshot was first used.
+    def __init__(self):
+        self.interval = 60
+        self.last_error = None
+        self._app = None
+        self._pending = False  # set by an ingest in this process, the cache token may not be shared
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self._app = app
+        self.interval = app.config.get('DASH_RELOAD_INTERVAL', self.interval)
+        app.extensions['snapshot_reloader'] = self
+        if self.interval > 0:
+            self.start()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='snapshot-reloader', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def notify(self, movie_ids=None):
+        # Runs inside after_commit, so it only flags the change and wakes the thread
+        self._pending = True
+        self._wake.set()
+
+    def reload_if_changed(self):
+        snapshot = _handle.current
+        if snapshot is None:
+            return None
+        if not self._pending and get_dataset_version() == snapshot.dataset_version:
+            return None
+        self._pending = False  # cleared before the build, changes committed during it reload again
+        return _handle.reload()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                with self._app.app_context():
+                    self.reload_if_changed()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                print(f"Snapshot reload failed: {e}")
+
+snapshot_reloader = SnapshotReloader()
+on_movies_changed(snapshot_reloader.notify)
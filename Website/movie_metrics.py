@@ -0,0 +1,84 @@
+#Materialized per-movie metrics behind /update_chart and the combined-metric gauge
+#Weighted rating, trend score, the min-max normalized radar metrics and the combined metric are
+#computed for the whole catalogue in one vectorized pass and stored in movie_metrics, so a request
+#reads one row by movie_id instead of refitting the scaler or averaging the catalogue.
+#Refresh after every ingest (`flask refresh-metrics`); global statistics (mean rating, vote
+#threshold, maxima) are taken at refresh time.
+from datetime import datetime
+from Website.lazy_imports import lazy_module
+from sqlalchemy import select, delete
+from Website import db
+from Website.models import Movie, MovieMetrics
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+GAUGE_MINIMUM_VOTES = 1000  # Minimum votes required to be listed in the chart
+VOTE_COUNT_QUANTILE = 0.9  # vote threshold of the radar's weighted rating, as in feature_extraction
+NORMALIZED_METRICS = ('vote_average', 'popularity', 'vote_count', 'runtime', 'weighted_rating', 'trend_score')
+
+def calculate_weighted_rating(vote_average, vote_count, C, m):
+    return (vote_count / (vote_count + m) * vote_average) + (m / (vote_count + m) * C)
+
+def calculate_combined_metric(weighted_rating, popularity, overview_sentiment, max_popularity, max_overview_sentiment=1.0):
+    normalized_popularity = popularity / max_popularity
+    normalized_overview_sentiment = overview_sentiment / max_overview_sentiment
+
+    # Calculate the combined metric (equal weights)
+    combined_metric = (weighted_rating + normalized_popularity + normalized_overview_sentiment) / 3
+    return combined_metric
+
+def _min_max(values):
+    low, high = values.min(), values.max()
+    if pd.isna(low) or high == low:
+        return values * 0.0
+    return (values - low) / (high - low)
+
+def compute_movie_metrics(movies, current_year=None):
+    # movies: movie_id, vote_average, vote_count, popularity, runtime, release_year, overview_sentiment
+    current_year = current_year or datetime.now().year
+    vote_average = movies['vote_average'].astype(np.float64)
+    vote_count = movies['vote_count'].astype(np.float64)
+    popularity = movies['popularity'].astype(np.float64)
+    runtime = movies['runtime'].astype(np.float64)
+    release_year = movies['release_year'].astype(np.float64)
+    sentiment = movies['overview_sentiment'].astype(np.float64)
+
+    C = vote_average.mean()
+    m = vote_count.quantile(VOTE_COUNT_QUANTILE)
+    metrics = pd.DataFrame({'movie_id': movies['movie_id'].to_numpy()})
+    metrics['weighted_rating'] = calculate_weighted_rating(vote_average, vote_count, C, m).to_numpy()
+    metrics['trend_score'] = (popularity / (current_year - release_year + 1)).to_numpy()
+    metrics = metrics.replace([np.inf, -np.inf], np.nan)
+
+    raw = {'vote_average': vote_average, 'popularity': popularity, 'vote_count': vote_count, 'runtime': runtime,
+           'weighted_rating': metrics['weighted_rating'], 'trend_score': metrics['trend_score']}
+    for name in NORMALIZED_METRICS:
+        metrics[f'norm_{name}'] = _min_max(pd.Series(np.asarray(raw[name], dtype=np.float64))).to_numpy()
+
+    gauge_rating = calculate_weighted_rating(vote_average, vote_count, C, GAUGE_MINIMUM_VOTES)
+    max_popularity = popularity.max()
+    metrics['combined_metric'] = calculate_combined_metric(
+        gauge_rating, popularity, sentiment, max_popularity if max_popularity and max_popularity > 0 else 1.0
+    ).to_numpy()
+    # NULL instead of NaN for movies missing an input
+    return metrics.astype(object).where(metrics.notna(), None)
+
+def refresh_movie_metrics(batch_size=5000):
+    # Recompute the whole table in one pass; returns the number of movies written
+    movies = pd.read_sql(select(
+        Movie.movie_id, Movie.vote_average, Movie.vote_count, Movie.popularity, Movie.runtime, Movie.release_year, Movie.overview_sentiment
+    ), db.session.connection())
+    rows = compute_movie_metrics(movies).to_dict('records')
+    for row in rows:
+        row['movie_id'] = int(row['movie_id'])
+    db.session.execute(delete(MovieMetrics))
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(MovieMetrics.__table__.insert(), rows[start:start + batch_size])
+    db.session.commit()
+    return len(rows)
+
+def metrics_for(movie_id):
+    # One primary-key read, None until `flask refresh-metrics` (or an ingest/sync) has built the row;
+    # the table is never rebuilt on the request path
+    return db.session.get(MovieMetrics, movie_id)
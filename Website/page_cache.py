@@ -0,0 +1,49 @@
+#Version-namespaced page cache with hit/miss counters
+#Rendered pages are stored in the shared cache backend under page/<dataset version>/<path>, so
+#every worker reuses the same copy and a dataset version bump retires all of them at once.
+import threading
+from collections import Counter
+from functools import wraps
+from flask import request
+from Website import cache
+from Website.catalogue import get_dataset_version
+from Website.metrics import record_cache
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+def record(endpoint, outcome):
+    with _stats_lock:
+        _stats[(endpoint, outcome)] += 1
+    record_cache('page', outcome)
+
+def cache_stats():
+    # {endpoint: {'hit': n, 'miss': n}} for this worker process
+    with _stats_lock:
+        stats = {}
+        for (endpoint, outcome), count in _stats.items():
+            stats.setdefault(endpoint, {'hit': 0, 'miss': 0})[outcome] = count
+        return stats
+
+def page_key(version=None):
+    return f"page/{version or get_dataset_version()}/{request.full_path}"
+
+def cached_page(timeout=300):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Only plain GETs are cached; form posts always reach the view
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            key = page_key()
+            page = cache.get(key)
+            if page is not None:
+                record(request.endpoint, 'hit')
+                return page
+            record(request.endpoint, 'miss')
+            page = view(*args, **kwargs)
+            if isinstance(page, str):
+                cache.set(key, page, timeout=timeout)
+            return page
+        return wrapper
+    return decorator
@@ -0,0 +1,108 @@
+#Content-based recommendations for /personalized.html
+#Movies are the idf-weighted genre/director/cast/keyword vectors from similarity.build_feature_matrix().
+#A user's profile is the sum of their favourites' vectors and their recommendations are the movies
+#scoring highest against it. On a request that is one sparse dot product over the catalogue;
+#`flask refresh-recommendations` scores every user at once (users x features @ features x movies,
+#blockwise across all cores) and rewrites user_recommendations in one transaction.
+import threading
+from Website.lazy_imports import lazy_module
+from sqlalchemy import select, delete
+from Website import db
+from Website.catalogue import get_dataset_version, on_movies_changed
+from Website.models import UserFavourite, UserRecommendation
+from Website.similarity import build_feature_matrix, top_k_scores
+
+np = lazy_module('numpy')
+sparse = lazy_module('scipy.sparse')
+
+RECOMMENDATION_COUNT = 5
+
+def _positions(movie_ids, wanted):
+    # Row of each wanted movie id in the sorted movie_ids array, dropping ids it does not contain
+    wanted = np.fromiter(wanted, dtype=np.int64)
+    if not len(movie_ids) or not len(wanted):
+        return np.empty(0, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(movie_ids, wanted), len(movie_ids) - 1)
+    return positions[movie_ids[positions] == wanted]
+
+def _best(scores, count):
+    count = min(count, len(scores))
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, count - 1)[:count] if count < len(scores) else np.arange(len(scores))
+    candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return candidates[scores[candidates] > 0]
+
+class ItemVectors:
+    # Process-local item matrix, rebuilt on the next use after the catalogue changes: a commit in this
+    # process sets stale, a load by another process (flask ingest, sync-tmdb) moves the dataset version
+    def __init__(self):
+        self.stale = True
+        self.version = None  # dataset version the vectors were built at
+        self._lock = threading.Lock()
+        self._vectors = None  # (sorted movie ids, row-normalized csr matrix)
+
+    def build(self):
+        self.stale = False
+        self.version = get_dataset_version()
+        movie_ids, matrix, _ = build_feature_matrix(with_names=False)
+        with self._lock:
+            self._vectors = (movie_ids, matrix)
+
+    def ensure_current(self):
+        if self.stale or self._vectors is None or self.version != get_dataset_version():
+            self.build()
+
+    def memory_bytes(self):
+        from Website.movie_data import deep_bytes
+        with self._lock:
+            return deep_bytes(self._vectors)
+
+    def recommend(self, favourite_ids, count=RECOMMENDATION_COUNT, exclude_ids=()):
+        # Movie ids best matching the summed favourite vectors, favourites and exclude_ids left out
+        self.ensure_current()
+        movie_ids, matrix = self._vectors
+        rows = _positions(movie_ids, favourite_ids)
+        if not len(rows):
+            return []
+        profile = sparse.csr_matrix(matrix[rows].sum(axis=0))
+        scores = (matrix @ profile.T).toarray().ravel()
+        scores[rows] = 0
+        scores[_positions(movie_ids, exclude_ids)] = 0
+        return [int(movie_ids[row]) for row in _best(scores, count)]
+
+item_vectors = ItemVectors()
+
+@on_movies_changed
+def _mark_stale(movie_ids):
+    item_vectors.stale = True
+
+def refresh_all_recommendations(count=RECOMMENDATION_COUNT, workers=None, batch_size=5000):
+    # Recompute user_recommendations for every user with favourites; returns (users, rows written)
+    movie_ids, matrix, _ = build_feature_matrix(with_names=False)
+    favourites = db.session.execute(select(UserFavourite.c.user_id, UserFavourite.c.movie_id)).all()
+    db.session.execute(delete(UserRecommendation))
+    if not favourites or not len(movie_ids):
+        db.session.commit()
+        return 0, 0
+
+    user_ids, user_rows = np.unique(np.array([user_id for user_id, _ in favourites], dtype=np.int64), return_inverse=True)
+    liked = np.array([movie_id for _, movie_id in favourites], dtype=np.int64)
+    positions = np.minimum(np.searchsorted(movie_ids, liked), len(movie_ids) - 1)
+    known = movie_ids[positions] == liked
+    likes = sparse.csr_matrix((np.ones(known.sum()), (user_rows[known], positions[known])), shape=(len(user_ids), len(movie_ids)))
+    profiles = (likes @ matrix).tocsr()
+
+    rows = []
+    written = 0
+    for user_row, columns, _ in top_k_scores(profiles, matrix.T.tocsc(), count, exclude=likes, workers=workers):
+        rows += [{'user_id': int(user_ids[user_row]), 'movie_id': int(movie_ids[column])} for column in columns]
+        if len(rows) >= batch_size:
+            db.session.execute(UserRecommendation.insert(), rows)
+            written += len(rows)
+            rows = []
+    if rows:
+        db.session.execute(UserRecommendation.insert(), rows)
+        written += len(rows)
+    db.session.commit()
+    return len(user_ids), written
@@ -0,0 +1,255 @@
+#Tokenized inverted index behind search_movies()
+#Title, overview, cast, genres and all_combined_keywords are tokenized into per-field weighted
+#postings, so a search is a handful of dict lookups instead of four leading-wildcard ILIKE scans.
+#Results are ranked by tf-idf with title matches weighted above cast/genre/keyword/overview ones.
+#search_page() returns one keyset page of matches. The ranking of a query is computed once and kept
+#(as compact arrays) while the index is unchanged, so every later page is a bisect and a slice.
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, OrderedDict
+from sqlalchemy import select
+from Website import db
+from Website.catalogue import get_dataset_version, on_movies_changed
+from Website.models import Movie, Actor, Genre, MovieActor, MovieGenre
+
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'cast': 2.0,
+    'genres': 2.0,
+    'keywords': 1.5,
+    'overview': 1.0,
+}
+PREFIX_WEIGHT = 0.5  # a partially typed word counts half as much as a whole-word match
+MAX_PREFIX_EXPANSIONS = 50
+RANKING_CACHE_SIZE = 16  # queries whose full ranking is kept for paging, least recently used dropped first
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = {'a', 'an', 'and', 'the', 'of', 'in', 'on', 'to', 'for', 'is', 'it', 'with', 'at', 'by', 'from'}
+
+def tokenize(text):
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.casefold())
+
+def query_tokens(text):
+    # Stopwords are dropped from queries unless the query is nothing but stopwords
+    tokens = tokenize(text)
+    return [token for token in tokens if token not in STOPWORDS] or tokens
+
+def clean_keywords(keywords):
+    # all_combined_keywords is stored as a stringified list, e.g. "['hero', 'space']"
+    return (keywords or '').replace('[', ' ').replace(']', ' ').replace("'", ' ').replace('"', ' ')
+
+class MovieSearchIndex:
+    def __init__(self):
+        self.postings = defaultdict(dict)  # token -> {movie_id: weighted term frequency}
+        self.documents = {}  # movie_id -> set of tokens, used to drop stale postings on update
+        self.popularity = {}  # movie_id -> popularity, the alternative sort order for result pages
+        self.pending = set()  # movie ids changed since the last search, indexed lazily
+        self.built = False
+        self.version = None  # dataset version the index reflects
+        self.pending_version = None  # dataset version once the pending ids are re-indexed
+        self._vocabulary = None  # sorted tokens for prefix lookups, rebuilt after updates
+        self._rankings = OrderedDict()  # (query tokens, order) -> (negated keys, movie ids), cleared after updates
+        self._generation = 0  # bumped on every update so a ranking computed meanwhile is not cached
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()  # one full rebuild at a time
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _fetch(self, movie_ids=None):
+        # Flat column queries for the indexed fields, optionally restricted to some movies
+        movies = select(Movie.movie_id, Movie.title, Movie.overview, Movie.all_combined_keywords, Movie.popularity)
+        cast = select(MovieActor.c.movie_id, Actor.name).join(Actor, Actor.actor_id == MovieActor.c.actor_id)
+        genres = select(MovieGenre.c.movie_id, Genre.name).join(Genre, Genre.genre_id == MovieGenre.c.genre_id)
+        if movie_ids is not None:
+            movies = movies.where(Movie.movie_id.in_(movie_ids))
+            cast = cast.where(MovieActor.c.movie_id.in_(movie_ids))
+            genres = genres.where(MovieGenre.c.movie_id.in_(movie_ids))
+
+        fields = {}
+        for movie_id, title, overview, keywords, popularity in db.session.execute(movies):
+            fields[movie_id] = {'title': title, 'overview': overview, 'keywords': clean_keywords(keywords), 'cast': [], 'genres': [],
+                                'popularity': popularity or 0.0}
+        for movie_id, name in db.session.execute(cast):
+            if movie_id in fields:
+                fields[movie_id]['cast'].append(name)
+        for movie_id, name in db.session.execute(genres):
+            if movie_id in fields:
+                fields[movie_id]['genres'].append(name)
+        return fields
+
+    def _add(self, movie_id, fields):
+        weights = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            value = fields[field]
+            text = ' '.join(value) if isinstance(value, list) else value
+            for token in tokenize(text):
+                weights[token] += weight
+        for token, weight in weights.items():
+            self.postings[token][movie_id] = weight
+        self.documents[movie_id] = set(weights)
+        self.popularity[movie_id] = fields['popularity']
+
+    def _remove(self, movie_id):
+        self.popularity.pop(movie_id, None)
+        for token in self.documents.pop(movie_id, ()):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(movie_id, None)
+                if not postings:
+                    del self.postings[token]
+
+    def build(self, version=None):
+        # Full rebuild from the database; the version is read first so a change landing mid-build
+        # leaves the index behind the shared version and triggers another rebuild
+        version = get_dataset_version() if version is None else version
+        fields = self._fetch()
+        with self._lock:
+            self.postings = defaultdict(dict)
+            self.documents = {}
+            self.popularity = {}
+            self.pending.clear()
+            for movie_id, movie_fields in fields.items():
+                self._add(movie_id, movie_fields)
+            self._vocabulary = None
+            self._rankings.clear()
+            self._generation += 1
+            self.version = self.pending_version = version
+            self.built = True
+
+    def update_movies(self, movie_ids):
+        # Re-index only the given movies; ids that no longer exist are dropped from the index
+        movie_ids = list(movie_ids)
+        fields = {}
+        for start in range(0, len(movie_ids), 500):
+            fields.update(self._fetch(movie_ids[start:start + 500]))
+        with self._lock:
+            for movie_id in movie_ids:
+                self._remove(movie_id)
+                if movie_id in fields:
+                    self._add(movie_id, fields[movie_id])
+            self._vocabulary = None
+            self._rankings.clear()
+            self._generation += 1
+
+    def mark_changed(self, movie_ids, version=None):
+        with self._lock:
+            self.pending.update(movie_ids)
+            self.pending_version = version
+
+    def ensure_current(self):
+        # Commits in this process arrive as pending ids and are re-indexed one by one. Any other
+        # dataset version means another process (flask ingest, sync-tmdb) changed the catalogue
+        # without telling us which movies, so the index is rebuilt.
+        version = get_dataset_version()
+        if not self.built or version not in (self.version, self.pending_version):
+            with self._build_lock:
+                if not self.built or version not in (self.version, self.pending_version):
+                    self.build(version)
+        elif self.pending:
+            with self._lock:
+                pending, self.pending = self.pending, set()
+                self.version = self.pending_version
+            self.update_movies(pending)
+
+    def memory_bytes(self):
+        # Postings, documents and cached rankings, for flask memory-report
+        from Website.movie_data import deep_bytes
+        with self._lock:
+            return deep_bytes((self.postings, self.documents, self.popularity, self._vocabulary, self._rankings))
+
+    def _expand(self, token):
+        # Whole-word postings plus up to MAX_PREFIX_EXPANSIONS words starting with the token
+        with self._lock:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self.postings)
+            vocabulary = self._vocabulary
+        matches = []
+        if token in self.postings:
+            matches.append((token, 1.0))
+        position = bisect_left(vocabulary, token)
+        while position < len(vocabulary) and len(matches) < MAX_PREFIX_EXPANSIONS and vocabulary[position].startswith(token):
+            if vocabulary[position] != token:
+                matches.append((vocabulary[position], PREFIX_WEIGHT))
+            position += 1
+        return matches
+
+    def _scores(self, text):
+        # {movie id: score} for the movies matching every query word (whole word or prefix)
+        self.ensure_current()
+        tokens = query_tokens(text)
+        if not tokens:
+            return {}
+        with self._lock:
+            total = max(len(self.documents), 1)
+            scores = None
+            for token in dict.fromkeys(tokens):
+                token_scores = defaultdict(float)
+                for word, factor in self._expand(token):
+                    postings = self.postings.get(word, {})
+                    idf = math.log(1 + total / (len(postings) or 1))
+                    for movie_id, weight in postings.items():
+                        token_scores[movie_id] += factor * weight * idf
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {movie_id: score + token_scores[movie_id] for movie_id, score in scores.items() if movie_id in token_scores}
+                if not scores:
+                    return {}
+        return scores
+
+    def search(self, text, limit=None):
+        # (movie id, score) pairs matching every query word, best first
+        scores = self._scores(text)
+        if limit is not None:
+            return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def _ranking(self, text, order):
+        # Every match sorted by (-key, movie id), the key being the score or the popularity
+        self.ensure_current()
+        cache_key = (tuple(dict.fromkeys(query_tokens(text))), order)
+        with self._lock:
+            ranking = self._rankings.get(cache_key)
+            if ranking is not None:
+                self._rankings.move_to_end(cache_key)
+                return ranking
+            generation = self._generation
+        scores = self._scores(text)
+        if order == 'popularity':
+            with self._lock:
+                ranked = sorted((-self.popularity.get(movie_id, 0.0), movie_id) for movie_id in scores)
+        else:
+            ranked = sorted((-score, movie_id) for movie_id, score in scores.items())
+        ranking = (array('d', [key for key, _ in ranked]), array('q', [movie_id for _, movie_id in ranked]))
+        with self._lock:
+            if generation == self._generation:
+                self._rankings[cache_key] = ranking
+                while len(self._rankings) > RANKING_CACHE_SIZE:
+                    self._rankings.popitem(last=False)
+        return ranking
+
+    def search_page(self, text, limit, after=None, order='relevance'):
+        # One page of (movie id, sort key) pairs ordered by key descending then movie id, starting after
+        # the (key, movie id) cursor of the previous page, and how many movies match in total
+        keys, movie_ids = self._ranking(text, order)
+        start = 0
+        if after is not None:
+            last_key, last_id = after
+            start = bisect_right(range(len(keys)), (-last_key, last_id), key=lambda row: (keys[row], movie_ids[row]))
+        return [(movie_ids[row], -keys[row]) for row in range(start, min(start + limit, len(keys)))], len(keys)
+
+search_index = MovieSearchIndex()
+
+# Changed movies are re-indexed lazily on the next search; notify_movies_changed() has already
+# bumped the dataset version, which is the version the index reaches once they are re-indexed
+@on_movies_changed
+def _mark_changed(movie_ids):
+    if search_index.built:
+        search_index.mark_changed(movie_ids, get_dataset_version())
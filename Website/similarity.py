@@ -0,0 +1,212 @@
+#Offline similar-movie graph for the movie dashboard, and the item vectors behind recommendations
+#Every movie is a sparse vector over its genres, directors, cast and keywords (idf weighted, so
+#sharing a rare director counts for more than sharing "Drama"), and its top-k neighbours by cosine
+#similarity are stored in movie_neighbours together with their position in the movie's graph.
+#searched_movieDashboard() then reads one movie's rows instead of querying and laying out a graph.
+#The blockwise top-k search is shared with the recommender and fans out over a process pool.
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from Website.lazy_imports import lazy_module
+from sqlalchemy import select, delete, func
+from Website import db
+from Website.models import Movie, Genre, Actor, Director, MovieGenre, MovieActor, MovieDirector, MovieNeighbour
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+sparse = lazy_module('scipy.sparse')
+
+TOP_K = 10
+BLOCK_BYTES = 64 * 1024 * 1024  # dense scores held per process at a time
+FEATURE_WEIGHTS = {
+    'genres': 1.0,
+    'directors': 2.0,
+    'cast': 1.5,
+    'keywords': 0.5,
+}
+FEATURE_TABLES = {
+    'genres': (MovieGenre.c.movie_id, MovieGenre.c.genre_id, Genre.genre_id, Genre.name),
+    'directors': (MovieDirector.c.movie_id, MovieDirector.c.director_id, Director.director_id, Director.name),
+    'cast': (MovieActor.c.movie_id, MovieActor.c.actor_id, Actor.actor_id, Actor.name),
+}
+
+def _links(kind, with_names):
+    # (movie id, feature) frame; features are ids, or names when they are needed for hover text.
+    # Keywords come from the stringified list on the movie itself
+    connection = db.session.connection()
+    if kind == 'keywords':
+        keywords = pd.read_sql(select(Movie.movie_id, Movie.all_combined_keywords.label('feature')), connection)
+        # Vectorized clean_and_split: "['hero', 'space']" -> one row per keyword
+        keywords['feature'] = keywords['feature'].str.replace(r"[\[\]'\"]", '', regex=True).str.split(',')
+        keywords = keywords.explode('feature')
+        keywords['feature'] = keywords['feature'].str.strip()
+        return keywords[keywords['feature'].fillna('') != ''].drop_duplicates()
+    movie_column, feature_column, name_key, name = FEATURE_TABLES[kind]
+    if with_names:
+        query = select(movie_column, name.label('feature')).join(name_key.table, name_key == feature_column)
+    else:
+        query = select(movie_column, feature_column.label('feature'))
+    return pd.read_sql(query, connection)
+
+def build_feature_matrix(with_names=True):
+    # (movie ids, row-normalized csr matrix, {movie id: {kind: set of names}}) for the whole catalogue
+    movie_ids = np.array(db.session.execute(select(Movie.movie_id).order_by(Movie.movie_id)).scalars().all(), dtype=np.int64)
+    names = {}
+    blocks = []
+    for kind, weight in FEATURE_WEIGHTS.items():
+        links = _links(kind, with_names)
+        if links.empty:
+            continue
+        columns, features = pd.factorize(links['feature'])
+        rows = np.searchsorted(movie_ids, links['movie_id'].to_numpy(dtype=np.int64))
+        document_frequency = np.bincount(columns, minlength=len(features))
+        idf = np.log1p(len(movie_ids) / document_frequency)
+        values = weight * idf[columns]
+        blocks.append(sparse.csr_matrix((values, (rows, columns)), shape=(len(movie_ids), len(features))))
+        if with_names:
+            for movie_id, group in links.groupby('movie_id')['feature']:
+                names.setdefault(movie_id, {})[kind] = set(group)
+    if not blocks:
+        return movie_ids, sparse.csr_matrix((len(movie_ids), 0)), names
+    matrix = sparse.hstack(blocks, format='csr')
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix = sparse.diags(1.0 / norms) @ matrix
+    return movie_ids, matrix.tocsr(), names
+
+def _block_top_k(queries, items, exclude, start, end, k):
+    # Best k item columns of queries[start:end] @ items, skipping excluded pairs and zero scores
+    scores = (queries[start:end] @ items).toarray()
+    if exclude is not None:
+        rows, columns = exclude[start:end].nonzero()
+        scores[rows, columns] = 0
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return [(np.empty(0, dtype=np.int64), np.empty(0)) for _ in range(end - start)]
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (end - start, 1))
+    results = []
+    for offset, row_candidates in enumerate(candidates):
+        row_scores = scores[offset, row_candidates]
+        order = np.argsort(-row_scores, kind='stable')
+        keep = row_scores[order] > 0
+        results.append((row_candidates[order][keep], row_scores[order][keep]))
+    return results
+
+_worker_matrices = None
+
+def _init_worker(queries, items, exclude):
+    global _worker_matrices
+    _worker_matrices = (queries, items, exclude)
+
+def _worker_top_k(start, end, k):
+    return _block_top_k(*_worker_matrices, start, end, k)
+
+def top_k_scores(queries, items, k, exclude=None, block_size=None, workers=None):
+    # Yields (query row, item columns, scores) best first, in row order. Only one block of scores
+    # per process is dense at a time; blocks are spread over `workers` processes (default: all cores)
+    count = queries.shape[0]
+    block_size = block_size or max(1, BLOCK_BYTES // (8 * max(items.shape[1], 1)))
+    starts = list(range(0, count, block_size))
+    ends = [min(start + block_size, count) for start in starts]
+    workers = min(workers or os.cpu_count() or 1, len(starts))
+    if workers <= 1:
+        blocks = (_block_top_k(queries, items, exclude, start, end, k) for start, end in zip(starts, ends))
+        for start, block in zip(starts, blocks):
+            for offset, (columns, scores) in enumerate(block):
+                yield start + offset, columns, scores
+        return
+    # spawn, as for the word clouds: the workers only need the matrices, not the app or its connections
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(queries, items, exclude)) as executor:
+        for start, block in zip(starts, executor.map(_worker_top_k, starts, ends, repeat(k))):
+            for offset, (columns, scores) in enumerate(block):
+                yield start + offset, columns, scores
+
+def top_k_neighbours(matrix, k=TOP_K, block_size=None, workers=None):
+    # Yields (row, neighbour rows, scores) best first; a movie is not its own neighbour
+    itself = sparse.identity(matrix.shape[0], format='csr')
+    yield from top_k_scores(matrix, matrix.T.tocsc(), k, itself, block_size, workers)
+
+def describe_shared(names, movie_id, neighbour_id):
+    # Hover text for an edge, e.g. "Genres: Drama | Directors: Greta Gerwig"
+    mine, theirs = names.get(movie_id, {}), names.get(neighbour_id, {})
+    parts = []
+    for kind in FEATURE_WEIGHTS:
+        shared = sorted(mine.get(kind, set()) & theirs.get(kind, set()))
+        if shared:
+            parts.append(f"{kind.capitalize()}: {', '.join(shared)}")
+    return ' | '.join(parts)[:300]
+
+def layout_positions(scores):
+    # Neighbours on a ring around the movie at (0, 0), closer the more similar they are;
+    # deterministic, so the stored layout is stable between rebuilds
+    count = len(scores)
+    positions = []
+    for rank, score in enumerate(scores):
+        angle = 2 * math.pi * rank / max(count, 1)
+        radius = 1.5 - float(score)
+        positions.append((radius * math.cos(angle), radius * math.sin(angle)))
+    return positions
+
+def build_movie_neighbours(k=TOP_K, batch_size=5000, workers=None):
+    # Recompute the whole neighbour table; returns the number of rows written
+    movie_ids, matrix, names = build_feature_matrix()
+    db.session.execute(delete(MovieNeighbour))
+    rows = []
+    written = 0
+    for row, neighbour_rows, scores in top_k_neighbours(matrix, k, workers=workers):
+        movie_id = int(movie_ids[row])
+        for rank, (neighbour_row, score, (x, y)) in enumerate(zip(neighbour_rows, scores, layout_positions(scores))):
+            neighbour_id = int(movie_ids[neighbour_row])
+            rows.append({'movie_id': movie_id, 'neighbour_rank': rank, 'neighbour_id': neighbour_id,
+                         'score': float(score), 'shared': describe_shared(names, movie_id, neighbour_id), 'x': x, 'y': y})
+        if len(rows) >= batch_size:
+            db.session.execute(MovieNeighbour.__table__.insert(), rows)
+            written += len(rows)
+            rows = []
+    if rows:
+        db.session.execute(MovieNeighbour.__table__.insert(), rows)
+        written += len(rows)
+    db.session.commit()
+    return written
+
+def live_neighbours(movie_id, k=TOP_K):
+    # Fallback for a movie added since the last build: weighted count of shared genres, directors
+    # and cast, one grouped query per feature kind
+    totals = {}
+    shared = {}
+    for kind, (movie_column, feature_column, name_key, name) in FEATURE_TABLES.items():
+        weight = FEATURE_WEIGHTS[kind]
+        table = movie_column.table
+        other = table.alias()
+        query = (select(other.c.movie_id, func.count())
+                 .join(table, table.c[feature_column.name] == other.c[feature_column.name])
+                 .where(table.c.movie_id == movie_id, other.c.movie_id != movie_id)
+                 .group_by(other.c.movie_id))
+        for neighbour_id, count in db.session.execute(query):
+            totals[neighbour_id] = totals.get(neighbour_id, 0) + weight * count
+            shared.setdefault(neighbour_id, []).append(f"{count} {kind}")
+    if not totals:
+        return []
+    best = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:k]
+    top_score = best[0][1]
+    scores = [total / top_score for _, total in best]
+    titles = dict(db.session.execute(select(Movie.movie_id, Movie.title).where(Movie.movie_id.in_([movie for movie, _ in best]))).all())
+    return [(titles[neighbour_id], ', '.join(shared[neighbour_id]), score, x, y)
+            for (neighbour_id, _), score, (x, y) in zip(best, scores, layout_positions([0.5 * score for score in scores]))]
+
+def neighbours_for(movie_id, k=TOP_K):
+    # (title, shared description, score, x, y) per neighbour, best first; a single indexed range read
+    rows = db.session.execute(
+        select(Movie.title, MovieNeighbour.shared, MovieNeighbour.score, MovieNeighbour.x, MovieNeighbour.y)
+        .join(Movie, Movie.movie_id == MovieNeighbour.neighbour_id)
+        .where(MovieNeighbour.movie_id == movie_id)
+        .order_by(MovieNeighbour.neighbour_rank)
+        .limit(k)
+    ).all()
+    return rows or live_neighbours(movie_id, k)
@@ -0,0 +1,170 @@
+// Clientside callbacks for the intermediate dashboard (DASH_CLIENTSIDE_FILTERING)
+// The layout ships FilterCube.client_data() in the 'filter-data' store once per page load; every
+// dropdown change is then filtered and drawn here, producing the same traces as the plotly express
+// charts the server callbacks build, without a request.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    cinesurfer: (function() {
+        // Indexes selected by a dropdown value; an empty selection selects everything
+        function selected(values, names) {
+            if (!values || values.length === 0) {
+                return names.map((_, index) => index);
+            }
+            const wanted = new Set(values.map(String));
+            return names.map((name, index) => index).filter(index => wanted.has(String(names[index])));
+        }
+
+        function range(length) {
+            return Array.from({length: length}, (_, index) => index);
+        }
+
+        function colour(data, index) {
+            const colorway = data.template.layout.colorway || [];
+            return colorway.length ? colorway[index % colorway.length] : undefined;
+        }
+
+        function axes(x, y, extra) {
+            return Object.assign({
+                xaxis: {anchor: 'y', domain: [0, 1], title: {text: x}},
+                yaxis: {anchor: 'x', domain: [0, 1], title: {text: y}},
+                margin: {t: 60},
+            }, extra || {});
+        }
+
+        function figure(data, traces, layout) {
+            layout.template = data.template;
+            return {data: traces, layout: layout};
+        }
+
+        // One trace per group in order of first appearance, like plotly express with color=
+        function groupTraces(data, rows, group, build) {
+            const order = [];
+            const groups = {};
+            rows.forEach(row => {
+                const key = row[group];
+                if (!(key in groups)) {
+                    groups[key] = [];
+                    order.push(key);
+                }
+                groups[key].push(row);
+            });
+            return order.map((key, index) => build(key, groups[key], colour(data, index)));
+        }
+
+        function mean(total, count) {
+            return count > 0 ? total / count : null;
+        }
+
+        //CHART 1: Number of Movie Releases by Genre Over Time
+        function releasesByGenre(data, rows) {
+            const records = [];
+            rows.forEach(row => {
+                data.year_genre_counts[row].forEach((count, genre) => {
+                    if (count > 0) {
+                        records.push({release_year: data.years[row], genre: data.genres[genre], count: count});
+                    }
+                });
+            });
+            records.sort((a, b) => b.release_year - a.release_year || a.count - b.count);
+            const traces = groupTraces(data, records, 'genre', (genre, group, color) => ({
+                type: 'scatter', mode: 'lines', stackgroup: '1', orientation: 'v', name: genre, legendgroup: genre,
+                showlegend: true, line: {color: color}, x: group.map(r => r.release_year), y: group.map(r => r.count),
+                hovertemplate: 'genre=' + genre + '<br>release_year=%{x}<br>count=%{y}<extra></extra>',
+            }));
+            const layout = axes('release_year', 'count', {legend: {title: {text: 'genre'}, tracegroupgap: 0}});
+            layout.xaxis.dtick = 1;
+            return figure(data, traces, layout);
+        }
+
+        //CHART 2: Average Movie Runtime by year, drawn from precomputed quartiles
+        function runtimeBox(data, rows) {
+            const runtime = data.runtime;
+            rows = rows.filter(row => runtime.median[row] !== null);
+            const pick = column => rows.map(row => runtime[column][row]);
+            const trace = {
+                type: 'box', name: 'runtime', x: rows.map(row => data.years[row]), q1: pick('q1'), median: pick('median'),
+                q3: pick('q3'), lowerfence: pick('lowerfence'), upperfence: pick('upperfence'),
+            };
+            const layout = axes('release_year', 'runtime');
+            layout.xaxis.dtick = 1;
+            return figure(data, [trace], layout);
+        }
+
+        //CHART 3: Top 10 Starred Actors/Actresses Across Genres
+        function starGenreMatrix(data, columns, limit) {
+            const totals = data.star_genre_counts.map(counts => columns.reduce((sum, column) => sum + counts[column], 0));
+            const top = range(totals.length).sort((a, b) => totals[b] - totals[a] || a - b)
+                .slice(0, limit).filter(star => totals[star] > 0);
+            const used = columns.filter(column => top.some(star => data.star_genre_counts[star][column] > 0));
+            top.sort((a, b) => (data.stars[a] < data.stars[b] ? -1 : data.stars[a] > data.stars[b] ? 1 : 0));
+            const trace = {
+                type: 'heatmap', coloraxis: 'coloraxis', name: '0', x: used.map(column => data.genres[column]),
+                y: top.map(star => data.stars[star]), z: top.map(star => used.map(column => data.star_genre_counts[star][column])),
+                hovertemplate: 'genre: %{x}<br>actor: %{y}<br>color: %{z}<extra></extra>',
+            };
+            const layout = axes('genre', 'actor', {
+                coloraxis: {colorscale: data.template.layout.colorscale && data.template.layout.colorscale.sequential},
+                width: 500, height: 500,
+            });
+            Object.assign(layout.xaxis, {scaleanchor: 'y', constrain: 'domain'});
+            Object.assign(layout.yaxis, {autorange: 'reversed', constrain: 'domain'});
+            return figure(data, [trace], layout);
+        }
+
+        //CHART 4: Average Popularity and Sentiment of Movies by Genre
+        function genrePopularity(data, codes) {
+            const records = codes
+                .filter(code => data.genre_popularity_n[code] + data.genre_sentiment_n[code] > 0)
+                .map(code => ({
+                    genre: data.genres[code],
+                    popularity: mean(data.genre_popularity_sum[code], data.genre_popularity_n[code]),
+                    overview_sentiment: mean(data.genre_sentiment_sum[code], data.genre_sentiment_n[code]),
+                }))
+                .sort((a, b) => (a.genre < b.genre ? -1 : a.genre > b.genre ? 1 : 0));
+            const traces = groupTraces(data, records, 'genre', (genre, group, color) => ({
+                type: 'scatter', mode: 'markers', orientation: 'v', name: genre, legendgroup: genre, showlegend: true,
+                marker: {color: color, symbol: 'circle'}, x: group.map(r => r.popularity), y: group.map(r => r.overview_sentiment),
+                customdata: group.map(r => [r.genre]),
+                hovertemplate: 'genre=%{customdata[0]}<br>popularity=%{x}<br>overview_sentiment=%{y}<extra></extra>',
+            }));
+            return figure(data, traces, axes('popularity', 'overview_sentiment', {legend: {title: {text: 'genre'}, tracegroupgap: 0}}));
+        }
+
+        //CHART 5: Popularity Success of Genres by Top 10 Directors
+        function directorGenrePopularity(data, rows) {
+            const records = [];
+            rows.forEach(row => {
+                data.director_genre_popularity_n[row].forEach((count, genre) => {
+                    if (count > 0) {
+                        records.push({
+                            director: data.directors[row],
+                            genre: data.genres[genre],
+                            popularity: data.director_genre_popularity_sum[row][genre] / count,
+                        });
+                    }
+                });
+            });
+            records.sort((a, b) => b.popularity - a.popularity);
+            const traces = groupTraces(data, records, 'genre', (genre, group, color) => ({
+                type: 'bar', orientation: 'v', name: genre, legendgroup: genre, offsetgroup: genre, alignmentgroup: 'True',
+                showlegend: true, textposition: 'auto', marker: {color: color, pattern: {shape: ''}},
+                x: group.map(r => r.director), y: group.map(r => r.popularity),
+                hovertemplate: 'genre=' + genre + '<br>director=%{x}<br>popularity=%{y}<extra></extra>',
+            }));
+            return figure(data, traces, axes('director', 'popularity', {legend: {title: {text: 'genre'}, tracegroupgap: 0}, barmode: 'stack'}));
+        }
+
+        return {
+            yearCharts: function(selectedYears, data) {
+                const rows = selected(selectedYears, data.years);
+                return [releasesByGenre(data, rows), runtimeBox(data, rows)];
+            },
+            genreCharts: function(selectedGenres, data) {
+                const codes = selected(selectedGenres, data.genres);
+                return [starGenreMatrix(data, codes, 10), genrePopularity(data, codes)];
+            },
+            directorChart: function(selectedDirectors, data) {
+                return directorGenrePopularity(data, selected(selectedDirectors, data.directors));
+            },
+        };
+    })(),
+});
@@ -710,5 +710,58 @@ document.addEventListener('DOMContentLoaded', function() {
             regionDescription.innerHTML = `<p class="region-description-text">${descriptions[region]}</p>`;
         });
     });
+
+    // Word clouds answer 503 while they are still rendering in the pool, load them again shortly
+    document.querySelectorAll('img[src*="/wordclouds/"]').forEach(image => {
+        let attempts = 0;
+        const retry = function() {
+            if (attempts < 10) {
+                attempts += 1;
+                setTimeout(() => { image.src = `${image.src.split('?')[0]}?attempt=${attempts}`; }, 2000);
+            }
+        };
+        image.addEventListener('error', retry);
+        if (image.complete && image.naturalWidth === 0) {
+            retry();
+        }
+    });
+
+    // Infinite scroll on the search results: follow next_cursor through /search.json when the
+    // "More results" link comes into view, the link itself stays the no-script fallback
+    const searchMore = document.getElementById('search-more');
+    const searchResultsList = document.getElementById('search-results-list');
+
+    if (searchMore && searchResultsList && 'IntersectionObserver' in window) {
+        let loading = false;
+        const observer = new IntersectionObserver(function(entries) {
+            if (!entries[0].isIntersecting || loading) {
+                return;
+            }
+            loading = true;
+            const url = `${searchMore.dataset.url}&cursor=${encodeURIComponent(searchMore.dataset.cursor)}`;
+            fetch(url)
+                .then(response => response.json())
+                .then(page => {
+                    page.results.forEach(movie => {
+                        const item = document.createElement('li');
+                        const link = document.createElement('a');
+                        link.href = movie.url;
+                        link.textContent = movie.title;
+                        item.appendChild(link);
+                        searchResultsList.appendChild(item);
+                    });
+                    if (page.next_cursor) {
+                        searchMore.dataset.cursor = page.next_cursor;
+                        searchMore.href = `${searchMore.href.split('&cursor=')[0]}&cursor=${encodeURIComponent(page.next_cursor)}`;
+                    } else {
+                        observer.disconnect();
+                        searchMore.remove();
+                    }
+                })
+                .catch(error => console.error('Error loading more results:', error))
+                .finally(() => { loading = false; });
+        });
+        observer.observe(searchMore);
+    }
 });
 
@@ -0,0 +1,165 @@
+#Incremental TMDB sync into the movies table, behind `flask sync-tmdb`
+#TMDB is asked which movies changed in a date window and only those are fetched. Each one is mapped
+#to a movies row plus its genre/actor/director names and hashed; rows whose hash matches the stored
+#content_hash are skipped, the rest are updated (links replaced) or inserted. Movies loaded from the
+#CSV are adopted by title and release year the first time TMDB reports them.
+#The nightly cost follows the number of changed movies, not the size of the catalogue.
+import hashlib
+import json
+from datetime import date, timedelta
+from sqlalchemy import select, update, delete, bindparam, tuple_
+from Website import db
+from Website.models import Movie, Genre, Actor, Director, Country, MovieGenre, MovieActor, MovieDirector, MovieCountry
+
+CAST_LIMIT = 10  # billed cast members linked per movie
+BATCH_SIZE = 200  # movies fetched and written per transaction
+IN_CLAUSE_SIZE = 500
+SYNCED_COLUMNS = ['tmdb_id', 'title', 'overview', 'status', 'release_year', 'popularity', 'vote_average', 'vote_count',
+                  'adult', 'all_combined_keywords', 'runtime', 'production_countries', 'Star1', 'Star2', 'Star3', 'Star4']
+# link name -> (dimension model, id column, association table)
+LINKS = {
+    'genres': (Genre, 'genre_id', MovieGenre),
+    'cast': (Actor, 'actor_id', MovieActor),
+    'directors': (Director, 'director_id', MovieDirector),
+    'countries': (Country, 'country_id', MovieCountry),
+}
+BILLED_LINK = 'cast'  # stored with billing_order, the position in TMDB's cast order (0-3 = Star1..Star4)
+
+def movie_record(details):
+    # TMDB details (with credits and keywords appended) -> (movies row, {link name: names})
+    credits = details.get('credits') or {}
+    cast = sorted(credits.get('cast') or [], key=lambda member: member.get('order', 0))
+    cast_names = list(dict.fromkeys(member['name'] for member in cast if member.get('name')))[:CAST_LIMIT]
+    stars = (cast_names + [None] * 4)[:4]
+    release_year = (details.get('release_date') or '')[:4]
+    keywords = [keyword['name'] for keyword in (details.get('keywords') or {}).get('keywords', [])]
+    record = {
+        'tmdb_id': details['id'],
+        'title': details.get('title'),
+        'overview': details.get('overview') or None,
+        'status': details.get('status'),
+        'release_year': int(release_year) if release_year.isdigit() else None,
+        'popularity': details.get('popularity'),
+        'vote_average': details.get('vote_average'),
+        'vote_count': details.get('vote_count'),
+        'adult': details.get('adult'),
+        'all_combined_keywords': str(keywords),
+        'runtime': details.get('runtime') or None,
+        'production_countries': ', '.join(country['name'] for country in details.get('production_countries') or []) or None,
+        'Star1': stars[0],
+        'Star2': stars[1],
+        'Star3': stars[2],
+        'Star4': stars[3],
+    }
+    links = {
+        'genres': sorted({genre['name'] for genre in details.get('genres') or []}),
+        'cast': cast_names,
+        'directors': sorted({member['name'] for member in credits.get('crew') or [] if member.get('job') == 'Director'}),
+        'countries': sorted({country['name'] for country in details.get('production_countries') or [] if country.get('name')}),
+    }
+    return record, links
+
+def content_hash(record, links):
+    return hashlib.sha256(json.dumps([record, links], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _chunks(values, size=IN_CLAUSE_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _resolve_names(model, id_column, names):
+    # name -> id for the names of this batch only, inserting the ones not stored yet
+    key = getattr(model, id_column)
+    ids = {}
+    for chunk in _chunks(set(names)):
+        ids.update({name: row_id for row_id, name in db.session.execute(select(key, model.name).where(model.name.in_(chunk)))})
+    missing = [name for name in set(names) if name not in ids]
+    if missing:
+        db.session.execute(model.__table__.insert(), [{'name': name} for name in missing])
+        for chunk in _chunks(missing):
+            ids.update({name: row_id for row_id, name in db.session.execute(select(key, model.name).where(model.name.in_(chunk)))})
+    return ids
+
+def _existing_rows(records):
+    # tmdb id -> (movie_id, content_hash), adopting CSV rows without a tmdb id by (title, release year)
+    existing = {}
+    for chunk in _chunks(records):
+        rows = db.session.execute(
+            select(Movie.tmdb_id, Movie.movie_id, Movie.content_hash).where(Movie.tmdb_id.in_([record['tmdb_id'] for record, _ in chunk]))
+        )
+        existing.update({tmdb_id: (movie_id, stored_hash) for tmdb_id, movie_id, stored_hash in rows})
+    unknown = {(record['title'], record['release_year']): record['tmdb_id'] for record, _ in records if record['tmdb_id'] not in existing}
+    for chunk in _chunks(unknown):
+        rows = db.session.execute(
+            select(Movie.movie_id, Movie.title, Movie.release_year)
+            .where(Movie.tmdb_id.is_(None), tuple_(Movie.title, Movie.release_year).in_(chunk))
+        )
+        for movie_id, title, release_year in rows:
+            existing.setdefault(unknown[(title, release_year)], (movie_id, None))
+    return existing
+
+def _replace_links(changed):
+    # changed: {movie_id: {link name: names}}; old links of these movies are dropped first
+    for name, (model, id_column, table) in LINKS.items():
+        for chunk in _chunks(changed):
+            db.session.execute(delete(table).where(table.c.movie_id.in_(chunk)))
+        ids = _resolve_names(model, id_column, [value for links in changed.values() for value in links[name]])
+        rows = [{'movie_id': movie_id, id_column: ids[value], **({'billing_order': order} if name == BILLED_LINK else {})}
+                for movie_id, links in changed.items() for order, value in enumerate(dict.fromkeys(links[name]))]
+        if rows:
+            db.session.execute(table.insert(), rows)
+
+def sync_batch(details):
+    # Upsert one batch of TMDB details; returns (changed movie ids, inserted count, unchanged count)
+    records = [movie_record(movie) for movie in details if movie and movie.get('title') and not movie.get('adult')]
+    existing = _existing_rows(records)
+    updates, inserts, links = [], [], {}
+    unchanged = 0
+    for record, movie_links in records:
+        record['content_hash'] = content_hash(record, movie_links)
+        movie_id, stored_hash = existing.get(record['tmdb_id'], (None, None))
+        if movie_id is None:
+            inserts.append((record, movie_links))
+        elif stored_hash == record['content_hash']:
+            unchanged += 1
+        else:
+            updates.append({'b_movie_id': movie_id, **{f'b_{column}': value for column, value in record.items()}})
+            links[movie_id] = movie_links
+
+    if updates:
+        columns = SYNCED_COLUMNS + ['content_hash']
+        table = Movie.__table__
+        db.session.execute(
+            update(table).where(table.c.movie_id == bindparam('b_movie_id')).values({column: bindparam(f'b_{column}') for column in columns}),
+            updates,
+        )
+    if inserts:
+        db.session.execute(Movie.__table__.insert(), [record for record, _ in inserts])
+        new_ids = {}
+        for chunk in _chunks(inserts):
+            new_ids.update(db.session.execute(
+                select(Movie.tmdb_id, Movie.movie_id).where(Movie.tmdb_id.in_([record['tmdb_id'] for record, _ in chunk]))
+            ).all())
+        for record, movie_links in inserts:
+            links[new_ids[record['tmdb_id']]] = movie_links
+    _replace_links(links)
+    db.session.commit()
+    return set(links), len(inserts), unchanged
+
+def sync_changes(client, start_date=None, end_date=None, batch_size=BATCH_SIZE, report=print):
+    # Sync everything TMDB reports as changed in [start_date, end_date]; defaults to the last day
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=1)
+    tmdb_ids = client.fetch_changed_movie_ids(start_date, end_date)
+    if tmdb_ids is None:
+        raise RuntimeError(f"Could not list TMDB changes for {start_date} to {end_date}")
+
+    changed = set()
+    inserted = unchanged = 0
+    for chunk in _chunks(tmdb_ids, batch_size):
+        batch_changed, batch_inserted, batch_unchanged = sync_batch(client.fetch_movie_details(chunk))
+        changed |= batch_changed
+        inserted += batch_inserted
+        unchanged += batch_unchanged
+        report(f"{len(changed)} changed ({inserted} new), {unchanged} unchanged of {len(tmdb_ids)} reported")
+    return {'reported': len(tmdb_ids), 'changed': changed, 'inserted': inserted, 'unchanged': unchanged}
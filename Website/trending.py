@@ -0,0 +1,111 @@
+#Background refresher for the real-time trending radar chart on the advanced page
+#A daemon thread pulls the TMDB discover pages on a schedule, runs feature_extraction once per
+#refresh and publishes an immutable snapshot. advanced() only reads the latest snapshot, so page
+#views never wait on the upstream API.
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from Website.lazy_imports import lazy_module
+
+pd = lazy_module('pandas')
+
+RADAR_METRICS = ('vote_average', 'popularity', 'vote_count', 'weighted_rating', 'trend_score')
+
+@dataclass(frozen=True)
+class TrendingSnapshot:
+    fetched_at: datetime
+    metrics: tuple
+    # (title, normalized metric values in RADAR_METRICS order) per trending movie
+    series: tuple
+
+    def values_for(self, title):
+        for name, values in self.series:
+            if name == title:
+                return values
+        return None
+
+    def age_seconds(self):
+        return (datetime.now() - self.fetched_at).total_seconds()
+
+def build_trending_snapshot(pages):
+    # Turn raw discover pages into a normalized, read-only snapshot
+    from Website.movie_api import process_movie_data, feature_extraction
+
+    all_movies = []
+    for page, api_data in enumerate(pages, start=1):
+        if api_data:
+            if 'results' in api_data:
+                for movie in api_data['results']:
+                    all_movies.append(process_movie_data(movie))
+            else:
+                print(f"'results' key not found in API response for page {page}")
+        else:
+            print(f"Failed to fetch data for page {page}")
+    if not all_movies:
+        return None
+
+    df = feature_extraction(pd.DataFrame(all_movies))
+    df = df.drop_duplicates(subset=['title'])
+    series = tuple(
+        (row[0], tuple(float(value) for value in row[1:]))
+        for row in df[['title', *RADAR_METRICS]].itertuples(index=False, name=None)
+    )
+    return TrendingSnapshot(fetched_at=datetime.now(), metrics=RADAR_METRICS, series=series)
+
+class TrendingRefresher:
+    def __init__(self):
+        self.snapshot = None
+        self.interval = 600
+        self.max_staleness = 3600
+        self.last_error = None
+        self._stop = threading.Event()
+        self._refreshed = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.interval = app.config.get('TRENDING_REFRESH_INTERVAL', self.interval)
+        self.max_staleness = app.config.get('TRENDING_MAX_STALENESS', self.max_staleness)
+        app.extensions['trending_refresher'] = self
+        if app.config.get('TRENDING_REFRESH_ENABLED', True):
+            # Started by the first request, so CLI runs (db upgrade, ingest, ...) never call TMDB
+            app.before_request(self._start_serving)
+
+    def _start_serving(self):
+        if self._thread is None:
+            self.start()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='trending-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def refresh(self):
+        # Fetch and publish a new snapshot; the previous one stays live if anything fails
+        from Website.movie_api import fetch_api_pages
+        try:
+            snapshot = build_trending_snapshot(fetch_api_pages())
+        except Exception as e:
+            self.last_error = e
+            print(f"Trending refresh failed: {e}")
+            return self.snapshot
+        if snapshot is not None:
+            self.snapshot = snapshot  # single reference swap, readers never see a half-built snapshot
+            self.last_error = None
+        self._refreshed.set()
+        return self.snapshot
+
+    def wait_until_ready(self, timeout=None):
+        return self._refreshed.wait(timeout)
+
+    def is_stale(self):
+        snapshot = self.snapshot
+        return snapshot is None or snapshot.age_seconds() > self.max_staleness
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
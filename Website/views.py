@@ -1,26 +1,43 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, session
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, session, current_app, abort, send_file
 from flask_caching import Cache
 from flask_login import current_user, login_required
-from Website.models import Movie, Genre, Actor, Director, MovieGenre, MovieActor, MovieDirector, User
-from Website.movie_api import fetch_api_data, process_movie_data, feature_extraction
+from Website.models import Movie, Genre, MovieGenre, User, UserFavourite, UserRecommendation
+from Website.movie_data import reading_snapshot, snapshot_reloader
+from Website.movie_cube import get_filter_cube
+from Website.dash_cache import LRUCache, normalize_selection
+from Website.search_index import search_index
+from Website.autocomplete import autocomplete_index
+from Website.page_cache import cached_page, cache_stats
+from Website.metrics import timed, record_cache
+from Website.catalogue import get_dataset_version
+from Website.wordclouds import wordcloud_img, wordcloud_png
+from Website.similarity import neighbours_for
+from Website.movie_metrics import metrics_for
+from Website.aggregates import top_titles_by_votes, top_directors_by_votes, genre_counts, releases_per_year, adult_split, star_counts, country_counts
+from Website.recommender import item_vectors
+from Website.favourites import requested_movie_ids, add_movies, remove_movies, has_movie
+from Website.charts import render_chart, chart_json, plotly_bundle
+from Website.compression import choose_encoding
 from Website.auth import validate_user_details
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
+import base64
+import json
 import os
-from Website import db, cache
-import plotly.express as px
-import plotly.io as pio
-import pandas as pd
-from wordcloud import WordCloud
-import numpy as np
+import threading
+import time
+from Website import db, trending_refresher
+from markupsafe import Markup
+from Website.lazy_imports import lazy_module
 from datetime import datetime
 from sqlalchemy.orm import joinedload, selectinload
-import plotly.graph_objects as go
-import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output
-import networkx as nx
+
+# Imported on first use, plotly and pandas alone take most of the app's import time
+px = lazy_module('plotly.express')
+pio = lazy_module('plotly.io')
+pd = lazy_module('pandas')
+go = lazy_module('plotly.graph_objects')
 
 # Define blueprint
 views = Blueprint('views', __name__) 
@@ -34,39 +51,6 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Helper function to get movie data
-def get_movie_data():
-    # Retrieve necessary columns for the intermediate page using joinedload
-    query = db.session.query(Movie).options(
-        selectinload(Movie.directors),   # Load directors eagerly
-        selectinload(Movie.genres),      # Load genres eagerly
-    ).join(MovieDirector, Movie.movie_id == MovieDirector.c.movie_id)\
-    .join(Director, Director.director_id == MovieDirector.c.director_id)\
-    .join(MovieGenre, Movie.movie_id == MovieGenre.c.movie_id)\
-    .join(Genre, Genre.genre_id == MovieGenre.c.genre_id)\
-    .all()
-
-    # Prepare the data for the response
-    data = [{
-        'title': row.title,  # Directly get the movie title
-        'vote_count': row.vote_count,  # Directly get vote count
-        'popularity': row.popularity,  # Directly get popularity
-        'runtime': row.runtime,  # Directly get runtime
-        'director': ', '.join([director.name for director in row.directors]),  # Join directors' names if there are multiple
-        'genre': ', '.join([genre.name for genre in row.genres]),  # Join genres if there are multiple
-        'release_year': row.release_year,  # Directly get release year
-        'overview_sentiment': row.overview_sentiment,  # Directly get overview sentiment
-        'Star1': row.Star1,  # Directly get Star1
-    } for row in query]
-
-    df = pd.DataFrame(data)
-    
-    # Split the 'genre' column into individual genres and explode the DataFrame
-    df['genre'] = df['genre'].str.split(', ')
-    df = df.explode('genre')
-    
-    return df
-
 @views.route('/profile.html', methods=['GET', 'POST'])
 @login_required
 def profile_page():
@@ -121,120 +105,116 @@ def profile_page():
 @views.route('/personalized.html')
 @login_required
 def personalized():
-    # Get user's favorite genres
-    favourite_movies = current_user.user_favourites
-    genre_counts = {}
-    for movie in favourite_movies:
-        for genre in movie.genres:
-            if genre.name in genre_counts:
-                genre_counts[genre.name] += 1
-            else:
-                genre_counts[genre.name] = 1
-
-    # Sort genres by count and get top 3 genres
-    sorted_genres = sorted(genre_counts.items(), key=lambda item: item[1], reverse=True)
-    top_genres = [genre[0] for genre in sorted_genres[:3]]
+    # Get user's favorite genres, counted in one grouped query
+    favourite_ids = db.session.execute(
+        db.select(UserFavourite.c.movie_id).where(UserFavourite.c.user_id == current_user.user_id)
+    ).scalars().all()
+    top_genres = db.session.execute(
+        db.select(Genre.name)
+        .join(MovieGenre, MovieGenre.c.genre_id == Genre.genre_id)
+        .join(UserFavourite, UserFavourite.c.movie_id == MovieGenre.c.movie_id)
+        .where(UserFavourite.c.user_id == current_user.user_id)
+        .group_by(Genre.name)
+        .order_by(db.func.count().desc(), Genre.name)
+        .limit(3)
+    ).scalars().all()
     
     if not top_genres:
         # Handle case with no favorite genres
         flash('You have no favorite genres yet. Please add some favorite movies to get personalized recommendations.', 'info')
         return redirect(url_for('views.user_favourites'))
 
-    # Fetch recommendations based on top genres
-    recommendations = Movie.query.join(Movie.genres).filter(Genre.name.in_(top_genres)).order_by(Movie.popularity.desc()).limit(5).all()
+    # Movies closest to the sum of the user's favourites (genres, directors, cast and keywords)
+    recommended_ids = item_vectors.recommend(favourite_ids)
 
     # Store recommendations in user_recommendations table if not already present
-    for movie in recommendations:
-        if movie not in current_user.user_recommendations:
-            current_user.user_recommendations.append(movie)
-    db.session.commit()
+    if add_movies(UserRecommendation, current_user.user_id, recommended_ids):
+        db.session.commit()
 
-    return render_template("personalized.html", top_genres=top_genres, recommendations=current_user.user_recommendations)
+    recommendations = (Movie.query.join(UserRecommendation, UserRecommendation.c.movie_id == Movie.movie_id)
+                       .filter(UserRecommendation.c.user_id == current_user.user_id)
+                       .options(selectinload(Movie.genres)).all())
+    return render_template("personalized.html", top_genres=top_genres, recommendations=recommendations)
 
 @views.route('/')  # Root function
 def homepage():
     return render_template("homepage.html")
 
 @views.route('/basic.html', methods=['GET', 'POST'])
-@cache.cached(timeout=300)
 @login_required
+@cached_page(timeout=300)
 def basic():
-    # Retrieve necessary columns for the basic page using joinedload
-    query = db.session.query(Movie).options(
-        selectinload(Movie.directors),   # Load directors eagerly
-        selectinload(Movie.genres),      # Load genres eagerly
-    ).join(MovieDirector, Movie.movie_id == MovieDirector.c.movie_id)\
-    .join(Director, Director.director_id == MovieDirector.c.director_id)\
-    .join(MovieGenre, Movie.movie_id == MovieGenre.c.movie_id)\
-    .join(Genre, Genre.genre_id == MovieGenre.c.genre_id)\
-    .all()
-
-    # Prepare the data for the response
-    data = [{
-        'title': row.title,  # Directly get the movie title
-        'vote_count': row.vote_count,  # Directly get vote count
-        'director': ', '.join([director.name for director in row.directors]),  # Join directors' names if there are multiple
-        'genre': ', '.join([genre.name for genre in row.genres]),  # Join genres if there are multiple
-        'release_year': row.release_year,  # Directly get release year
-        'adult': row.adult,  # Directly get adult status
-        'Star1': row.Star1,  # Directly get Star1
-        'Star2': row.Star2,  # Directly get Star2
-        'Star3': row.Star3,  # Directly get Star3
-        'Star4': row.Star4   # Directly get Star4
-    } for row in query]
-
-    df = pd.DataFrame(data)
-    
+    # Every chart's aggregate is its own GROUP BY query (see aggregates.py), only the plotted rows come back
     ##CHART 1: Top 10 Most Popular Movies (By vote_count and Popularity)
-    df1 = df.groupby('title').agg({'vote_count': 'sum'}).sort_values(by=['vote_count'], ascending=False).head(10)
+    df1 = top_titles_by_votes(10).set_index('title')
     fig1 = px.bar(df1, x='vote_count', y=df1.index, orientation='h', width=600, height=400)
-    chart1 = pio.to_html(fig1, full_html=False)
+    chart1 = render_chart(fig1)
 
     ##CHART 2: Top 10 Most Prolific Directors (By vote_count)
-    df2 = df.groupby('director').agg({'vote_count': 'sum'}).sort_values(by=['vote_count'], ascending=False).head(10).reset_index()
+    df2 = top_directors_by_votes(10)
     fig2 = px.treemap(df2, path=['director'], values='vote_count', color='vote_count', width=640, height=300,
                       hover_data={'director': True, 'vote_count': True})
-    chart2 = pio.to_html(fig2, full_html=False)
+    chart2 = render_chart(fig2)
 
     ##CHART 3: Genre Distribution
-    df3 = df['genre'].str.split(', ', expand=True).stack().reset_index(level=1, drop=True).to_frame('genre')
-    df3 = df3.groupby('genre').size().reset_index(name="count")
+    df3 = genre_counts()
     fig3 = px.pie(df3, values="count", names="genre", width=570, height=380)
-    chart3 = pio.to_html(fig3, full_html=False) 
+    chart3 = render_chart(fig3) 
 
     ##CHART 4: Total Number of Movies Released Per Year
-    df4 = df.groupby('release_year').size().reset_index(name="count")
+    df4 = releases_per_year()
     fig4 = px.line(df4, x='release_year', y='count', width=1250, height=400)
-    chart4 = pio.to_html(fig4, full_html=False)
+    chart4 = render_chart(fig4)
 
     ##CHART 5: Adult vs Non-Adult Movies Count
-    df5 = df.groupby('adult').size().reset_index(name="count")
+    df5 = adult_split()
     fig5 = px.bar(df5, x='adult', y='count', width=550, height=400)
-    chart5 = pio.to_html(fig5, full_html=False)
+    chart5 = render_chart(fig5)
 
-    ##CHART 6: Most Starred Actors/Actresses (Star1, Star2, Star3, Star4)
-    df6 = pd.concat([df['Star1'], df['Star2'], df['Star3'], df['Star4']]).value_counts().reset_index()
-    df6.columns = ['actor', 'count']
-    wordCloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(df6['actor']))
-    fig6 = px.imshow(wordCloud, width=600, height=400)
-    chart6 = pio.to_html(fig6, full_html=False)
+    ##CHART 6: Most Starred Actors/Actresses (Star1, Star2, Star3, Star4), top-billed cast links counted in SQL
+    df6 = star_counts()
+    # Rendered once per distinct text in the word cloud pool and served as a cached PNG
+    chart6 = wordcloud_img(' '.join(df6['actor']), 800, 400, 600, 400, alt='Most starred actors and actresses')
 
     return render_template("basic.html", chart1=chart1, chart2=chart2, chart3=chart3, chart4=chart4, chart5=chart5, chart6=chart6)
 
 ###INTERMEDIATE SECTION
+def start_warmup(flask_app):
+    # Loads the movie snapshot, builds the filter cube and imports the charting libraries in the
+    # background, so the server starts accepting requests right away and the first Dash visitor
+    # usually finds everything ready. Requests that arrive earlier build (or wait for) the same objects.
+    def warm_up():
+        started = time.perf_counter()
+        try:
+            import plotly.express, plotly.graph_objects  # noqa: F401
+            with flask_app.app_context():
+                get_filter_cube()
+        except Exception as e:
+            print(f"Dash warm-up failed: {e}")
+            return
+        print(f"Dash warm-up finished in {time.perf_counter() - started:.1f}s")
+    thread = threading.Thread(target=warm_up, name='dash-warmup', daemon=True)
+    thread.start()
+    return thread
+
 # Layout for Dash app
 def create_dash_app(flask_app):
+    # Dash is only needed by the app process serving /dash/, not by imports of this module (CLI, workers)
+    import dash
+    from dash import dcc, html
+    from dash.dependencies import Input, Output, State, ClientsideFunction
+
+    # In clientside mode the layout carries the aggregates in a dcc.Store and the dropdowns are
+    # filtered in the browser (static/intermediate_filters.js), one request per page load
+    clientside = flask_app.config.get('DASH_CLIENTSIDE_FILTERING', False)
+
     # Initialize Dash app
-    dash_app = dash.Dash(__name__, server=flask_app, url_base_pathname='/dash/')
+    dash_app = dash.Dash(__name__, server=flask_app, url_base_pathname='/dash/',
+                         external_scripts=['/static/intermediate_filters.js'] if clientside else [])
 
     #dash font 
     dash_app.css.append_css({"external_url": "/static/intermediate.css"})
 
-    # Calculate the top 10 directors based on vote count within the Flask application context
-    with flask_app.app_context():
-        df_director = get_movie_data()
-        top_directors = df_director.groupby('director').agg({'vote_count': 'sum'}).sort_values(by=['vote_count'], ascending=False).head(10).index.tolist()
-    
     # # Define a variable to indicate the current mode (light or dark)
     # mode = 'dark'  # Change this to 'light' for light mode
 
@@ -276,68 +256,87 @@ def create_dash_app(flask_app):
         'backgroundColor': '#f9f9f9'
     }
 
-    dash_app.layout = html.Div([
-        dcc.Tabs([
-            dcc.Tab(label='Year Filtering', children=[
-                html.Div([
-                    dcc.Dropdown(
-                        id='year-dropdown',
-                        options=[{'label': str(year), 'value': year} for year in range(2019, datetime.now().year)],
-                        multi=True,
-                        placeholder='Select Year(s)',
-                    ),
-                    html.Div([
-                        html.H2("Number of Movie Releases by Genre Over Time", style={'color': 'black', 'textAlign': 'center'}),
-                        dcc.Graph(id='chart1'),
-                        html.P("2020-2022 has seen a trend in increase of movies across majority of genres. Drama and Documentary are genres that are frequently released throughout the years, with comedy coming at a close second. The least released genres are War, Western and history due to lack of demand and interest from audience.", style={'color': 'black'})
-                    ], style=container_style),
+    def build_layout(genres, top_directors, store=None):
+        return html.Div([
+            dcc.Store(id='filter-data', data=store),
+            dcc.Tabs([
+                dcc.Tab(label='Year Filtering', children=[
                     html.Div([
-                        html.H2("Average Movie Runtime by Year", style={'color': 'black', 'textAlign': 'center'}),
-                        dcc.Graph(id='chart2'),
-                        html.P("Across all of the years, the average movie runtime are closely knitted together with 2019 showing the highest average runtime. Then, from there forth, the average runtime has been decreasing with the year 2023 ending up with only 20 minutes. This could be due to the fact that movies are becoming more fast-paced and concise to adapt to audience's decreasing attention span in modern times due to the influence of social media", style={'color': 'black'})
-                    ], style=container_style)
-                ])
-            ]),
-            dcc.Tab(label='Genre Filtering', children=[
-                html.Div([
-                    dcc.Dropdown(
-                        id='genre-dropdown',
-                        options=[{'label': genre.name, 'value': genre.name} for genre in Genre.query.all()],
-                        multi=True,
-                        placeholder='Select Genre(s)'
-                    ),
-                    html.Div([
-                        html.H2("Top 10 Starred Actors/Actresses Across Genres", style={'color': 'black', 'textAlign': 'center'}),
-                        dcc.Graph(id='chart3'),
-                        html.P("""The chart shows the top 10 actors/actresses have all starred in a decent amount of comedy movies. Moreover, talented actors/actresses are more likely to be casted in comedy movies due to their ability to deliver great punchlines and comedic timing. 
-                            Action, Thriller, Drama and Horror are the next most popular genres that actors/actresses have starred in which indicates them having a different set of acting skills to deliver a convincing performance. 
-                            War is the least popular genre for actors/actresses to star in due to the lack of demand and interest from the audience. It is also a challenging genre to act in as it requires actors/actresses to portray the harsh realities of war. 
-                            Ultimately, the chart shows that actors/actresses have starred in a variety of genres which showcases their versatility and acting skills.""", style={'color': 'black', 'padding-left': '10px'})
-                    ], style=container_style),
+                        dcc.Dropdown(
+                            id='year-dropdown',
+                            options=[{'label': str(year), 'value': year} for year in range(2019, datetime.now().year)],
+                            multi=True,
+                            placeholder='Select Year(s)',
+                        ),
+                        html.Div([
+                            html.H2("Number of Movie Releases by Genre Over Time", style={'color': 'black', 'textAlign': 'center'}),
+                            dcc.Graph(id='chart1'),
+                            html.P("2020-2022 has seen a trend in increase of movies across majority of genres. Drama and Documentary are genres that are frequently released throughout the years, with comedy coming at a close second. The least released genres are War, Western and history due to lack of demand and interest from audience.", style={'color': 'black'})
+                        ], style=container_style),
+                        html.Div([
+                            html.H2("Average Movie Runtime by Year", style={'color': 'black', 'textAlign': 'center'}),
+                            dcc.Graph(id='chart2'),
+                            html.P("Across all of the years, the average movie runtime are closely knitted together with 2019 showing the highest average runtime. Then, from there forth, the average runtime has been decreasing with the year 2023 ending up with only 20 minutes. This could be due to the fact that movies are becoming more fast-paced and concise to adapt to audience's decreasing attention span in modern times due to the influence of social media", style={'color': 'black'})
+                        ], style=container_style)
+                    ])
+                ]),
+                dcc.Tab(label='Genre Filtering', children=[
                     html.Div([
-                        html.H2("Average Popularity and Sentiment of Movies by Genre", style={'color': 'black', 'textAlign': 'center'}),
-                        dcc.Graph(id='chart4'),
-                        html.P("Family and adventure movies have the highest average popularity and sentiment score. This is due to the fact that family movies are generally heartwarming and have a positive message that resonates with the audience. Adventure movies are also popular as they provide an escape from reality and take the audience on an exciting journey. Western and horror movies have the lowest average popularity and sentiment score. Western movies are a niche genre that appeals to a specific audience, while horror movies are known for their dark and unsettling themes.", style={'color': 'black'})
-                    ], style=container_style)
-                ])
-            ]),
-            dcc.Tab(label='Director Filtering', children=[
-                html.Div([
-                    dcc.Dropdown(
-                        id='director-dropdown',
-                        options=[{'label': director, 'value': director} for director in top_directors],
-                        multi=True,
-                        placeholder='Select Director(s)'
-                    ),
+                        dcc.Dropdown(
+                            id='genre-dropdown',
+                            options=[{'label': genre, 'value': genre} for genre in genres],
+                            multi=True,
+                            placeholder='Select Genre(s)'
+                        ),
+                        html.Div([
+                            html.H2("Top 10 Starred Actors/Actresses Across Genres", style={'color': 'black', 'textAlign': 'center'}),
+                            dcc.Graph(id='chart3'),
+                            html.P("""The chart shows the top 10 actors/actresses have all starred in a decent amount of comedy movies. Moreover, talented actors/actresses are more likely to be casted in comedy movies due to their ability to deliver great punchlines and comedic timing. 
+                                Action, Thriller, Drama and Horror are the next most popular genres that actors/actresses have starred in which indicates them having a different set of acting skills to deliver a convincing performance. 
+                                War is the least popular genre for actors/actresses to star in due to the lack of demand and interest from the audience. It is also a challenging genre to act in as it requires actors/actresses to portray the harsh realities of war. 
+                                Ultimately, the chart shows that actors/actresses have starred in a variety of genres which showcases their versatility and acting skills.""", style={'color': 'black', 'padding-left': '10px'})
+                        ], style=container_style),
+                        html.Div([
+                            html.H2("Average Popularity and Sentiment of Movies by Genre", style={'color': 'black', 'textAlign': 'center'}),
+                            dcc.Graph(id='chart4'),
+                            html.P("Family and adventure movies have the highest average popularity and sentiment score. This is due to the fact that family movies are generally heartwarming and have a positive message that resonates with the audience. Adventure movies are also popular as they provide an escape from reality and take the audience on an exciting journey. Western and horror movies have the lowest average popularity and sentiment score. Western movies are a niche genre that appeals to a specific audience, while horror movies are known for their dark and unsettling themes.", style={'color': 'black'})
+                        ], style=container_style)
+                    ])
+                ]),
+                dcc.Tab(label='Director Filtering', children=[
                     html.Div([
-                        html.H2("Popularity Success of Genres by Top 10 Directors", style={'color': 'black', 'textAlign': 'center'}),
-                        dcc.Graph(id='chart5'),
-                        html.P("James Mangold has the highest average popularity across all genres, working on box-office movies such as Logan, Ford v Ferrari and Walk the Line. Followed by Francis Lawrence and Robert Schwentke, which shows their ability to direct movies of different themes that resonate with the audience.", style={'color': 'black'})
-                    ], style=container_style)
+                        dcc.Dropdown(
+                            id='director-dropdown',
+                            options=[{'label': director, 'value': director} for director in top_directors],
+                            multi=True,
+                            placeholder='Select Director(s)'
+                        ),
+                        html.Div([
+                            html.H2("Popularity Success of Genres by Top 10 Directors", style={'color': 'black', 'textAlign': 'center'}),
+                            dcc.Graph(id='chart5'),
+                            html.P("James Mangold has the highest average popularity across all genres, working on box-office movies such as Logan, Ford v Ferrari and Walk the Line. Followed by Francis Lawrence and Robert Schwentke, which shows their ability to direct movies of different themes that resonate with the audience.", style={'color': 'black'})
+                        ], style=container_style)
+                    ])
                 ])
             ])
-        ])
-    ], style={'fontFamily': 'Nunito'})
+        ], style={'fontFamily': 'Nunito'})
+
+    def serve_layout():
+        # Built on every page load from the current dataset, so creating the Dash app never reads the database
+        with reading_snapshot() as snapshot:
+            cube = get_filter_cube(snapshot)
+            top_directors = cube.director_names[cube.top_directors(10)].tolist()
+            store = snapshot.derived('client_data', lambda: client_data(cube)) if clientside else None
+        genres = db.session.execute(db.select(Genre.name).order_by(Genre.genre_id)).scalars().all()
+        return build_layout(genres, top_directors, store)
+
+    def client_data(cube):
+        # Built once per snapshot; the template keeps the browser-drawn charts styled like the server ones
+        return {**cube.client_data(directors=10), 'template': pio.templates[pio.templates.default].to_plotly_json()}
+
+    # Data-free copy for Dash's callback validation, otherwise assigning a layout function calls it right away
+    dash_app.validation_layout = build_layout([], [])
+    dash_app.layout = serve_layout
 
     # Add the CSS link to the Google Fonts API
     dash_app.index_string = '''
@@ -360,110 +359,130 @@ def create_dash_app(flask_app):
         </body>
     </html>
     '''
-    df = get_movie_data()
-    # Callbacks for updating charts based on filters
-    @dash_app.callback(
-        Output('chart1', 'figure'),
-        [Input('year-dropdown', 'value')]
-    )
-    def update_chart1(selected_years):
-        df1 = df.copy()
-        if selected_years:
-            df1 = df1[df1['release_year'].isin(selected_years)]
-            
+    # Finished figures keyed by (chart, normalized selection, data version)
+    figure_cache = LRUCache(flask_app.config.get('DASH_FIGURE_CACHE_SIZE', 256))
+    flask_app.extensions['dash_figure_cache'] = figure_cache  # sized by flask memory-report
+
+    def cached_figure(chart, cube, selection, build):
+        key = (chart, selection, cube.version)
+        figure = figure_cache.get(key)
+        if figure is not None:
+            record_cache('figure', 'hit')
+            return figure
+        record_cache('figure', 'miss')
+        with timed('figure'):
+            fig = build()
+        with timed('plotly'):
+            figure = fig.to_plotly_json()
+        figure_cache.set(key, figure)
+        return figure
+
+    # Chart builders, each one slices the pre-aggregated cube for an already resolved selection
+    def update_chart1(cube, year_rows):
         ##CHART 1: Number of Movie Releases by Genre Over Time
-        df1 = df1.groupby(['release_year', 'genre']).size().reset_index(name='count')
+        df1 = cube.releases_by_genre(year_rows)
         df1 = df1.sort_values(by=['release_year', 'count'], ascending=[False, True])
         fig1 = px.area(df1, x="release_year", y="count", color="genre", line_group="genre")
         fig1.update_xaxes(dtick=1)  # Update x-axis to set the interval to one year
         return fig1
 
-    @dash_app.callback(
-        Output('chart2', 'figure'),
-        [Input('year-dropdown', 'value')]
-    )
-    def update_chart2(selected_years):
-        df2 = df.copy()
-        if selected_years:
-            df2 = df2[df2['release_year'].isin(selected_years)]
-        
-                        # Print the data to verify
-        print("Chart 2 Data:")
-        print(df2.head())
-        
-        ##CHART 2: Average Movie Runtime by year
-        fig2 = px.box(df2, x="release_year", y="runtime", hover_data=["release_year", "runtime"])
+    def update_chart2(cube, year_rows):
+        ##CHART 2: Average Movie Runtime by year, drawn from precomputed quartiles
+        df2 = cube.runtime_box(year_rows)
+        fig2 = go.Figure(go.Box(
+            x=df2['release_year'], q1=df2['q1'], median=df2['median'], q3=df2['q3'],
+            lowerfence=df2['lowerfence'], upperfence=df2['upperfence'], name='runtime'
+        ))
+        fig2.update_layout(xaxis_title='release_year', yaxis_title='runtime')
         fig2.update_xaxes(dtick=1)
         return fig2
 
-    @dash_app.callback(
-        Output('chart3', 'figure'),
-        [Input('genre-dropdown', 'value')]
-    )
-    def update_chart3(selected_genres):
-        df3 = df.copy()
-        if selected_genres:
-            df3 = df3[df3['genre'].isin(selected_genres)]
-            
+    def update_chart3(cube, genre_codes):
         #CHART 3: Top 10 Starred Actors/Actresses Across Genres
-        # Concatenate the Star columns into a single Series\       
-        stars = pd.concat([
-            df3[['Star1', 'genre']].rename(columns={'Star1': 'actor'}),
-        ])
-        
-        # Group by actor and genre, and count the occurrences
-        df3 = stars.groupby(['actor', 'genre']).size().reset_index(name='count')
-        # Step 4: Calculate the total count of appearances for each actor
-        actor_counts = df3.groupby('actor')['count'].sum().reset_index()
-        # Step 5: Select the top 10 actors based on the total count
-        top_10_actors = actor_counts.nlargest(10, 'count')['actor']
-        # Step 6: Filter the original DataFrame to include only the top 10 actors
-        df3 = df3[df3['actor'].isin(top_10_actors)]
-        
-        # Pivot the DataFrame to create matrix of actors and genres
-        df3 = df3.pivot(index="actor", columns="genre", values="count").fillna(0)
+        # Matrix of actors and genres for the 10 actors with the most appearances in the selection
+        df3 = cube.star_genre_matrix(genre_codes, 10)
         
         #Heatmap
         fig3 = px.imshow(df3, x=df3.columns, y=df3.index)
         fig3.update_layout(width=500, height=500)
         return fig3
 
-    @dash_app.callback(
-        Output('chart4', 'figure'),
-        [Input('genre-dropdown', 'value')]
-    )
-    def update_chart4(selected_genres):
-        df4 = df.copy()
-        if selected_genres:
-            df4 = df4[df4['genre'].isin(selected_genres)]
-        
-                # Print the data to verify
-        print("Chart 4 Data:")
-        print(df4.head())
-        
+    def update_chart4(cube, genre_codes):
         ##CHART 4: Average Popularity and Sentiment of Movies by Genre
-        sentiment_df = df4.groupby('genre').agg({'popularity': 'mean', 'overview_sentiment': 'mean'}).reset_index()
+        sentiment_df = cube.genre_popularity(genre_codes)
         fig4 = px.scatter(sentiment_df, x='popularity', y='overview_sentiment', color = 'genre', hover_data = ['genre'])
 
         return fig4
 
-    @dash_app.callback(
-        Output('chart5', 'figure'),
-        [Input('director-dropdown', 'value')]
-    )
-    def update_chart5(selected_directors):
-        df5 = df.copy()
-        if selected_directors:
-            df5 = df[df['director'].isin(selected_directors)]
-            
+    def update_chart5(cube, director_codes):
         #CHART 5: Popularity Success of Genres by Top 10 Directors
-        top_directors = df5.groupby('director').agg({'vote_count': 'sum'}).sort_values(by=['vote_count'], ascending=False).head(10).reset_index()
-        df5 = df[df['director'].isin(top_directors['director'])]
-        df5 = df5.groupby(['director', 'genre']).agg({'popularity': "mean"}).sort_values(by=['popularity'], ascending=False).reset_index()
+        df5 = cube.director_genre_popularity(director_codes, 10)
         
         fig5 = px.bar(df5, x='director', y='popularity', color='genre', barmode='stack')
         return fig5
-    
+
+    if clientside:
+        # Same charts drawn from the store in the browser, no server round trip per dropdown change
+        dash_app.clientside_callback(
+            ClientsideFunction(namespace='cinesurfer', function_name='yearCharts'),
+            [Output('chart1', 'figure'), Output('chart2', 'figure')],
+            [Input('year-dropdown', 'value')], [State('filter-data', 'data')]
+        )
+        dash_app.clientside_callback(
+            ClientsideFunction(namespace='cinesurfer', function_name='genreCharts'),
+            [Output('chart3', 'figure'), Output('chart4', 'figure')],
+            [Input('genre-dropdown', 'value')], [State('filter-data', 'data')]
+        )
+        dash_app.clientside_callback(
+            ClientsideFunction(namespace='cinesurfer', function_name='directorChart'),
+            Output('chart5', 'figure'),
+            [Input('director-dropdown', 'value')], [State('filter-data', 'data')]
+        )
+    else:
+        # Callbacks for updating charts based on filters, one per dropdown so both charts share the filtered view.
+        # Each call pins the current snapshot version, a reload swapping in a new one does not release it
+        # until the callback has finished. The first callback builds the cube if the warm-up thread has not.
+        @dash_app.callback(
+            [Output('chart1', 'figure'), Output('chart2', 'figure')],
+            [Input('year-dropdown', 'value')]
+        )
+        def update_year_charts(selected_years):
+            selection = normalize_selection(selected_years)
+            with reading_snapshot() as snapshot:
+                with timed('pandas'):
+                    cube = get_filter_cube(snapshot)
+                    year_rows = cube.year_view(selection)
+                return (cached_figure('chart1', cube, selection, lambda: update_chart1(cube, year_rows)),
+                        cached_figure('chart2', cube, selection, lambda: update_chart2(cube, year_rows)))
+
+        @dash_app.callback(
+            [Output('chart3', 'figure'), Output('chart4', 'figure')],
+            [Input('genre-dropdown', 'value')]
+        )
+        def update_genre_charts(selected_genres):
+            selection = normalize_selection(selected_genres)
+            with reading_snapshot() as snapshot:
+                with timed('pandas'):
+                    cube = get_filter_cube(snapshot)
+                    genre_codes = cube.genre_view(selection)
+                return (cached_figure('chart3', cube, selection, lambda: update_chart3(cube, genre_codes)),
+                        cached_figure('chart4', cube, selection, lambda: update_chart4(cube, genre_codes)))
+
+        @dash_app.callback(
+            Output('chart5', 'figure'),
+            [Input('director-dropdown', 'value')]
+        )
+        def update_director_chart(selected_directors):
+            selection = normalize_selection(selected_directors)
+            with reading_snapshot() as snapshot:
+                with timed('pandas'):
+                    cube = get_filter_cube(snapshot)
+                    director_codes = cube.director_view(selection)
+                return cached_figure('chart5', cube, selection, lambda: update_chart5(cube, director_codes))
+
+    snapshot_reloader.init_app(flask_app)  # picks up ingests and other workers' changes without a restart
+    if flask_app.config.get('WARMUP_ON_START'):
+        start_warmup(flask_app)
     return dash_app
 
 # @views.route('/testing.html')
@@ -471,68 +490,35 @@ def create_dash_app(flask_app):
 #     return render_template("testing.html", text="Hi, my name is", user="ALi", boolean=True)
 
 @views.route('/intermediate.html', methods=['GET', 'POST'])
-@cache.cached(timeout=300)
+@cached_page(timeout=300)
 def intermediate():
     return render_template('intermediate.html')
     
 @views.route('/advanced.html', methods=['GET', 'POST'])
 def advanced():    
-    ##CHART 1: Map visualization of movie production countries
-    query = db.session.query(Movie.production_countries).all()
-    
-    data = [{'production_countries': row.production_countries} for row in query]
-    
-    df = pd.DataFrame(data)
-    
-    # Split the 'production_countries' column into individual countries and explode the DataFrame
-    df['production_countries'] = df['production_countries'].str.split(', ')
-    df = df.explode('production_countries')
-    
-    df1 = df.groupby('production_countries').size().reset_index(name='No_of_Movies')
+    ##CHART 1: Map visualization of movie production countries, counted per country in SQL
+    df1 = country_counts()
     fig1 = px.choropleth(df1, 
-                         locations='production_countries', 
+                         locations='country', 
                          locationmode='country names', 
                          color='No_of_Movies', 
-                         hover_name='production_countries'
+                         hover_name='country'
                          )
     fig1.update_layout(width=1180)  # Set the width for Chart 1
-    chart1 = pio.to_html(fig1, full_html=False)
+    chart1 = render_chart(fig1)
     
-    all_movies = []
-    for page in range(1, 10):
-        api_data = fetch_api_data(page)
-        if api_data:
-            if 'results' in api_data:
-                for movie in api_data['results']:
-                    movies = process_movie_data(movie)
-                    all_movies.append(movies)
-            else:
-                print(f"'results' key not found in API response for page {page}")
-        else:
-            print(f"Failed to fetch data for page {page}")
-    
-    df2 = pd.DataFrame(all_movies)
-    df2 = feature_extraction(df2)        
-
-    # Transform data for radar chart
-    df2_long = df2.melt(
-        id_vars=['title'], 
-        value_vars=['vote_average', 'popularity', 'vote_count', 'weighted_rating', 'trend_score'], 
-        var_name='metric', 
-        value_name='value'
-    )
+    # Trending data comes from the background refresher, never from the API on the request thread
+    trending = trending_refresher.snapshot
+
+    def radar_values(values):
+        # Close the shape by appending the first value and metric to the end
+        return list(values) + [values[0]], list(trending.metrics) + [trending.metrics[0]]
 
     fig1 = go.Figure()
 
     # Add all movies to the legend without displaying them in the charts
-    for title in df2_long['title'].unique():
-        subset = df2_long[df2_long['title'] == title]
-        r_values = subset['value'].tolist()
-        theta_values = subset['metric'].tolist()
-        
-        # Close the shape by appending the first value and metric to the end
-        r_values.append(r_values[0])
-        theta_values.append(theta_values[0])
+    for title, values in (trending.series if trending else ()):
+        r_values, theta_values = radar_values(values)
         
         fig1.add_trace(go.Scatterpolar(
             r=r_values,
@@ -549,40 +535,19 @@ def advanced():
     chart_title = f"{title1} VS. {title2}" if title1 and title2 else "Select 2 movies to compare"
 
     # Add the selected titles to the chart
-    if title1:
-        subset = df2_long[df2_long['title'] == title1]
-        if not subset.empty:
-            r_values = subset['value'].tolist()
-            theta_values = subset['metric'].tolist()
-            r_values.append(r_values[0])
-            theta_values.append(theta_values[0])
-
-            fig1.add_trace(go.Scatterpolar(
-                r=r_values,
-                theta=theta_values,
-                name=title1,
-                mode='lines',
-                line=dict(color='blue', dash='solid'),  # Valid properties
-                fill='toself',  # Fill the shape
-                fillcolor='rgba(0, 0, 255, 0.2)',  # Transparent blue
-            ))
-
-    if title2:
-        subset = df2_long[df2_long['title'] == title2]
-        if not subset.empty:
-            r_values = subset['value'].tolist()
-            theta_values = subset['metric'].tolist()
-            r_values.append(r_values[0])
-            theta_values.append(theta_values[0])
+    for title, color, fillcolor in [(title1, 'blue', 'rgba(0, 0, 255, 0.2)'), (title2, 'red', 'rgba(255, 0, 0, 0.2)')]:
+        values = trending.values_for(title) if trending and title else None
+        if values:
+            r_values, theta_values = radar_values(values)
 
             fig1.add_trace(go.Scatterpolar(
                 r=r_values,
                 theta=theta_values,
-                name=title2,
+                name=title,
                 mode='lines',
-                line=dict(color='red', dash='solid'),  # Valid properties
+                line=dict(color=color, dash='solid'),  # Valid properties
                 fill='toself',  # Fill the shape
-                fillcolor='rgba(255, 0, 0, 0.2)'  # Transparent red
+                fillcolor=fillcolor,  # Transparent blue/red
             ))
 
     # Set the size of the charts and legends
@@ -606,93 +571,129 @@ def advanced():
         height=450  # Set the height of the chart
     )
 
-    chart2 = pio.to_html(fig1, full_html=False)
+    chart2 = render_chart(fig1)
     
-    return render_template("advanced.html", chart1=chart1, chart2=chart2, title1=title1, title2=title2)
+    # How old the trending data is, shown under the chart
+    trending_age = int(trending.age_seconds() // 60) if trending else None
+    return render_template("advanced.html", chart1=chart1, chart2=chart2, title1=title1, title2=title2,
+                           trending_age=trending_age, trending_stale=trending_refresher.is_stale())
 
 
 
 @views.route('/update_chart', methods=['GET'])
 def update_chart():
     chart_id = request.args.get('chart_id')
+    movie_id = request.args.get('movie_id', type=int)
     movie_title = request.args.get('movie_title')
     width = request.args.get('width', 650)
     height = request.args.get('height', 470)
 
-    df = get_movie_data()
-    if df is None:
-        return jsonify(error="Error fetching movie data"), 500
-
-    df2 = feature_extraction(df)
-    df2_long = df2.melt(id_vars=['title'], value_vars=['vote_average', 'popularity', 'vote_count', 'runtime', 'trend_score'], var_name='metric', value_name='value')
+    # Look the movie up by id, or by title for older callers
+    if movie_id is None and movie_title:
+        movie_id = db.session.execute(
+            db.select(Movie.movie_id).where(db.func.lower(Movie.title) == movie_title.lower())
+            .order_by(Movie.popularity.desc()).limit(1)
+        ).scalar()
+        if movie_id is None:
+            best = search_index.search(movie_title, limit=1)
+            movie_id = best[0][0] if best else None
+    movie = db.session.get(Movie, movie_id) if movie_id is not None else None
+    metrics = metrics_for(movie_id) if movie is not None else None
+    if metrics is None:
+        return jsonify(error="Error fetching movie data"), 404
+
+    theta = ['vote_average', 'popularity', 'vote_count', 'runtime', 'trend_score']
+    r = [metrics.norm_vote_average, metrics.norm_popularity, metrics.norm_vote_count, metrics.norm_runtime, metrics.norm_trend_score]
 
     fig = go.Figure()
-    subset = df2_long[df2_long['title'].str.contains(movie_title, case=False, na=False)]
     fig.add_trace(go.Scatterpolar(
-        r=subset['value'],
-        theta=subset['metric'],
-        name=movie_title,
+        r=r,
+        theta=theta,
+        name=movie.title,
         mode='lines',
         line=dict(dash='solid')  # Valid properties
     ))
 
     fig.update_layout(
         polar=dict(angularaxis=dict(rotation=90)),
-        title=f"Details for {movie_title}",
+        title=f"Details for {movie.title}",
         width=int(width),
         height=int(height)
     )
 
-    chart_html = pio.to_html(fig, full_html=False)
-    return jsonify(chart_html=chart_html)
+    # Figure JSON only, the page already has plotly.js and calls Plotly.newPlot(el, data.figure)
+    return current_app.response_class(f'{{"figure": {chart_json(fig)}}}', mimetype='application/json')
 
 # search
 @views.route('/search_results.html')
 def search_results_page():
     return render_template("search_results.html")
 
+# Search results are served in keyset pages: the cursor is the (sort key, movie id) of the last row shown
+SEARCH_PAGE_SIZE = 20
+SEARCH_ORDERS = ('relevance', 'popularity')
+
 @views.route('/search', methods=['GET'])
 def search():
     query = request.args.get('query')
     if query:
-        # Implement your search logic here
-        results = search_movies(query)
-        return render_template('search_results.html', query=query, results=results)
+        page = search_movies(query, request.args.get('order', 'relevance'), request.args.get('cursor'))
+        return render_template('search_results.html', query=query, **page)
     else:
         flash('Please enter a search term', category='error')
         return redirect(url_for('views.homepage'))
 
-def search_movies(query):
-    results = Movie.query.filter(
-        (Movie.title.ilike(f'%{query}%')) |
-        (Movie.overview.ilike(f'%{query}%')) |
-        (Movie.actors.any(Actor.name.ilike(f'%{query}%'))) |
-        (Movie.genres.any(Genre.name.ilike(f'%{query}%')))
-    ).all()
-    return results
+@views.route('/search.json', methods=['GET'])
+def search_json():
+    # Same pages for infinite scroll, follow next_cursor until it is null
+    query = request.args.get('query', '')
+    page = search_movies(query, request.args.get('order', 'relevance'), request.args.get('cursor'))
+    return jsonify({
+        'query': query,
+        'order': page['order'],
+        'total': page['total'],
+        'results': [{'movie_id': movie.movie_id, 'title': movie.title,
+                     'url': url_for('views.movie_details_page', movie_id=movie.movie_id)} for movie in page['results']],
+        'next_cursor': page['next_cursor'],
+    })
+
+def encode_cursor(key, movie_id):
+    return base64.urlsafe_b64encode(json.dumps([key, movie_id]).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        key, movie_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return float(key), int(movie_id)
+    except (ValueError, TypeError):
+        abort(400)
+
+def search_movies(query, order='relevance', cursor=None, limit=SEARCH_PAGE_SIZE):
+    # One page of ranked movie ids from the inverted index, then only the columns the results show
+    if order not in SEARCH_ORDERS:
+        abort(400)
+    ranked, total = search_index.search_page(query, limit + 1, decode_cursor(cursor), order)
+    next_cursor = encode_cursor(ranked[limit - 1][1], ranked[limit - 1][0]) if len(ranked) > limit else None
+    ranked_ids = [movie_id for movie_id, key in ranked[:limit]]
+    rows = {row.movie_id: row for row in db.session.execute(
+        db.select(Movie.movie_id, Movie.title).where(Movie.movie_id.in_(ranked_ids)))} if ranked_ids else {}
+    results = [rows[movie_id] for movie_id in ranked_ids if movie_id in rows]
+    return {'results': results, 'total': total, 'order': order, 'next_cursor': next_cursor}
 
 #in search bar, top searches
 @views.route('/top_searches', methods=['GET'])
 def top_searches():
     query = request.args.get('query', '')
-    if query:
-        results = Movie.query.filter(Movie.title.ilike(f'%{query}%')).limit(10).all()
-    else:
-        results = Movie.query.order_by(Movie.popularity.desc()).limit(10).all()
-    
-    top_searches = [{'title': movie.title} for movie in results]
+    # Served from the in-memory autocomplete index, no database round trip per keystroke
+    top_searches = [{'title': title} for title in autocomplete_index.popular(query)]
     return jsonify(top_searches)
 
 #search bar, alphabetically
 @views.route('/alphabetical_searches', methods=['GET'])
 def alphabetical_searches():
     query = request.args.get('query', '')
-    if query:
-        results = Movie.query.filter(Movie.title.ilike(f'{query}%')).order_by(Movie.title).limit(10).all()
-    else:
-        results = Movie.query.order_by(Movie.title).limit(10).all()
-    
-    alphabetical_searches = [{'title': movie.title} for movie in results]
+    alphabetical_searches = [{'title': title} for title in autocomplete_index.alphabetical(query)]
     return jsonify(alphabetical_searches)
 
 @views.route('/movie_details/<int:movie_id>')
@@ -707,22 +708,63 @@ def movie_details_page(movie_id):
     if request.method == 'POST':
         redirect(url_for('views.searched_movieDashboard', movie=movie))
     
-    return render_template('movie_details.html', movie=movie, directors=directors, actors=actors, genres=genres)
+    is_favourite = current_user.is_authenticated and has_movie(UserFavourite, current_user.user_id, movie.movie_id)
+    return render_template('movie_details.html', movie=movie, directors=directors, actors=actors, genres=genres, is_favourite=is_favourite)
 
-def calculate_weighted_rating(vote_average, vote_count, C, m):
-    return (vote_count / (vote_count + m) * vote_average) + (m / (vote_count + m) * C)
+# Above this many nodes the similar-movie graph is drawn with WebGL
+WEBGL_NODE_THRESHOLD = 200
 
-def calculate_combined_metric(weighted_rating, popularity, overview_sentiment):
-    # Normalize the metrics (assuming max values for normalization)
-    max_popularity = 2680.593
-    max_overview_sentiment = 1.0
+def similar_movies_figure(title, neighbours):
+    # neighbours: (title, shared description, score, x, y) rows laid out around the movie at (0, 0)
+    trace = go.Scattergl if len(neighbours) + 1 > WEBGL_NODE_THRESHOLD else go.Scatter
+    edge_x = []
+    edge_y = []
+    for _, _, _, x, y in neighbours:
+        edge_x += [0, x, None]
+        edge_y += [0, y, None]
+
+    edge_trace = trace(
+        x=edge_x, y=edge_y,
+        line=dict(width=0.5, color='#888'),
+        hoverinfo='skip',
+        mode='lines')
+
+    node_trace = trace(
+        x=[0] + [row[3] for row in neighbours],
+        y=[0] + [row[4] for row in neighbours],
+        mode='markers+text',
+        hoverinfo='text',
+        text=[title] + [row[0] for row in neighbours],
+        hovertext=[title] + [f"{row[0]}<br>{row[1]}" for row in neighbours],
+        textposition='top center',
+        marker=dict(
+            showscale=True,
+            colorscale='YlGnBu',
+            color=[1.0] + [row[2] for row in neighbours],
+            size=10,
+            colorbar=dict(
+                thickness=15,
+                title=dict(text='Similarity', side='right'),
+                xanchor='left'
+            ),
+            line_width=2))
 
-    normalized_popularity = popularity / max_popularity
-    normalized_overview_sentiment = overview_sentiment / max_overview_sentiment
+    fig = go.Figure(data=[edge_trace, node_trace],
+                    layout=go.Layout(
+                        title='',
+                        showlegend=False,
+                        hovermode='closest',
+                        margin=dict(b=20, l=5, r=5, t=40),
+                        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+                        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False))
+                    )
 
-    # Calculate the combined metric (equal weights)
-    combined_metric = (weighted_rating + normalized_popularity + normalized_overview_sentiment) / 3
-    return combined_metric
+    # Set the width and height for the network graph
+    fig.update_layout(
+        width=1250,  # Set the width
+        height=400  # Set the height
+    )
+    return fig
 
 @views.route('/searched_movieDashboard.html', methods=['GET'])
 def searched_movieDashboard():
@@ -731,8 +773,6 @@ def searched_movieDashboard():
     
     # Prepare data for visualizations
     genres = movie.genres
-    directors = movie.directors
-    actors = movie.actors
     
     # CHART 1: Movie GENRE DISTRIBUTION
     genre_counts = pd.Series([genre.name for genre in genres]).value_counts()
@@ -744,14 +784,12 @@ def searched_movieDashboard():
         height=400  # Set the height
     )
 
-    chart1 = pio.to_html(fig1, full_html=False)
+    chart1 = render_chart(fig1)
     
     # CHART 2: Gauge performance based on vote_average, popularity, overview_sentiment and vote_count
-    C = db.session.query(db.func.avg(Movie.vote_average)).scalar()
-    m = 1000  # Minimum votes required to be listed in the chart
-    
-    weighted_rating = calculate_weighted_rating(movie.vote_average, movie.vote_count, C, m)
-    combined_metric = calculate_combined_metric(weighted_rating, movie.popularity, movie.overview_sentiment)
+    # Precomputed per movie by refresh_movie_metrics()
+    metrics = metrics_for(movie.movie_id)
+    combined_metric = metrics.combined_metric if metrics is not None else None
     fig2 = go.Figure(go.Indicator(
         mode="gauge+number+delta",
         value=combined_metric,
@@ -775,151 +813,96 @@ def searched_movieDashboard():
     ))
 
     fig2.update_layout(paper_bgcolor="white", font={'color': "darkblue", 'family': "Arial"}, width=620, height=380)  # Set the width and height for the chart
-    chart2 = pio.to_html(fig2, full_html=False)
+    chart2 = render_chart(fig2)
     
     # CHART 3: OVERVIEW KEYWORDS WORDCLOUD
     keywords = movie.all_combined_keywords
     keywords = keywords.replace('[', '').replace(']', '').replace("'", '').split(', ')
     wordcloud_text = ' '.join(keywords)
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(wordcloud_text)
-    fig3 = px.imshow(wordcloud, title='')
-
     # Set the width and height for the word cloud chart
-    fig3.update_layout(
-        width=580,  # Set the width
-        height=380  # Set the height
-    )
-
-    chart3 = pio.to_html(fig3, full_html=False)
-    
-    # CHART 4: NETWORK GRAPH for portrayal of relationship between Directors and Actors
-    G = nx.Graph()
+    chart3 = wordcloud_img(wordcloud_text, 800, 400, 580, 380, alt=f'{movie.title} keywords')
     
-    # Add the current movie to the graph
-    G.add_node(movie.title, type='movie')
-    
-    # Find similar movies based on shared genres
-    similar_movies = Movie.query.join(Movie.genres).filter(Genre.name.in_([genre.name for genre in genres])).limit(10).all()    
-    for similar_movie in similar_movies:
-        if similar_movie.movie_id != movie.movie_id:  # Exclude the current movie
-            G.add_node(similar_movie.title, type='movie')
-            for genre in similar_movie.genres:
-                if genre in genres:
-                    G.add_edge(movie.title, similar_movie.title, genre=genre.name)
-    
-    pos = nx.spring_layout(G)
-    edge_x = []
-    edge_y = []
-    edge_text = []
-    for edge in G.edges(data=True):
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.append(x0)
-        edge_x.append(x1)
-        edge_x.append(None)
-        edge_y.append(y0)
-        edge_y.append(y1)
-        edge_y.append(None)
-        edge_text.append(edge[2]['genre'])
-
-    edge_trace = go.Scatter(
-        x=edge_x, y=edge_y,
-        line=dict(width=0.5, color='#888'),
-        hoverinfo='text',
-        text=edge_text,
-        mode='lines')
-
-    node_x = []
-    node_y = []
-    node_text = []
-    for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_text.append(node)
-
-    node_trace = go.Scatter(
-        x=node_x, y=node_y,
-        mode='markers+text',
-        hoverinfo='text',
-        text=node_text,
-        textposition='top center',
-        marker=dict(
-            showscale=True,
-            colorscale='YlGnBu',
-            size=10,
-            colorbar=dict(
-                thickness=15,
-                title='Node Connections',
-                xanchor='left',
-                titleside='right'
-            ),
-            line_width=2))
+    # CHART 4: NETWORK GRAPH of similar movies (shared genres, directors and cast)
+    # Neighbours and their positions are precomputed by `flask build-neighbours`
+    fig4 = similar_movies_figure(movie.title, neighbours_for(movie.movie_id))
 
-    fig4 = go.Figure(data=[edge_trace, node_trace],
-                     layout=go.Layout(
-                         title='',
-                         titlefont_size=16,
-                         showlegend=False,
-                         hovermode='closest',
-                         margin=dict(b=20, l=5, r=5, t=40),
-                         annotations=[dict(
-                             text="",
-                             showarrow=False,
-                             xref="paper", yref="paper"
-                         )],
-                         xaxis=dict(showgrid=False, zeroline=False),
-                         yaxis=dict(showgrid=False, zeroline=False))
-                     )
-       
-    # Set the width and height for the network graph
-    fig4.update_layout(
-        width=1250,  # Set the width
-        height=400  # Set the height
-    )
-
-    chart4 = pio.to_html(fig4, full_html=False)
+    chart4 = render_chart(fig4)
     return render_template('searched_movieDashboard.html', movie_name=movie.title, chart1=chart1, chart2=chart2, chart3=chart3, chart4=chart4)
 
+@views.route('/assets/<filename>')
+def plotly_asset(filename):
+    # Fingerprinted plotly.js bundle, pre-compressed and cached by the browser for a year
+    bundle = plotly_bundle()
+    if filename != bundle.filename:
+        abort(404)
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    body = bundle.encoded[encoding] if encoding in bundle.encoded else bundle.raw
+    response = current_app.response_class(body, mimetype='application/javascript')
+    if body is not bundle.raw:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    response.set_etag(f"{bundle.fingerprint}-{encoding or 'identity'}")
+    return response.make_conditional(request)
+
+@views.app_context_processor
+def plotly_js():
+    # {{ plotly_js_tag() }} loads plotly.js once for pages that render charts
+    def plotly_js_tag():
+        return Markup(f'<script src="{url_for("views.plotly_asset", filename=plotly_bundle().filename)}"></script>')
+    return {'plotly_js_tag': plotly_js_tag}
+
+@views.route('/wordclouds/<digest>.png')
+def wordcloud_image(digest):
+    # Content addressed, so the image for a digest never changes and can be cached for a year
+    if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest):
+        abort(404)
+    png_path = wordcloud_png(digest)
+    if png_path is None:
+        abort(404)
+    if png_path is False:
+        # Still rendering in the pool; the browser retries instead of this worker waiting for it
+        return 'Word cloud is still rendering', 503, {'Retry-After': '2', 'Cache-Control': 'no-store'}
+    response = send_file(png_path, mimetype='image/png', max_age=31536000, conditional=True, etag=digest)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
 #movie favourite handling
+#Both endpoints take one movie_id or many (movie_ids / a JSON list) and write them in one statement
 @views.route('/add_to_favourites', methods=['POST'])
 @login_required
 def add_to_favourites():
-    movie_id = request.args.get('movie_id')
-    movie = Movie.query.get(movie_id)
-    if movie and movie not in current_user.user_favourites:
-        current_user.user_favourites.append(movie)
-        db.session.commit()
-        return jsonify({'success': True})
-    return jsonify({'success': False})
+    added = add_movies(UserFavourite, current_user.user_id, requested_movie_ids(request))
+    db.session.commit()
+    return jsonify({'success': added > 0, 'added': added})
 
 @views.route('/remove_from_favourites', methods=['POST'])
 @login_required
 def remove_from_favourites():
-    movie_id = request.args.get('movie_id')
-    movie = Movie.query.get(movie_id)
-    if movie and movie in current_user.user_favourites:
-        current_user.user_favourites.remove(movie)
-        db.session.commit()
-        return jsonify({'success': True})
-    return jsonify({'success': False})
+    removed = remove_movies(UserFavourite, current_user.user_id, requested_movie_ids(request))
+    db.session.commit()
+    return jsonify({'success': removed > 0, 'removed': removed})
 
 @views.route('/user_favourites.html')
 @login_required
 def user_favourites():
-    favourites = current_user.user_favourites
+    # Favourites with their genres in two queries, however many there are
+    favourites = (Movie.query.join(UserFavourite, UserFavourite.c.movie_id == Movie.movie_id)
+                  .filter(UserFavourite.c.user_id == current_user.user_id)
+                  .options(selectinload(Movie.genres)).all())
     return render_template('user_favourites.html', favourites=favourites)
 
 @views.route('/remove_from_personalized', methods=['POST'])
 @login_required
 def remove_from_personalized():
-    movie_id = request.json.get('movie_id')
-    movie = Movie.query.get(movie_id)
-    if movie in current_user.user_recommendations:
-        current_user.user_recommendations.remove(movie)
-        db.session.commit()
-        return jsonify({'success': True, 'message': 'Movie removed from personalized recommendations.'})
-    return jsonify({'success': False, 'message': 'Movie not found in personalized recommendations.'})
+    removed = remove_movies(UserRecommendation, current_user.user_id, requested_movie_ids(request))
+    db.session.commit()
+    if removed:
+        return jsonify({'success': True, 'removed': removed, 'message': 'Movie removed from personalized recommendations.'})
+    return jsonify({'success': False, 'removed': 0, 'message': 'Movie not found in personalized recommendations.'})
 
 @views.route('/delete_profile_picture', methods=['POST'])
 @login_required
@@ -933,6 +916,12 @@ def delete_profile_picture():
         return jsonify({'success': True, 'message': 'Profile picture deleted successfully.'})
     return jsonify({'success': False, 'message': 'No profile picture to delete.'})
 
+@views.route('/cache_stats')
+@login_required
+def cache_stats_page():
+    # Page cache hit/miss counters for this worker and the dataset version keys are namespaced by
+    return jsonify(dataset_version=get_dataset_version(), backend=current_app.config['CACHE_TYPE'], endpoints=cache_stats())
+
 @views.route('/settings.html')
 def settings_page():
     return render_template("settings.html")
\ No newline at end of file
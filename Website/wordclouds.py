@@ -0,0 +1,106 @@
+#Offloaded, persisted word-cloud rendering
+#Word clouds are rendered once per distinct text in a process pool and written as optimized PNGs
+#into a content-addressed directory (<sha256>.png, with the source text next to it as <sha256>.txt).
+#Pages embed a plain <img> pointing at /wordclouds/<sha256>.png, which is served with long-lived
+#cache headers, instead of shipping the pixel array as Plotly JSON.
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from markupsafe import Markup, escape
+from flask import current_app, url_for
+
+_pool = None
+_in_flight = {}  # digest -> Future of a render started by this worker
+_lock = threading.Lock()
+
+def render_wordcloud(text, path, width, height):
+    # Runs in a pool process; written to a temp file first so readers never see a partial PNG
+    from wordcloud import WordCloud
+    image = WordCloud(width=width, height=height, background_color='white').generate(text).to_image()
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    image.save(temp_path, format='PNG', optimize=True)
+    os.replace(temp_path, path)
+    return path
+
+def cache_dir():
+    directory = current_app.config['WORDCLOUD_CACHE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def digest_for(text, width, height):
+    return hashlib.sha256(f"{width}x{height}\n{text}".encode('utf-8')).hexdigest()
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn keeps the pool independent of the web server's threads and open connections
+        _pool = ProcessPoolExecutor(max_workers=current_app.config['WORDCLOUD_WORKERS'],
+                                    mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+def _submit(digest, text, width, height):
+    global _pool
+    with _lock:
+        future = _in_flight.get(digest)
+        if future is None:
+            path = os.path.join(cache_dir(), f"{digest}.png")
+            try:
+                future = _get_pool().submit(render_wordcloud, text, path, width, height)
+            except BrokenProcessPool:
+                # A pool process died (e.g. killed for memory); start a new pool rather than fail every render
+                _pool = None
+                future = _get_pool().submit(render_wordcloud, text, path, width, height)
+            future.add_done_callback(lambda done: _in_flight.pop(digest, None))
+            _in_flight[digest] = future
+        return future
+
+def request_wordcloud(text, width=800, height=400):
+    # Make sure a PNG for this text exists or is being rendered, and return its digest
+    digest = digest_for(text, width, height)
+    directory = cache_dir()
+    if not os.path.exists(os.path.join(directory, f"{digest}.png")):
+        source_path = os.path.join(directory, f"{digest}.txt")
+        if not os.path.exists(source_path):
+            # Same temp file and rename as the PNG, a concurrent wordcloud_png() never reads half of it
+            temp_path = f"{source_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as source:
+                source.write(f"{width}\n{height}\n{text}")
+            os.replace(temp_path, source_path)
+        _submit(digest, text, width, height)
+    return digest
+
+def wordcloud_png(digest, timeout=2):
+    # Path of a rendered word cloud, rendering it now if only its source text is on disk.
+    # None for an unknown digest, False when the render is still running after `timeout` seconds
+    # or failed (the next request starts it again), so a request never waits out a whole render
+    directory = cache_dir()
+    path = os.path.join(directory, f"{digest}.png")
+    if os.path.exists(path):
+        return path
+    future = _in_flight.get(digest)
+    if future is None:
+        source_path = os.path.join(directory, f"{digest}.txt")
+        if not os.path.exists(source_path):
+            return None
+        with open(source_path, encoding='utf-8') as source:
+            width, height, text = source.read().split('\n', 2)
+        future = _submit(digest, text, int(width), int(height))
+    try:
+        future.result(timeout=timeout)
+    except TimeoutError:
+        return False
+    except Exception as e:
+        print(f"Word cloud {digest} failed to render: {e}")
+        return False
+    return path
+
+def wordcloud_img(text, width=800, height=400, display_width=None, display_height=None, alt='Word cloud'):
+    # <img> tag for the template; the PNG itself renders in the pool while the page is sent
+    digest = request_wordcloud(text, width, height)
+    return Markup(
+        f'<img src="{url_for("views.wordcloud_image", digest=digest)}" '
+        f'width="{display_width or width}" height="{display_height or height}" alt="{escape(alt)}" loading="lazy">'
+    )
@@ -0,0 +1,5 @@
+#Benchmarks for the CineSurfer views and Dash callbacks
+#  generate.py  seeded synthetic catalogue in SQLite at any scale (python -m benchmarks.generate)
+#  stubs.py     offline TMDB client for the trending radar on the advanced page
+#  run.py       times every case at each scale and writes a JSON results file (python -m benchmarks.run)
+#  compare.py   diffs two results files, e.g. from two commits (python -m benchmarks.compare old.json new.json)
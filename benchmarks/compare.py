@@ -0,0 +1,51 @@
+#Compare two benchmark results files, e.g. the parent commit against the branch
+#Prints the warm median of every case at every scale both files share, the ratio between them and
+#the change in scaling exponent. Exits with status 1 when a case got slower by more than
+#--threshold, so it can gate a CI job.
+#    python -m benchmarks.compare base.json head.json --threshold 0.1
+import argparse
+import json
+import sys
+
+MINIMUM_SECONDS = 0.002  # ignore ratios between timings too small to measure reliably
+
+def _medians(report):
+    return {(name, result['movies']): stats['median'] for result in report['scales'] for name, stats in result['cases'].items()}
+
+def compare(base, head, threshold=0.1):
+    # [(case, movies, base seconds, head seconds, ratio, regressed)] for every shared case and scale
+    base_medians, head_medians = _medians(base), _medians(head)
+    rows = []
+    for key in sorted(base_medians.keys() & head_medians.keys()):
+        before, after = base_medians[key], head_medians[key]
+        ratio = after / before if before else float('inf')
+        regressed = ratio > 1 + threshold and max(before, after) >= MINIMUM_SECONDS
+        rows.append((*key, before, after, ratio, regressed))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmark results files.')
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown before a case counts as a regression.')
+    args = parser.parse_args(argv)
+    with open(args.base) as handle:
+        base = json.load(handle)
+    with open(args.head) as handle:
+        head = json.load(handle)
+
+    print(f"base {(base.get('commit') or '?')[:10]}  head {(head.get('commit') or '?')[:10]}")
+    print(f"{'case':<24}{'movies':>10}{'base':>12}{'head':>12}{'ratio':>9}")
+    rows = compare(base, head, args.threshold)
+    for name, movies, before, after, ratio, regressed in rows:
+        print(f"{name:<24}{movies:>10}{before * 1000:10.1f}ms{after * 1000:10.1f}ms{ratio:8.2f}x{'  REGRESSION' if regressed else ''}")
+
+    print(f"\n{'case':<24}{'base exponent':>15}{'head exponent':>15}")
+    for name in sorted(base['scaling'].keys() & head['scaling'].keys()):
+        before, after = base['scaling'][name]['exponent'], head['scaling'][name]['exponent']
+        print(f"{name:<24}{'-' if before is None else f'{before:.2f}':>15}{'-' if after is None else f'{after:.2f}':>15}")
+    if any(row[-1] for row in rows):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#Seeded synthetic catalogue for the benchmarks
+#Fills the models.py schema in a SQLite file with movies whose shape follows the real data: a few
+#genres per movie with Drama/Comedy dominating, 3-15 billed cast members and usually one director drawn
+#from Zipf-like pools (a handful of prolific names, a long tail of one-offs), lognormal popularity and
+#vote counts, release years skewed towards recent ones. The same seed and scale always produce the
+#same file, so results from two commits are measured on identical data.
+#    python -m benchmarks.generate --movies 100000 --output /tmp/catalogue-100000.sqlite
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+SEED = 20240601
+GENERATOR_VERSION = 2  # bump when the generated data changes shape, cached files are keyed on it
+CHUNK_SIZE = 50000
+BENCH_EMAIL = 'bench@example.com'
+BENCH_PASSWORD = 'benchmark-password'
+BENCH_FAVOURITES = 20
+
+GENRES = {
+    'Drama': 20, 'Comedy': 14, 'Documentary': 10, 'Thriller': 7, 'Horror': 7, 'Romance': 6, 'Action': 6,
+    'Animation': 4, 'Crime': 4, 'Music': 3, 'Family': 3, 'Adventure': 3, 'Science Fiction': 3, 'Mystery': 2.5,
+    'Fantasy': 2.5, 'TV Movie': 2, 'History': 1.5, 'War': 1, 'Western': 1,
+}
+COUNTRIES = {
+    'United States of America': 35, 'United Kingdom': 8, 'France': 7, 'India': 6, 'Japan': 5, 'Germany': 5,
+    'Canada': 4, 'Spain': 3, 'Italy': 3, 'South Korea': 3, 'China': 3, 'Brazil': 2, 'Mexico': 2, 'Australia': 2,
+    'Sweden': 1.5, 'Nigeria': 1.5, 'Argentina': 1.5, 'Russia': 1.5, 'Denmark': 1, 'Turkey': 1, 'Philippines': 1,
+    'Indonesia': 1, 'Poland': 1, 'Egypt': 0.5, 'Iran': 0.5,
+}
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William', 'Elizabeth',
+    'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Daniel', 'Nancy', 'Matthew', 'Lisa', 'Anthony', 'Betty', 'Mark', 'Margaret', 'Paul', 'Sandra',
+    'Steven', 'Ashley', 'Andrew', 'Emily', 'Kenneth', 'Donna', 'Joshua', 'Michelle', 'Kevin', 'Carol',
+    'Hiro', 'Yuki', 'Priya', 'Arjun', 'Mei', 'Wei', 'Sofia', 'Mateo', 'Chloe', 'Lucas',
+    'Amara', 'Kwame', 'Ingrid', 'Lars', 'Fatima', 'Omar', 'Elena', 'Ivan', 'Camille', 'Jules',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+    'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores',
+    'Tanaka', 'Sato', 'Sharma', 'Patel', 'Chen', 'Wang', 'Rossi', 'Silva', 'Dubois', 'Moreau',
+    'Okafor', 'Mensah', 'Larsen', 'Nielsen', 'Haddad', 'Khan', 'Petrova', 'Ivanov', 'Bernard', 'Laurent',
+]
+WORDS = [
+    'love', 'war', 'night', 'city', 'dark', 'light', 'dream', 'heart', 'shadow', 'fire', 'storm', 'river',
+    'summer', 'winter', 'secret', 'family', 'journey', 'home', 'last', 'first', 'lost', 'road', 'king', 'queen',
+    'ghost', 'island', 'ocean', 'star', 'space', 'moon', 'sun', 'blood', 'silent', 'wild', 'golden', 'broken',
+    'red', 'blue', 'black', 'white', 'little', 'big', 'long', 'hidden', 'forgotten', 'eternal', 'final', 'new',
+    'house', 'garden', 'mountain', 'desert', 'forest', 'sky', 'time', 'memory', 'promise', 'revenge', 'truth',
+    'lie', 'game', 'machine', 'robot', 'hero', 'monster', 'angel', 'devil', 'stranger', 'friend', 'brother',
+    'sister', 'mother', 'father', 'daughter', 'son', 'child', 'girl', 'boy', 'man', 'woman', 'life', 'death',
+    'world', 'kingdom', 'empire', 'legend', 'story', 'song', 'dance', 'music', 'escape', 'return', 'rise',
+    'fall', 'hunt', 'chase', 'run', 'fight', 'mission', 'code', 'signal', 'echo', 'mirror', 'door', 'window',
+    'train', 'ship', 'planet', 'galaxy', 'spring', 'autumn', 'crime', 'murder', 'detective',
+    'agent', 'spy', 'thief', 'soldier', 'doctor', 'teacher', 'artist', 'dreamer', 'prince', 'princess',
+]
+KEYWORDS = [
+    'based on novel or book', 'woman director', 'biography', 'friendship', 'revenge', 'murder', 'dystopia',
+    'coming of age', 'love triangle', 'time travel', 'space', 'alien', 'robot', 'superhero', 'zombie',
+    'vampire', 'heist', 'serial killer', 'small town', 'road trip', 'high school', 'sequel', 'remake',
+    'based on true story', 'new york city', 'london', 'paris', 'tokyo', 'world war ii', 'cold war', 'sports',
+    'musical', 'family relationships', 'father son relationship', 'mother daughter relationship', 'ghost',
+    'haunted house', 'artificial intelligence', 'post-apocalyptic future', 'martial arts', 'police', 'prison',
+    'kidnapping', 'conspiracy', 'politics', 'journalism', 'survival', 'island', 'ocean', 'desert', 'magic',
+    'dragon', 'pirate', 'spy', 'undercover', 'hospital', 'cancer', 'grief', 'wedding', 'christmas', 'anime',
+    'stop motion', 'short film', 'concert', 'lgbt', 'duringcreditsstinger', 'aftercreditsstinger', 'satire',
+]
+STATUSES = {'Released': 96, 'Post Production': 2, 'In Production': 1, 'Planned': 1}
+
+def _weights(mapping):
+    values = np.array(list(mapping.values()), dtype=np.float64)
+    return list(mapping), values / values.sum()
+
+def _zipf_cdf(count, exponent=1.1, offset=10):
+    # Cumulative weights where rank r is picked in proportion to 1 / (r + offset) ** exponent
+    weights = 1.0 / (np.arange(count) + offset) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+def _draw(rng, cdf, size):
+    return np.minimum(np.searchsorted(cdf, rng.random(size)), len(cdf) - 1)
+
+def _person_names(count, offset=0):
+    # Unique "First Last" names; once the combinations run out a number keeps them apart
+    first, last = len(FIRST_NAMES), len(LAST_NAMES)
+    names = []
+    for index in range(offset, offset + count):
+        name = f"{FIRST_NAMES[index % first]} {LAST_NAMES[(index // first) % last]}"
+        round_ = index // (first * last)
+        names.append(f"{name} {round_ + 1}" if round_ else name)
+    return names
+
+def _links(rng, movie_ids, counts, cdf):
+    # (movie_id, dimension row) pairs, first occurrence order kept and duplicates within a movie dropped
+    frame = pd.DataFrame({'movie_id': np.repeat(movie_ids, counts), 'row': _draw(rng, cdf, int(counts.sum()))})
+    return frame.drop_duplicates()
+
+def _phrases(rng, vocabulary, low, high, size, separator=' '):
+    lengths = rng.integers(low, high + 1, size)
+    picks = rng.integers(0, len(vocabulary), int(lengths.sum()))
+    phrases = []
+    start = 0
+    for length in lengths:
+        phrases.append(separator.join(vocabulary[index] for index in picks[start:start + length]))
+        start += length
+    return phrases
+
+def _movie_chunk(rng, movie_ids, genre_cdf, actor_cdf, director_cdf, country_cdf, status_cdf, actor_names, country_names, status_names):
+    count = len(movie_ids)
+    vote_count = np.floor(rng.lognormal(4.0, 2.0, count)).astype(np.int64)
+    vote_average = np.where(vote_count > 0, np.clip(rng.normal(6.2, 1.1, count), 0, 10).round(1), 0.0)
+    runtime = np.clip(rng.normal(100, 22, count), 40, 240).round().astype(np.int64)
+    runtime_missing = rng.random(count) < 0.03
+    years = np.maximum(2024 - np.floor(rng.exponential(15, count)).astype(np.int64), 1950)
+
+    genres = _links(rng, movie_ids, 1 + rng.binomial(3, 0.35, count), genre_cdf)
+    cast = _links(rng, movie_ids, np.clip(3 + rng.poisson(5, count), 1, 15), actor_cdf)
+    directors = _links(rng, movie_ids, 1 + (rng.random(count) < 0.1), director_cdf)
+
+    # Cast links are in billing order and the first four billed members are the movie's stars
+    cast = cast.assign(billing_order=cast.groupby('movie_id').cumcount())
+    stars = cast[cast['billing_order'] < 4].pivot(index='movie_id', columns='billing_order', values='row').reindex(movie_ids)
+
+    keyword_lists = _phrases(rng, KEYWORDS, 0, 8, count, separator='\x00')
+    countries = _links(rng, movie_ids, 1 + (rng.random(count) < 0.25), country_cdf)
+    country_text = countries.assign(name=np.asarray(country_names, dtype=object)[countries['row']]).groupby('movie_id')['name'].agg(', '.join)
+    statuses = _draw(rng, status_cdf, count)
+
+    columns = {
+        'title': [title.title() for title in _phrases(rng, WORDS, 1, 4, count)],
+        'overview': _phrases(rng, WORDS, 12, 30, count),
+        'status': [status_names[index] for index in statuses],
+        'release_year': years.tolist(),
+        'popularity': rng.lognormal(1.5, 1.2, count).round(3).tolist(),
+        'vote_average': vote_average.tolist(),
+        'vote_count': vote_count.tolist(),
+        'adult': (rng.random(count) < 0.01).tolist(),
+        'overview_sentiment': rng.uniform(-1, 1, count).round(4).tolist(),
+        'all_combined_keywords': [str(keywords.split('\x00')) if keywords else '[]' for keywords in keyword_lists],
+        'runtime': [None if missing else value for missing, value in zip(runtime_missing, runtime.tolist())],
+        'production_countries': country_text.reindex(movie_ids).tolist(),
+    }
+    for slot in range(4):
+        rows = stars[slot] if slot in stars else pd.Series(np.nan, index=movie_ids)
+        columns[f'Star{slot + 1}'] = [None if pd.isna(row) else actor_names[int(row)] for row in rows]
+    return columns, genres, cast, directors, countries
+
+def generate_catalogue(movies, seed=SEED, chunk_size=CHUNK_SIZE, report=print):
+    # Fill an empty schema in the current app context; returns row counts per table
+    from werkzeug.security import generate_password_hash
+    from sqlalchemy import select, func
+    from Website import db
+    from Website.ingest import bulk_insert, MOVIE_COLUMNS
+    from Website.models import Movie, Genre, Actor, Director, Country, MovieGenre, MovieActor, MovieDirector, MovieCountry, User, UserFavourite
+    from Website.movie_metrics import refresh_movie_metrics
+
+    if db.session.execute(select(func.count()).select_from(Movie)).scalar():
+        raise RuntimeError("The benchmark catalogue must be generated into an empty database")
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    genre_names, genre_weights = _weights(GENRES)
+    country_names, country_weights = _weights(COUNTRIES)
+    status_names, status_weights = _weights(STATUSES)
+    actor_names = _person_names(max(200, movies * 6 // 10))
+    director_names = _person_names(max(50, movies // 4), offset=len(FIRST_NAMES) * len(LAST_NAMES) // 2)
+    genre_cdf = np.cumsum(genre_weights)
+    country_cdf = np.cumsum(country_weights)
+    status_cdf = np.cumsum(status_weights)
+    actor_cdf = _zipf_cdf(len(actor_names))
+    director_cdf = _zipf_cdf(len(director_names), exponent=1.0, offset=20)
+
+    bulk_insert(Genre.__table__, ['genre_id', 'name'], [(index + 1, name) for index, name in enumerate(genre_names)])
+    bulk_insert(Actor.__table__, ['actor_id', 'name'], [(index + 1, name) for index, name in enumerate(actor_names)])
+    bulk_insert(Director.__table__, ['director_id', 'name'], [(index + 1, name) for index, name in enumerate(director_names)])
+    bulk_insert(Country.__table__, ['country_id', 'name'], [(index + 1, name) for index, name in enumerate(country_names)])
+    db.session.commit()
+
+    counts = {'movies': 0, 'movie_genres': 0, 'movie_actors': 0, 'movie_directors': 0, 'movie_countries': 0}
+    for start in range(1, movies + 1, chunk_size):
+        movie_ids = np.arange(start, min(start + chunk_size, movies + 1))
+        columns, genres, cast, directors, countries = _movie_chunk(rng, movie_ids, genre_cdf, actor_cdf, director_cdf, country_cdf,
+                                                        status_cdf, actor_names, country_names, status_names)
+        bulk_insert(Movie.__table__, ['movie_id'] + MOVIE_COLUMNS,
+                    list(zip(movie_ids.tolist(), *[columns[column] for column in MOVIE_COLUMNS])))
+        for table, id_column, links in ((MovieGenre, 'genre_id', genres), (MovieActor, 'actor_id', cast),
+                                        (MovieDirector, 'director_id', directors), (MovieCountry, 'country_id', countries)):
+            extra = ['billing_order'] if 'billing_order' in links else []
+            bulk_insert(table, ['movie_id', id_column] + extra,
+                        list(zip(links['movie_id'].tolist(), (links['row'] + 1).tolist(), *[links[column].tolist() for column in extra])))
+            counts[table.name] += len(links)
+        db.session.commit()
+        counts['movies'] += len(movie_ids)
+        report(f"{counts['movies']} / {movies} movies ({time.perf_counter() - started:.1f}s)")
+
+    # One user with favourites among the popular titles, for /personalized.html and the favourites pages
+    user = User(firstName='Bench', lastName='Mark', username='bench', email=BENCH_EMAIL,
+                password=generate_password_hash(BENCH_PASSWORD, method='pbkdf2:sha256'))
+    db.session.add(user)
+    db.session.flush()
+    favourites = rng.choice(min(movies, 1000), size=min(BENCH_FAVOURITES, movies), replace=False) + 1
+    db.session.execute(UserFavourite.insert(), [{'user_id': user.user_id, 'movie_id': int(movie_id)} for movie_id in favourites])
+    db.session.commit()
+    counts['movie_metrics'] = refresh_movie_metrics()
+    report(f"Generated {movies} movies in {time.perf_counter() - started:.1f}s")
+    return counts
+
+def catalogue_path(data_dir, movies, seed=SEED):
+    return os.path.join(data_dir, f"catalogue-{movies}-{seed}-v{GENERATOR_VERSION}.sqlite")
+
+def build_catalogue_file(path, movies, seed=SEED, report=print):
+    # Generate into a temporary file next to path and move it into place once complete
+    partial = path + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    os.environ['DATABASE_URI'] = f"sqlite:///{os.path.abspath(partial)}"
+    os.environ.setdefault('TRENDING_REFRESH_ENABLED', 'false')
+    from Website import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        connection = db.session.connection()
+        connection.exec_driver_sql('PRAGMA synchronous=OFF')
+        counts = generate_catalogue(movies, seed, report=report)
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        db.engine.dispose()
+    os.replace(partial, path)
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic CineSurfer catalogue in SQLite.')
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--output', help='SQLite file to create (default: catalogue-<movies>-<seed>-v<n>.sqlite here)')
+    args = parser.parse_args(argv)
+    path = args.output or catalogue_path('.', args.movies, args.seed)
+    if os.path.exists(path):
+        sys.exit(f"{path} already exists")
+    counts = build_catalogue_file(path, args.movies, args.seed)
+    print(', '.join(f"{table}: {count}" for table, count in counts.items()))
+
+if __name__ == '__main__':
+    main()
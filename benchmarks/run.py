@@ -0,0 +1,231 @@
+#Benchmark runner
+#Each scale runs in its own process against its own generated catalogue (cached in --data-dir, keyed
+#on scale, seed and generator version), with the page cache disabled so every request renders, and
+#the TMDB client stubbed. Every case is timed once cold (first request, lazy indexes and snapshots
+#built) and then --repeat times warm. Requests vary deterministically from run to run (different
+#years, genres, movies, queries), so the Dash figure cache and similar memoization are exercised
+#the way users hit them rather than answering the same request from memory every time.
+#The results file holds per-case stats for every scale plus a fitted scaling exponent
+#(time ~ movies ** exponent), e.g. 1.0 for a view that grows linearly with the catalogue.
+#    python -m benchmarks.run --scales 10000,100000,1000000 --output results.json
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+import numpy as np
+from benchmarks.generate import SEED, BENCH_EMAIL, BENCH_PASSWORD, catalogue_path
+
+DEFAULT_SCALES = (10000, 100000)
+DEFAULT_REPEAT = 5
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'cinesurfer-benchmarks')
+RESULTS_VERSION = 1
+SEARCH_QUERIES = ['love', 'dark city', 'space robot', 'the last', 'ghost story', 'dream', 'war hero', 'Drama',
+                  'James Smith', 'time travel', 'summer', 'king', 'secret family', 'mo', 'ocean']
+
+def _dash(outputs, input_id, value):
+    # Request body of a Dash callback, as dash-renderer sends it
+    specs = [{'id': output, 'property': 'figure'} for output in outputs]
+    body = {
+        'output': specs[0]['id'] + '.figure' if len(specs) == 1 else '..' + '...'.join(f'{output}.figure' for output in outputs) + '..',
+        'outputs': specs[0] if len(specs) == 1 else specs,
+        'inputs': [{'id': input_id, 'property': 'value', 'value': value}],
+        'changedPropIds': [f'{input_id}.value'],
+    }
+    return 'POST', '/dash/_dash-update-component', {'json': body}
+
+def _pick(rng, values, most=3):
+    return rng.sample(values, rng.randint(1, min(most, len(values))))
+
+def benchmark_cases(context):
+    # name -> request builder; a builder takes a seeded random.Random and returns (method, url, kwargs)
+    movie_ids = context['movie_ids']
+    return {
+        'basic': lambda rng: ('GET', '/basic.html', {}),
+        'intermediate': lambda rng: ('GET', '/intermediate.html', {}),
+        'advanced': lambda rng: ('GET', '/advanced.html', {}),
+        'search': lambda rng: ('GET', f"/search?query={rng.choice(SEARCH_QUERIES)}", {}),
+        'top_searches': lambda rng: ('GET', f"/top_searches?query={rng.choice(SEARCH_QUERIES)[:3]}", {}),
+        'alphabetical_searches': lambda rng: ('GET', f"/alphabetical_searches?query={rng.choice(SEARCH_QUERIES)[:2]}", {}),
+        'update_chart': lambda rng: ('GET', f"/update_chart?movie_id={rng.choice(movie_ids)}&chart_id=radar", {}),
+        'movie_dashboard': lambda rng: ('GET', f"/searched_movieDashboard.html?movie_id={rng.choice(movie_ids)}", {}),
+        'movie_details': lambda rng: ('GET', f"/movie_details/{rng.choice(movie_ids)}", {}),
+        'personalized': lambda rng: ('GET', '/personalized.html', {}),
+        'user_favourites': lambda rng: ('GET', '/user_favourites.html', {}),
+        'dash_years': lambda rng: _dash(['chart1', 'chart2'], 'year-dropdown', _pick(rng, context['years'])),
+        'dash_genres': lambda rng: _dash(['chart3', 'chart4'], 'genre-dropdown', _pick(rng, context['genres'])),
+        'dash_directors': lambda rng: _dash(['chart5'], 'director-dropdown', _pick(rng, context['directors'])),
+    }
+
+def _stats(seconds):
+    warm = np.array(seconds[1:] or seconds)
+    return {
+        'cold': seconds[0],
+        'min': float(warm.min()),
+        'median': float(np.median(warm)),
+        'p95': float(np.percentile(warm, 95)),
+        'mean': float(warm.mean()),
+    }
+
+def run_scale(movies, seed=SEED, repeat=DEFAULT_REPEAT, data_dir=DEFAULT_DATA_DIR, only=None):
+    # Runs in a fresh process per scale: the app keeps its snapshots and indexes in module globals
+    os.makedirs(data_dir, exist_ok=True)
+    path = catalogue_path(data_dir, movies, seed)
+    generate_seconds = None
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'benchmarks.generate', '--movies', str(movies), '--seed', str(seed), '--output', path], check=True)
+        generate_seconds = time.perf_counter() - started
+
+    os.environ.update({
+        'DATABASE_URI': f"sqlite:///{os.path.abspath(path)}",
+        'CACHE_TYPE': 'NullCache',
+        'TRENDING_REFRESH_ENABLED': 'false',
+        'WARMUP_ON_START': 'false',  # cold timings include building the filter cube
+        'WORDCLOUD_CACHE_DIR': tempfile.mkdtemp(prefix='cinesurfer-wordclouds-'),
+    })
+
+    started = time.perf_counter()
+    from Website import create_app, trending_refresher
+    from Website.views import create_dash_app
+    app = create_app()
+    with app.app_context():
+        create_dash_app(app)
+    startup_seconds = time.perf_counter() - started
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from benchmarks.stubs import install_stub_client
+    install_stub_client(seed)
+    started = time.perf_counter()
+    with app.app_context():
+        trending_refresher.refresh()
+    trending_seconds = time.perf_counter() - started
+
+    queries = []
+    event.listen(Engine, 'before_cursor_execute', lambda *args: queries.append(1))
+    client = app.test_client()
+    client.post('/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+
+    with app.app_context():
+        from Website.movie_cube import get_filter_cube
+        cube = get_filter_cube()
+        context = {
+            'movie_ids': random.Random(seed).sample(range(1, movies + 1), min(movies, 200)),
+            'years': list(range(2019, datetime.now().year)),
+            'genres': sorted(str(name) for name in cube.genre_names),
+            'directors': cube.director_names[cube.top_directors(10)].tolist(),
+        }
+
+    results = {}
+    for name, build in benchmark_cases(context).items():
+        if only and name not in only:
+            continue
+        rng = random.Random(seed + zlib.crc32(name.encode('utf-8')))
+        seconds, query_counts, sizes, errors = [], [], [], []
+        for _ in range(repeat + 1):
+            method, url, kwargs = build(rng)
+            queries.clear()
+            started = time.perf_counter()
+            response = client.open(url, method=method, **kwargs)
+            seconds.append(time.perf_counter() - started)
+            query_counts.append(len(queries))
+            sizes.append(len(response.data))
+            if response.status_code >= 400:
+                errors.append(f"{method} {url}: {response.status_code}")
+        results[name] = {**_stats(seconds), 'queries': float(np.median(query_counts)), 'bytes': float(np.median(sizes)), 'errors': errors[:5]}
+        print(f"  {name:<24}{results[name]['median'] * 1000:10.1f} ms{'  ' + errors[0] if errors else ''}", file=sys.stderr)
+
+    return {'movies': movies, 'generate_seconds': generate_seconds, 'startup_seconds': startup_seconds,
+            'trending_refresh_seconds': trending_seconds, 'cases': results}
+
+def scaling_curves(scales):
+    # case -> {'points': [[movies, median seconds], ...], 'exponent': log-log slope or None}
+    curves = {}
+    for result in scales:
+        for name, stats in result['cases'].items():
+            curves.setdefault(name, {'points': []})['points'].append([result['movies'], stats['median']])
+    for curve in curves.values():
+        points = [(movies, seconds) for movies, seconds in curve['points'] if seconds > 0]
+        if len(points) >= 2:
+            x, y = np.log([movies for movies, _ in points]), np.log([seconds for _, seconds in points])
+            curve['exponent'] = round(float(np.polyfit(x, y, 1)[0]), 3)
+        else:
+            curve['exponent'] = None
+    return curves
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(scales=DEFAULT_SCALES, seed=SEED, repeat=DEFAULT_REPEAT, data_dir=DEFAULT_DATA_DIR, only=None):
+    results = []
+    for movies in scales:
+        print(f"{movies} movies", file=sys.stderr)
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as handle:
+            output = handle.name
+        command = [sys.executable, '-m', 'benchmarks.run', '--worker', '--scales', str(movies), '--seed', str(seed),
+                   '--repeat', str(repeat), '--data-dir', data_dir, '--output', output]
+        if only:
+            command += ['--cases', ','.join(only)]
+        try:
+            subprocess.run(command, check=True)
+            with open(output) as handle:
+                results.append(json.load(handle))
+        finally:
+            os.remove(output)
+    return {
+        'version': RESULTS_VERSION,
+        'commit': _git('rev-parse', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'seed': seed,
+        'repeat': repeat,
+        'scales': results,
+        'scaling': scaling_curves(results),
+    }
+
+def print_summary(report, out=sys.stdout):
+    scales = [result['movies'] for result in report['scales']]
+    print(f"{'case':<24}" + ''.join(f"{movies:>12}" for movies in scales) + f"{'exponent':>10}", file=out)
+    for name, curve in report['scaling'].items():
+        medians = dict(curve['points'])
+        cells = ''.join(f"{medians[movies] * 1000:10.1f}ms" if movies in medians else f"{'-':>12}" for movies in scales)
+        exponent = f"{curve['exponent']:10.2f}" if curve['exponent'] is not None else f"{'-':>10}"
+        print(f"{name:<24}{cells}{exponent}", file=out)
+    print(f"{'startup':<24}" + ''.join(f"{result['startup_seconds'] * 1000:10.1f}ms" for result in report['scales']), file=out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the CineSurfer views and Dash callbacks.')
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)), help='Comma separated catalogue sizes.')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Warm runs per case after the cold one.')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Where generated catalogues are kept between runs.')
+    parser.add_argument('--cases', help='Comma separated subset of cases to run.')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    scales = [int(scale) for scale in args.scales.split(',') if scale]
+    only = set(args.cases.split(',')) if args.cases else None
+
+    if args.worker:
+        result = run_scale(scales[0], args.seed, args.repeat, args.data_dir, only)
+    else:
+        result = run(scales, args.seed, args.repeat, args.data_dir, only)
+        print_summary(result)
+    with open(args.output, 'w') as handle:
+        json.dump(result, handle, indent=2)
+
+if __name__ == '__main__':
+    main()
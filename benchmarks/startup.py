@@ -0,0 +1,112 @@
+#Startup time budget
+#Times `import Website`, create_app() and create_dash_app() in fresh interpreters (module caches and
+#lazy imports start cold every time) against an empty SQLite file, without TMDB credentials and with
+#the background threads off. Fails when the median total goes over --budget or when startup imported
+#one of HEAVY_MODULES or ran a query, both of which belong to the first request or the warm-up thread.
+#create_app() on its own (every flask CLI command) must not even import Dash or plotly.
+#tests/test_startup.py runs the same check under pytest.
+#    python -m benchmarks.startup --repeat 5 --budget 2.5
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_REPEAT = 5
+DEFAULT_BUDGET = float(os.environ.get('STARTUP_BUDGET_SECONDS', 2.5))
+HEAVY_MODULES = ('pandas', 'numpy', 'scipy', 'sklearn', 'plotly.express', 'plotly.graph_objects', 'wordcloud', 'networkx', 'matplotlib')
+DASH_MODULES = ('dash', 'plotly')  # imported by create_dash_app(), never by create_app()
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_startup():
+    # Runs in the worker process, the environment is prepared by the parent
+    timings = {}
+    started = time.perf_counter()
+    import Website
+    from Website.views import create_dash_app
+    timings['import'] = time.perf_counter() - started
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    queries = []
+    event.listen(Engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+
+    started = time.perf_counter()
+    app = Website.create_app()
+    timings['create_app'] = time.perf_counter() - started
+    create_app_modules = [name for name in HEAVY_MODULES + DASH_MODULES if name in sys.modules]
+    started = time.perf_counter()
+    with app.app_context():
+        create_dash_app(app)
+    timings['create_dash_app'] = time.perf_counter() - started
+    timings['total'] = sum(timings.values())
+    return {'seconds': timings, 'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+            'create_app_modules': create_app_modules, 'queries': queries}
+
+def run(repeat=DEFAULT_REPEAT):
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='cinesurfer-startup-') as directory:
+        env = {key: value for key, value in os.environ.items() if key not in ('API_TOKEN', 'API_KEY')}
+        env.update({
+            'DATABASE_URI': f"sqlite:///{os.path.join(directory, 'empty.sqlite')}",
+            'CACHE_TYPE': 'NullCache',
+            'TRENDING_REFRESH_ENABLED': 'false',
+            'WARMUP_ON_START': 'false',
+            'WORDCLOUD_CACHE_DIR': os.path.join(directory, 'wordclouds'),
+        })
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', '--worker'], env=env,
+                                    cwd=ROOT, capture_output=True, text=True, check=True).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+    phases = runs[0]['seconds'].keys()
+    return {
+        'repeat': repeat,
+        'median': {phase: statistics.median(result['seconds'][phase] for result in runs) for phase in phases},
+        'max': {phase: max(result['seconds'][phase] for result in runs) for phase in phases},
+        'heavy_modules': sorted({name for result in runs for name in result['heavy_modules']}),
+        'create_app_modules': sorted({name for result in runs for name in result['create_app_modules']}),
+        'queries': sorted({query for result in runs for query in result['queries']}),
+    }
+
+def check(report, budget=DEFAULT_BUDGET):
+    # List of failures, empty when startup is within budget
+    failures = []
+    if report['median']['total'] > budget:
+        failures.append(f"median startup {report['median']['total']:.2f}s is over the {budget:.2f}s budget")
+    if report['heavy_modules']:
+        failures.append(f"startup imported {', '.join(report['heavy_modules'])}")
+    if report['create_app_modules']:
+        failures.append(f"create_app() imported {', '.join(report['create_app_modules'])}")
+    if report['queries']:
+        failures.append(f"startup ran {len(report['queries'])} queries, e.g. {report['queries'][0][:80]}")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the app starts within its time budget.')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Fresh interpreters to time.')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='Allowed median seconds for import, create_app and create_dash_app.')
+    parser.add_argument('--output', help='Also write the timings to this JSON file.')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(measure_startup()))
+        return
+    report = run(args.repeat)
+    for phase, seconds in report['median'].items():
+        print(f"{phase:<18}{seconds * 1000:10.1f}ms median{report['max'][phase] * 1000:10.1f}ms max")
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({**report, 'budget': args.budget}, handle, indent=2)
+    failures = check(report, args.budget)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK within {args.budget:.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#Offline stand-in for the TMDB API
+#Only the HTTP layer is replaced: StubTMDBClient.get() answers discover/movie from seeded data, so the
+#trending refresh and everything downstream of it runs the real code without network latency or
+#rate limits skewing the numbers.
+import random
+from datetime import date, timedelta
+from Website.movie_api import TMDBClient
+from benchmarks.generate import SEED, WORDS
+
+RESULTS_PER_PAGE = 20
+
+class StubTMDBClient(TMDBClient):
+    def __init__(self, seed=SEED, **kwargs):
+        kwargs.setdefault('token', 'benchmark-stub')  # never sent anywhere
+        super().__init__(**kwargs)
+        self.seed = seed
+        self.calls = 0
+
+    def get(self, path, **params):
+        self.calls += 1
+        if path.strip('/') == 'discover/movie':
+            return self.discover_page(int(params.get('page', 1)))
+        return None
+
+    def discover_page(self, page):
+        rng = random.Random(self.seed * 1000 + page)
+        results = []
+        for index in range(RESULTS_PER_PAGE):
+            released = date(2024, 6, 1) - timedelta(days=rng.randint(0, 2000))
+            results.append({
+                'id': page * 1000 + index,
+                'title': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))).title() + f" {page}-{index}",
+                'overview': ' '.join(rng.choice(WORDS) for _ in range(20)),
+                'release_date': released.isoformat(),
+                'adult': False,
+                'vote_average': round(rng.uniform(4, 9), 1),
+                'vote_count': rng.randint(10, 20000),
+                'popularity': round(rng.lognormvariate(4, 1), 3),
+            })
+        return {'page': page, 'results': results, 'total_pages': 500, 'total_results': 10000}
+
+def install_stub_client(seed=SEED):
+    # Route every get_client() caller to the stub
+    from Website import movie_api
+    movie_api._client = StubTMDBClient(seed)
+    return movie_api._client
@@ -0,0 +1,35 @@
+"""Added movie_neighbours for the precomputed similar-movie graph
+
+Revision ID: 3f9a1c7b52d4
+Revises: e1037d2f8523
+Create Date: 2026-10-18 10:12:41.402217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7b52d4'
+down_revision = 'e1037d2f8523'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('movie_neighbours',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('neighbour_rank', sa.Integer(), nullable=False),
+    sa.Column('neighbour_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('shared', sa.String(length=300), nullable=True),
+    sa.Column('x', sa.Float(), nullable=False),
+    sa.Column('y', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.movie_id'], ),
+    sa.ForeignKeyConstraint(['neighbour_id'], ['movies.movie_id'], ),
+    sa.PrimaryKeyConstraint('movie_id', 'neighbour_rank')
+    )
+
+
+def downgrade():
+    op.drop_table('movie_neighbours')
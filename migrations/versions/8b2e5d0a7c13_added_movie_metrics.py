@@ -0,0 +1,36 @@
+"""Added movie_metrics, the materialized per-movie metrics
+
+Revision ID: 8b2e5d0a7c13
+Revises: 3f9a1c7b52d4
+Create Date: 2026-10-18 11:03:17.816950
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e5d0a7c13'
+down_revision = '3f9a1c7b52d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('movie_metrics',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('weighted_rating', sa.Float(), nullable=True),
+    sa.Column('trend_score', sa.Float(), nullable=True),
+    sa.Column('norm_vote_average', sa.Float(), nullable=True),
+    sa.Column('norm_popularity', sa.Float(), nullable=True),
+    sa.Column('norm_vote_count', sa.Float(), nullable=True),
+    sa.Column('norm_weighted_rating', sa.Float(), nullable=True),
+    sa.Column('norm_trend_score', sa.Float(), nullable=True),
+    sa.Column('combined_metric', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.movie_id'], ),
+    sa.PrimaryKeyConstraint('movie_id')
+    )
+
+
+def downgrade():
+    op.drop_table('movie_metrics')
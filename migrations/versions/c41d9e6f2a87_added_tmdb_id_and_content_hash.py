@@ -0,0 +1,30 @@
+"""Added tmdb_id and content_hash to movies for the TMDB delta sync
+
+Revision ID: c41d9e6f2a87
+Revises: 8b2e5d0a7c13
+Create Date: 2026-10-18 12:20:05.331842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d9e6f2a87'
+down_revision = '8b2e5d0a7c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tmdb_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_movie_tmdb_id', ['tmdb_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.drop_index('ix_movie_tmdb_id')
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('tmdb_id')
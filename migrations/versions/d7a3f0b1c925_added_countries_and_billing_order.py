@@ -0,0 +1,96 @@
+"""Added countries/movie_countries and movie_actors.billing_order, backfilled from production_countries and Star1-Star4
+
+Revision ID: d7a3f0b1c925
+Revises: c41d9e6f2a87
+Create Date: 2026-10-18 14:02:17.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3f0b1c925'
+down_revision = 'c41d9e6f2a87'
+branch_labels = None
+depends_on = None
+
+STAR_COLUMNS = ['Star1', 'Star2', 'Star3', 'Star4']
+
+movies = sa.table('movies', sa.column('movie_id', sa.Integer), sa.column('production_countries', sa.String),
+                  *[sa.column(star, sa.String) for star in STAR_COLUMNS])
+actors = sa.table('actors', sa.column('actor_id', sa.Integer), sa.column('name', sa.String))
+movie_actors = sa.table('movie_actors', sa.column('movie_id', sa.Integer), sa.column('actor_id', sa.Integer),
+                        sa.column('billing_order', sa.Integer))
+countries = sa.table('countries', sa.column('country_id', sa.Integer), sa.column('name', sa.String))
+movie_countries = sa.table('movie_countries', sa.column('movie_id', sa.Integer), sa.column('country_id', sa.Integer))
+
+
+def upgrade():
+    op.create_table('countries',
+    sa.Column('country_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('country_id'),
+    sa.UniqueConstraint('name')
+    )
+    with op.batch_alter_table('countries', schema=None) as batch_op:
+        batch_op.create_index('ix_country_id', ['country_id'], unique=False)
+
+    op.create_table('movie_countries',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('country_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['country_id'], ['countries.country_id'], ),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.movie_id'], ),
+    sa.PrimaryKeyConstraint('movie_id', 'country_id')
+    )
+    with op.batch_alter_table('movie_countries', schema=None) as batch_op:
+        batch_op.create_index('ix_movie_country_country_id', ['country_id'], unique=False)
+        batch_op.create_index('ix_movie_country_movie_id', ['movie_id'], unique=False)
+
+    with op.batch_alter_table('movie_actors', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('billing_order', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_movie_actor_billing_order', ['billing_order', 'actor_id'], unique=False)
+
+    # Backfill: one country link per name in the comma separated production_countries string
+    connection = op.get_bind()
+    links = set()
+    for movie_id, text in connection.execute(sa.select(movies.c.movie_id, movies.c.production_countries)
+                                             .where(movies.c.production_countries.isnot(None))):
+        links.update((movie_id, name.strip()) for name in text.split(',') if name.strip())
+    names = sorted({name for _, name in links})
+    if names:
+        op.bulk_insert(countries, [{'name': name} for name in names])
+        country_ids = dict(connection.execute(sa.select(countries.c.name, countries.c.country_id)).all())
+        op.bulk_insert(movie_countries, [{'movie_id': movie_id, 'country_id': country_ids[name]} for movie_id, name in sorted(links)])
+
+    # Backfill: Star1..Star4 become billing orders 0..3 on their movie_actors links, adding the
+    # actor and the link where the star was not in the cast list
+    for order, star in enumerate(STAR_COLUMNS):
+        column = movies.c[star]
+        op.execute(actors.insert().from_select(['name'], sa.select(column).distinct()
+                   .where(column.isnot(None), ~sa.exists().where(actors.c.name == column))))
+        op.execute(movie_actors.insert().from_select(['movie_id', 'actor_id'], sa.select(movies.c.movie_id, actors.c.actor_id)
+                   .join(actors, actors.c.name == column)
+                   .where(~sa.exists().where(movie_actors.c.movie_id == movies.c.movie_id, movie_actors.c.actor_id == actors.c.actor_id))))
+        op.execute(movie_actors.update()
+                   .where(movie_actors.c.billing_order.is_(None),
+                          sa.exists().where(movies.c.movie_id == movie_actors.c.movie_id, actors.c.actor_id == movie_actors.c.actor_id,
+                                            actors.c.name == column))
+                   .values(billing_order=order))
+
+
+def downgrade():
+    # Star links added by the backfill stay in movie_actors, they are part of the cast either way
+    with op.batch_alter_table('movie_actors', schema=None) as batch_op:
+        batch_op.drop_index('ix_movie_actor_billing_order')
+        batch_op.drop_column('billing_order')
+
+    with op.batch_alter_table('movie_countries', schema=None) as batch_op:
+        batch_op.drop_index('ix_movie_country_movie_id')
+        batch_op.drop_index('ix_movie_country_country_id')
+
+    op.drop_table('movie_countries')
+    with op.batch_alter_table('countries', schema=None) as batch_op:
+        batch_op.drop_index('ix_country_id')
+
+    op.drop_table('countries')
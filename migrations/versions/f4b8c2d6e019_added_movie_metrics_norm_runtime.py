@@ -0,0 +1,27 @@
+"""Added movie_metrics.norm_runtime, the radar's min-max scaled runtime
+
+Revision ID: f4b8c2d6e019
+Revises: d7a3f0b1c925
+Create Date: 2026-10-18 20:41:09.302671
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b8c2d6e019'
+down_revision = 'd7a3f0b1c925'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled by the next `flask refresh-metrics`
+    with op.batch_alter_table('movie_metrics', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('norm_runtime', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('movie_metrics', schema=None) as batch_op:
+        batch_op.drop_column('norm_runtime')
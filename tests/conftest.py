@@ -0,0 +1,24 @@
+#Shared fixtures: every test app gets its own SQLite file and FileSystemCache directory under tmp_path,
+#with the background threads off
+import pytest
+from Website import create_app, db
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URI', f"sqlite:///{tmp_path / 'catalogue.sqlite'}")
+    monkeypatch.delenv('CACHE_TYPE', raising=False)
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('WORDCLOUD_CACHE_DIR', str(tmp_path / 'wordclouds'))
+    monkeypatch.setenv('TRENDING_REFRESH_ENABLED', 'false')
+    monkeypatch.setenv('WARMUP_ON_START', 'false')
+    monkeypatch.setenv('DASH_RELOAD_INTERVAL', '0')
+    return create_app
+
+@pytest.fixture
+def app(make_app):
+    # An app with empty tables and its context pushed
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
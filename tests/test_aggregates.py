@@ -0,0 +1,63 @@
+#Basic dashboard aggregates on a small SQLite catalogue where movies have several genres, directors,
+#actors and countries: exact per-chart counts, so a join fan-out or a missing listed() filter shows up
+import pytest
+from Website import db
+from Website.aggregates import (top_titles_by_votes, top_directors_by_votes, genre_counts, releases_per_year,
+                                adult_split, star_counts, country_counts)
+from Website.models import Movie, Genre, Actor, Director, Country, MovieGenre, MovieActor, MovieDirector, MovieCountry
+
+# title, votes, year, adult, genres, directors, (actor, billing order) pairs, countries
+MOVIES = [
+    ('Alpha', 100, 2000, False, ['Drama', 'War'], ['Dee', 'Fay'], [('Ann', 0), ('Bob', 1), ('Cid', 5)], ['France', 'Japan']),
+    ('Beta', 50, 2000, True, ['Drama'], ['Dee'], [('Ann', 0)], ['France']),
+    ('Alpha', 10, 2002, False, ['Comedy'], ['Fay'], [], []),  # a remake sharing the title
+    # not listed: no director, no genre
+    ('Gamma', 1000, 2001, False, ['Comedy'], [], [('Ann', 0)], ['France']),
+    ('Delta', 500, 2003, True, [], ['Fay'], [('Bob', 0)], ['Japan']),
+]
+
+@pytest.fixture
+def catalogue(app):
+    ids = {}
+    def row_id(model, id_column, name):
+        if (model, name) not in ids:
+            ids[model, name] = db.session.execute(model.__table__.insert().values(name=name)).inserted_primary_key[0]
+        return ids[model, name]
+    for title, votes, year, adult, genres, directors, cast, countries in MOVIES:
+        movie = Movie(title=title, vote_count=votes, release_year=year, adult=adult)
+        db.session.add(movie)
+        db.session.flush()
+        for name in genres:
+            db.session.execute(MovieGenre.insert().values(movie_id=movie.movie_id, genre_id=row_id(Genre, 'genre_id', name)))
+        for name in directors:
+            db.session.execute(MovieDirector.insert().values(movie_id=movie.movie_id, director_id=row_id(Director, 'director_id', name)))
+        for name, order in cast:
+            db.session.execute(MovieActor.insert().values(movie_id=movie.movie_id, actor_id=row_id(Actor, 'actor_id', name), billing_order=order))
+        for name in countries:
+            db.session.execute(MovieCountry.insert().values(movie_id=movie.movie_id, country_id=row_id(Country, 'country_id', name)))
+    db.session.commit()
+    return app
+
+def records(frame):
+    return [tuple(row) for row in frame.itertuples(index=False, name=None)]
+
+def test_top_titles_sum_votes_once_per_movie(catalogue):
+    assert records(top_titles_by_votes()) == [('Alpha', 110), ('Beta', 50)]
+
+def test_top_directors(catalogue):
+    assert records(top_directors_by_votes()) == [('Dee', 150), ('Fay', 110)]
+
+def test_genre_counts(catalogue):
+    assert records(genre_counts()) == [('Drama', 2), ('Comedy', 1), ('War', 1)]
+
+def test_releases_per_year(catalogue):
+    assert records(releases_per_year()) == [(2000, 2), (2002, 1)]
+
+def test_adult_split(catalogue):
+    assert records(adult_split()) == [(False, 2), (True, 1)]
+
+def test_star_counts_only_top_billed(catalogue):
+    assert records(star_counts()) == [('Ann', 2), ('Bob', 1)]
+
+def test_country_counts_only_listed(catalogue):
+    assert records(country_counts()) == [('France', 2), ('Japan', 1)]
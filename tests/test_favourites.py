@@ -0,0 +1,42 @@
+#Set-based favourites writes on SQLite: INSERT OR IGNORE ... SELECT skips repeats and unknown movie ids,
+#DELETE ... IN removes, and has_movie() agrees with the table
+import pytest
+from Website import db
+from Website.favourites import add_movies, remove_movies, has_movie
+from Website.models import Movie, User, UserFavourite
+
+@pytest.fixture
+def user(app):
+    db.session.add_all([Movie(title=f'Movie {number}') for number in range(1, 5)])
+    user = User(firstName='Ada', lastName='Lovelace', username='ada', email='ada@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.user_id
+
+def stored(user_id):
+    return sorted(db.session.execute(db.select(UserFavourite.c.movie_id).where(UserFavourite.c.user_id == user_id)).scalars())
+
+def test_add_skips_repeats_and_unknown_ids(user):
+    assert add_movies(UserFavourite, user, [1, 2, 999]) == 2
+    assert add_movies(UserFavourite, user, [2, 3, 999]) == 1
+    assert add_movies(UserFavourite, user, [1, 2, 3]) == 0
+    db.session.commit()
+    assert stored(user) == [1, 2, 3]
+    assert add_movies(UserFavourite, user, []) == 0
+
+def test_remove_and_has_movie_agree_with_the_table(user):
+    add_movies(UserFavourite, user, [1, 2, 3])
+    assert remove_movies(UserFavourite, user, [2, 4, 999]) == 1
+    db.session.commit()
+    assert stored(user) == [1, 3]
+    assert [movie_id for movie_id in range(1, 5) if has_movie(UserFavourite, user, movie_id)] == stored(user)
+    assert not has_movie(UserFavourite, user + 1, 1)  # another user's favourites are separate
+
+def test_endpoints(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user)
+    assert client.post('/add_to_favourites', json={'movie_ids': [1, 2, 999]}).get_json() == {'success': True, 'added': 2}
+    assert client.post('/add_to_favourites?movie_id=2').get_json() == {'success': False, 'added': 0}
+    assert client.post('/remove_from_favourites?movie_ids=1,3').get_json() == {'success': True, 'removed': 1}
+    assert stored(user) == [2]
@@ -0,0 +1,79 @@
+#`flask ingest` on SQLite: ids allocated locally across chunks resolve to the right genre, actor and
+#director rows, and a second run over the same CSV inserts nothing
+import csv
+import pytest
+from Website import db
+from Website.models import Movie, Genre, Actor, Director, Country, MovieGenre, MovieActor, MovieDirector, MovieCountry
+
+HEADER = ['title', 'overview', 'status', 'release_year', 'popularity', 'vote_average', 'vote_count', 'adult',
+          'overview_sentiment', 'all_combined_keywords', 'runtime', 'production_countries',
+          'Star1', 'Star2', 'Star3', 'Star4', 'genres_list', 'Cast_list', 'Director']
+# title -> (genres, cast after the stars, directors, countries); Star1/Star2 are the first two cast names
+MOVIES = {
+    'Alpha': (['Drama', 'War'], ['Ann', 'Bob', 'Cid'], ['Dee'], ['France']),
+    'Beta': (['Comedy'], ['Bob', 'Eve'], ['Dee', 'Fay'], ['France', 'Japan']),
+    # second chunk: reuses names allocated in the first one and adds new ones
+    'Gamma': (['Drama', 'Horror'], ['Cid', 'Gus'], ['Hal'], ['Japan']),
+    'Delta': (['War'], ['Ann', 'Ivy'], ['Fay'], ['India']),
+    # third chunk
+    'Epsilon': (['Comedy', 'Drama'], ['Eve', 'Ann'], ['Dee'], []),
+}
+
+def write_csv(path, movies):
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(HEADER)
+        for position, (title, (genres, cast, directors, countries)) in enumerate(movies.items()):
+            stars = (cast[:2] + ['', ''])[:4]
+            writer.writerow([title, f'overview of {title}', 'Released', 2000 + position, 10.0 + position, 7.5, 100 * position,
+                             'False', 0.1, "['hero']", 90 + position, ', '.join(countries), *stars,
+                             str(genres), str(cast), str(directors)])
+
+def counts():
+    # Rows per table
+    return {getattr(model, '__table__', model).name: db.session.execute(db.select(db.func.count()).select_from(model)).scalar()
+            for model in (Movie, Genre, Actor, Director, Country, MovieGenre, MovieActor, MovieDirector, MovieCountry)}
+
+def linked(title, table, model, id_column):
+    # Names linked to a movie through an association table, sorted
+    return db.session.execute(
+        db.select(model.name).join(table, getattr(table.c, id_column) == getattr(model, id_column))
+        .join(Movie, Movie.movie_id == table.c.movie_id).where(Movie.title == title).order_by(model.name)
+    ).scalars().all()
+
+@pytest.fixture
+def run_ingest(app, tmp_path):
+    path = tmp_path / 'movies.csv'
+    write_csv(path, MOVIES)
+    runner = app.test_cli_runner()
+    def run():
+        result = runner.invoke(args=['ingest', str(path), '--chunk-size', '2'])
+        assert result.exit_code == 0, result.output
+        return result.output
+    return run
+
+def test_links_resolve_across_chunks(run_ingest):
+    assert 'Inserted 5 movies' in run_ingest()
+    for title, (genres, cast, directors, countries) in MOVIES.items():
+        assert linked(title, MovieGenre, Genre, 'genre_id') == sorted(genres)
+        assert linked(title, MovieActor, Actor, 'actor_id') == sorted(cast)
+        assert linked(title, MovieDirector, Director, 'director_id') == sorted(directors)
+        assert linked(title, MovieCountry, Country, 'country_id') == sorted(countries)
+    # Every name is stored once, however many chunks used it
+    assert sorted(db.session.execute(db.select(Actor.name)).scalars()) == ['Ann', 'Bob', 'Cid', 'Eve', 'Gus', 'Ivy']
+    assert sorted(db.session.execute(db.select(Genre.name)).scalars()) == ['Comedy', 'Drama', 'Horror', 'War']
+
+def test_stars_are_billed_first(run_ingest):
+    run_ingest()
+    billed = db.session.execute(
+        db.select(Actor.name, MovieActor.c.billing_order).join(MovieActor, MovieActor.c.actor_id == Actor.actor_id)
+        .join(Movie, Movie.movie_id == MovieActor.c.movie_id).where(Movie.title == 'Alpha').order_by(MovieActor.c.billing_order)
+    ).all()
+    assert billed == [('Ann', 0), ('Bob', 1), ('Cid', 2)]
+
+def test_second_run_inserts_nothing(run_ingest):
+    run_ingest()
+    before = counts()
+    assert 'Inserted 0 movies' in run_ingest()
+    assert counts() == before
+    assert before['movies'] == 5
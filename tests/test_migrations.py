@@ -0,0 +1,52 @@
+#Migration d7a3f0b1c925 on a seeded SQLite database: production_countries becomes countries and
+#movie_countries, Star1-Star4 become billing orders 0-3 on movie_actors (adding missing actors/links)
+import os
+import pytest
+from flask_migrate import downgrade, stamp, upgrade
+from sqlalchemy import text
+from Website import db
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+BEFORE = 'c41d9e6f2a87'  # the revision before countries and billing_order
+
+def rows(statement, **params):
+    return db.session.execute(text(statement), params).all()
+
+@pytest.fixture
+def legacy(app):
+    # Today's schema taken back to BEFORE, then filled the way the denormalized columns were
+    stamp(directory=MIGRATIONS)
+    downgrade(directory=MIGRATIONS, revision=BEFORE)
+    db.session.execute(text(
+        "INSERT INTO movies (movie_id, title, production_countries, Star1, Star2, Star3, Star4) VALUES "
+        "(1, 'Alpha', 'France, Japan', 'Ann', 'Bob', NULL, NULL), "
+        "(2, 'Beta', 'Japan', 'Cid', 'Ann', 'Dee', 'Eve'), "
+        "(3, 'Gamma', NULL, NULL, NULL, NULL, NULL)"))
+    db.session.execute(text("INSERT INTO actors (actor_id, name) VALUES (1, 'Ann'), (2, 'Bob'), (3, 'Cid'), (4, 'Zed')"))
+    # Cast links as the old loader wrote them: some stars missing, an extra cast member with no star slot
+    db.session.execute(text("INSERT INTO movie_actors (movie_id, actor_id) VALUES (1, 1), (1, 4), (2, 3)"))
+    db.session.commit()
+    return app
+
+def test_downgrade_removed_the_new_tables(legacy):
+    tables = {name for name, in rows("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'countries' not in tables and 'movie_countries' not in tables
+    assert 'billing_order' not in {row[1] for row in rows("PRAGMA table_info(movie_actors)")}
+
+def test_upgrade_backfills_countries(legacy):
+    upgrade(directory=MIGRATIONS)
+    assert rows("SELECT name FROM countries ORDER BY name") == [('France',), ('Japan',)]
+    assert rows("SELECT m.title, c.name FROM movie_countries mc JOIN movies m ON m.movie_id = mc.movie_id "
+                "JOIN countries c ON c.country_id = mc.country_id ORDER BY m.title, c.name") == [
+        ('Alpha', 'France'), ('Alpha', 'Japan'), ('Beta', 'Japan')]
+
+def test_upgrade_backfills_billing_order(legacy):
+    upgrade(directory=MIGRATIONS)
+    billed = rows("SELECT m.title, a.name, ma.billing_order FROM movie_actors ma JOIN movies m ON m.movie_id = ma.movie_id "
+                  "JOIN actors a ON a.actor_id = ma.actor_id ORDER BY m.title, ma.billing_order IS NULL, ma.billing_order")
+    assert billed == [
+        ('Alpha', 'Ann', 0), ('Alpha', 'Bob', 1), ('Alpha', 'Zed', None),  # cast member without a star slot
+        ('Beta', 'Cid', 0), ('Beta', 'Ann', 1), ('Beta', 'Dee', 2), ('Beta', 'Eve', 3),
+    ]
+    # Stars missing from actors were added once each
+    assert rows("SELECT name FROM actors ORDER BY name") == [('Ann',), ('Bob',), ('Cid',), ('Dee',), ('Eve',), ('Zed',)]
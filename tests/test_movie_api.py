@@ -0,0 +1,93 @@
+#TMDBClient against a local http.server stub: the pooled session's retries on 429/5xx, the
+#request timeout, and concurrent discover pages coming back in page order
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+from Website.movie_api import TMDBClient
+
+STALL_SECONDS = 2
+
+class StubHandler(BaseHTTPRequestHandler):
+    hits = Counter()  # path or (path, page) -> requests seen
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        page = int(parse_qs(url.query).get('page', ['1'])[0])
+        with self.lock:
+            self.hits[url.path] += 1
+            self.hits[(url.path, page)] += 1
+            attempt = self.hits[url.path]
+        if url.path == '/flaky':
+            # 429 then 503 then the data
+            if attempt == 1:
+                return self.reply(429, {'status_message': 'slow down'}, {'Retry-After': '0'})
+            if attempt == 2:
+                return self.reply(503, {'status_message': 'unavailable'})
+            return self.reply(200, {'ok': True})
+        if url.path == '/stall':
+            time.sleep(STALL_SECONDS)
+            return self.reply(200, {'ok': True})
+        if url.path == '/discover/movie':
+            # Later pages answer first, so completion order is the reverse of page order
+            time.sleep(0.05 * (6 - page))
+            return self.reply(200, {'page': page, 'results': [{'title': f'Movie {page}'}]})
+        self.reply(404, {})
+
+    def reply(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub():
+    StubHandler.hits.clear()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_retries_rate_limits_and_server_errors(stub):
+    client = TMDBClient(base_url=stub, retries=3, backoff=0.01, token='test-token')
+    assert client.get('flaky') == {'ok': True}
+    assert StubHandler.hits['/flaky'] == 3
+
+def test_gives_up_after_the_retry_budget(stub):
+    client = TMDBClient(base_url=stub, retries=1, backoff=0.01, token='test-token')
+    assert client.get('flaky') is None  # 429, then the 503 is final
+    assert StubHandler.hits['/flaky'] == 2
+
+def test_timeout_fires(stub):
+    client = TMDBClient(base_url=stub, timeout=0.3, retries=0, token='test-token')
+    started = time.perf_counter()
+    assert client.get('stall') is None
+    assert time.perf_counter() - started < STALL_SECONDS
+
+def test_concurrent_pages_come_back_in_page_order(stub):
+    client = TMDBClient(base_url=stub, max_workers=5, retries=0, token='test-token')
+    started = time.perf_counter()
+    pages = client.fetch_discover_pages(5)
+    assert [data['page'] for data in pages] == [1, 2, 3, 4, 5]
+    assert [data['results'][0]['title'] for data in pages] == [f'Movie {page}' for page in range(1, 6)]
+    # Fetched concurrently: about the slowest page (0.25s), not the sum (0.75s)
+    assert time.perf_counter() - started < 0.6
+
+def test_token_is_required(monkeypatch):
+    monkeypatch.setattr('Website.movie_api.TOKEN', None)
+    with pytest.raises(ValueError):
+        TMDBClient(base_url='http://127.0.0.1:9')
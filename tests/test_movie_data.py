@@ -0,0 +1,106 @@
+#SnapshotHandle version swaps: a reader pinned to the old snapshot keeps consistent data while a
+#reload swaps in the next version, new readers get the new one, derived structures stay per version.
+#Also the sizes flask memory-report prints for everything a worker holds
+import threading
+import pytest
+from Website import db
+from Website.models import Movie, Genre, Director, MovieGenre, MovieDirector
+from Website.movie_cube import get_filter_cube
+from Website.movie_data import SnapshotHandle, deep_bytes
+
+def add_movie(title, genre_id=1, director_id=1):
+    movie = Movie(title=title, release_year=2020, runtime=100, vote_count=10, popularity=1.0)
+    db.session.add(movie)
+    db.session.flush()
+    db.session.execute(MovieGenre.insert().values(movie_id=movie.movie_id, genre_id=genre_id))
+    db.session.execute(MovieDirector.insert().values(movie_id=movie.movie_id, director_id=director_id))
+    db.session.commit()
+
+@pytest.fixture
+def handle(app):
+    db.session.add_all([Genre(name='Drama'), Director(name='Dee')])
+    db.session.commit()
+    for number in range(3):
+        add_movie(f'Movie {number}')
+    return SnapshotHandle()
+
+def titles(snapshot):
+    return sorted(snapshot.movies['title'].astype(str))
+
+def test_reader_keeps_the_old_version_through_a_reload(handle):
+    with handle.reading() as old:
+        old_cube = get_filter_cube(old)
+        add_movie('Movie 3')
+        new = handle.reload()
+
+        assert (old.version, new.version) == (1, 2)
+        assert handle.current is new
+        assert titles(old) == ['Movie 0', 'Movie 1', 'Movie 2']
+        assert get_filter_cube(old) is old_cube  # still the pinned version's own cube
+        assert handle.versions_in_use() == [1]
+        assert handle.memory_report()[0][0] == 2 and {version for version, _, _ in handle.memory_report()} == {1, 2}
+
+        with handle.reading() as current:
+            assert current is new
+            assert titles(current) == ['Movie 0', 'Movie 1', 'Movie 2', 'Movie 3']
+            new_cube = get_filter_cube(current)
+            assert new_cube is not old_cube
+        assert handle.versions_in_use() == [1]
+
+    # The last reader of version 1 released it and its derived structures
+    assert handle.versions_in_use() == []
+    assert old._frames == {}
+    assert {version for version, _, _ in handle.memory_report()} == {2}
+    assert get_filter_cube(new) is new_cube
+
+def test_replaced_version_without_readers_is_released_at_once(handle):
+    first = handle.get()
+    get_filter_cube(first)
+    handle.reload()
+    assert first._frames == {}
+    assert handle.versions_in_use() == []
+
+def test_reader_in_another_thread(app, handle):
+    pinned = threading.Event()
+    reloaded = threading.Event()
+    seen = {}
+
+    def callback():
+        with app.app_context():
+            with handle.reading() as snapshot:
+                pinned.set()
+                reloaded.wait(5)
+                seen['version'] = snapshot.version
+                seen['titles'] = titles(snapshot)
+
+    handle.get()
+    reader = threading.Thread(target=callback)
+    reader.start()
+    assert pinned.wait(5)
+    add_movie('Movie 3')
+    handle.reload()
+    reloaded.set()
+    reader.join(5)
+    assert seen == {'version': 1, 'titles': ['Movie 0', 'Movie 1', 'Movie 2']}
+    assert handle.current.version == 2
+    assert handle.versions_in_use() == []
+
+def test_deep_bytes_counts_shared_objects_once():
+    token = 'shared' * 100
+    assert deep_bytes([token, token]) < deep_bytes([token]) + deep_bytes(token)
+    assert deep_bytes({token: {1}}) > deep_bytes(token)
+
+def test_memory_report_covers_what_a_worker_holds(make_app):
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Genre(name='Drama'), Director(name='Dee')])
+        db.session.commit()
+        for number in range(3):
+            add_movie(f'Movie {number}')
+        result = app.test_cli_runner().invoke(args=['memory-report'])
+        db.session.remove()
+    assert result.exit_code == 0, result.output
+    reported = [line.split()[0] for line in result.output.splitlines() if line.endswith(' MB')]
+    assert reported == ['columns', 'links', 'names', 'cube', 'search', 'autocomplete', 'recommender', 'figures', 'resident']
+    assert '5 of 256 figures cached' in result.output  # chart1..chart5 for the default selections
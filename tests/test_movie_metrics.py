@@ -0,0 +1,49 @@
+#movie_metrics is built by refresh_movie_metrics() and /update_chart reads one row of it by movie id
+#(or by title) to draw the radar, every axis on the same 0-1 scale
+import json
+import pytest
+from Website import db
+from Website.models import Movie, MovieMetrics
+from Website.movie_metrics import metrics_for, refresh_movie_metrics
+
+@pytest.fixture
+def movies(app):
+    movies = [
+        Movie(title='Short Film', vote_average=6.0, vote_count=100, popularity=5.0, runtime=80, release_year=2020, overview_sentiment=0.1),
+        Movie(title='Epic', vote_average=8.0, vote_count=5000, popularity=50.0, runtime=200, release_year=2015, overview_sentiment=0.5),
+        Movie(title='Middle', vote_average=7.0, vote_count=1000, popularity=20.0, runtime=120, release_year=2010, overview_sentiment=-0.2),
+    ]
+    db.session.add_all(movies)
+    db.session.commit()
+    return {movie.title: movie.movie_id for movie in movies}
+
+def radar(response):
+    assert response.status_code == 200
+    trace = json.loads(response.get_data(as_text=True))['figure']['data'][0]
+    return dict(zip(trace['theta'], trace['r']))
+
+def test_refresh_stores_normalized_runtime(movies):
+    assert refresh_movie_metrics() == 3
+    assert metrics_for(movies['Short Film']).norm_runtime == 0.0
+    assert metrics_for(movies['Epic']).norm_runtime == 1.0
+    assert metrics_for(movies['Middle']).norm_runtime == pytest.approx(40 / 120)
+
+def test_missing_table_is_not_built_on_read(movies):
+    assert metrics_for(movies['Epic']) is None
+    assert db.session.execute(db.select(db.func.count()).select_from(MovieMetrics)).scalar() == 0
+
+def test_update_chart_by_id_and_by_title(app, movies):
+    refresh_movie_metrics()
+    client = app.test_client()
+    by_id = radar(client.get(f"/update_chart?movie_id={movies['Middle']}"))
+    by_title = radar(client.get('/update_chart?movie_title=middle'))
+    assert by_id == by_title
+    assert by_id['runtime'] == pytest.approx(40 / 120)
+    assert all(0.0 <= value <= 1.0 for value in by_id.values())
+
+def test_update_chart_404s(app, movies):
+    client = app.test_client()
+    assert client.get(f"/update_chart?movie_id={movies['Epic']}").status_code == 404  # metrics not built yet
+    refresh_movie_metrics()
+    assert client.get('/update_chart?movie_id=999').status_code == 404
+    assert client.get('/update_chart?movie_title=no such film').status_code == 404
@@ -0,0 +1,30 @@
+#cached_page keys pages by the shared dataset version, so a bump from any process sharing the
+#cache backend (here a second app instance on the same FileSystemCache directory) retires them
+from Website.catalogue import bump_dataset_version, get_dataset_version
+from Website.page_cache import cached_page
+
+def test_default_backend_is_shared(make_app):
+    assert make_app().config['CACHE_TYPE'] == 'FileSystemCache'
+
+def test_bump_from_another_app_invalidates_cached_page(make_app):
+    app = make_app()
+    renders = []
+
+    @app.route('/cached-probe')
+    @cached_page()
+    def cached_probe():
+        renders.append(len(renders) + 1)
+        return f"render {len(renders)}"
+
+    client = app.test_client()
+    assert client.get('/cached-probe').get_data(as_text=True) == 'render 1'
+    assert client.get('/cached-probe').get_data(as_text=True) == 'render 1'
+
+    other = make_app()
+    with other.app_context():
+        bump_dataset_version()
+        version = get_dataset_version()
+    with app.app_context():
+        assert get_dataset_version() == version
+    assert client.get('/cached-probe').get_data(as_text=True) == 'render 2'
+    assert client.get('/cached-probe').get_data(as_text=True) == 'render 2'
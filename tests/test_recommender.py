@@ -0,0 +1,59 @@
+#Item-vector recommendations on a tiny catalogue: nearest neighbours of the favourites first,
+#favourites and excluded ids left out, and a rebuild once another process bumps the dataset version
+import pytest
+from Website import db
+from Website.catalogue import bump_dataset_version
+from Website.models import Movie, Genre, Actor, Director, MovieGenre, MovieActor, MovieDirector
+from Website.recommender import item_vectors
+
+# title -> (genres, cast, directors)
+CATALOGUE = {
+    'Heat': (['Crime', 'Thriller'], ['Al Pacino', 'Robert De Niro'], ['Michael Mann']),
+    'Collateral': (['Crime', 'Thriller'], ['Al Pacino', 'Tom Cruise'], ['Michael Mann']),  # shares the most
+    'The Insider': (['Drama'], ['Al Pacino'], ['Michael Mann']),
+    'Casino': (['Crime'], ['Robert De Niro'], ['Martin Scorsese']),
+    'Notting Hill': (['Romance', 'Comedy'], ['Hugh Grant'], ['Roger Michell']),  # nothing in common
+}
+
+def add_movie(title, genres, cast, directors):
+    # Core inserts only, so no ORM commit notification reaches the in-process subscribers
+    movie_id = db.session.execute(Movie.__table__.insert().values(title=title)).inserted_primary_key[0]
+    for model, table, id_column, names in ((Genre, MovieGenre, 'genre_id', genres), (Actor, MovieActor, 'actor_id', cast),
+                                           (Director, MovieDirector, 'director_id', directors)):
+        for name in names:
+            row_id = db.session.execute(db.select(getattr(model, id_column)).where(model.name == name)).scalar()
+            if row_id is None:
+                row_id = db.session.execute(model.__table__.insert().values(name=name)).inserted_primary_key[0]
+            db.session.execute(table.insert().values(movie_id=movie_id, **{id_column: row_id}))
+    db.session.commit()
+    return movie_id
+
+@pytest.fixture
+def movies(app):
+    item_vectors.stale = True
+    return {title: add_movie(title, *features) for title, features in CATALOGUE.items()}
+
+def titles(movies, movie_ids):
+    by_id = {movie_id: title for title, movie_id in movies.items()}
+    return [by_id[movie_id] for movie_id in movie_ids]
+
+def test_nearest_neighbours_first(movies):
+    recommended = titles(movies, item_vectors.recommend([movies['Heat']], count=10))
+    assert recommended[0] == 'Collateral'
+    assert set(recommended) == {'Collateral', 'The Insider', 'Casino'}  # zero-score movies are left out
+    assert 'Heat' not in recommended
+
+def test_favourites_and_excluded_ids_left_out(movies):
+    recommended = titles(movies, item_vectors.recommend([movies['Heat'], movies['Casino']], count=10,
+                                                        exclude_ids=[movies['Collateral']]))
+    assert recommended == ['The Insider']
+    assert item_vectors.recommend([]) == []
+
+def test_rebuilds_when_the_dataset_version_changes(movies, make_app):
+    assert titles(movies, item_vectors.recommend([movies['Heat']], count=1)) == ['Collateral']
+    movies['Heat 2'] = add_movie('Heat 2', ['Crime', 'Thriller'], ['Al Pacino', 'Robert De Niro'], ['Michael Mann'])
+    assert movies['Heat 2'] not in item_vectors.recommend([movies['Heat']], count=10)  # built before the load
+
+    with make_app().app_context():
+        bump_dataset_version()
+    assert titles(movies, item_vectors.recommend([movies['Heat']], count=1)) == ['Heat 2']
@@ -0,0 +1,76 @@
+#MovieSearchIndex against a real SQLite catalogue: ranking, prefix matching and both update paths
+#(a commit in this process, and a bulk load by another process that only bumps the shared version)
+import pytest
+from Website import db
+from Website.catalogue import bump_dataset_version
+from Website.models import Movie, Genre, Actor, MovieGenre, MovieActor
+from Website.search_index import search_index
+
+@pytest.fixture
+def catalogue(app):
+    movies = [
+        Movie(title='Space Jam', overview='Basketball with cartoons', popularity=30.0),
+        Movie(title='The Martian', overview='An astronaut is stranded in space', popularity=80.0),
+        Movie(title='Galaxy Quest', overview='Actors from a space show meet real aliens', popularity=20.0),
+        Movie(title='Moon', overview='A lonely miner on a lunar base', popularity=10.0),
+    ]
+    db.session.add_all(movies)
+    db.session.add_all([Genre(name='Comedy'), Actor(name='Matt Damon')])
+    db.session.flush()
+    db.session.execute(MovieGenre.insert(), [{'movie_id': movies[0].movie_id, 'genre_id': 1},
+                                             {'movie_id': movies[2].movie_id, 'genre_id': 1}])
+    db.session.execute(MovieActor.insert(), [{'movie_id': movies[1].movie_id, 'actor_id': 1, 'billing_order': 0}])
+    db.session.commit()
+    search_index.build()
+    return app
+
+def titles(results):
+    return [db.session.get(Movie, movie_id).title for movie_id, _ in results]
+
+def test_title_matches_rank_first(catalogue):
+    ranked = titles(search_index.search('space'))
+    assert ranked[0] == 'Space Jam'  # title match above the two overview matches
+    assert sorted(ranked[1:]) == ['Galaxy Quest', 'The Martian']
+
+def test_cast_and_genre_fields(catalogue):
+    assert titles(search_index.search('damon')) == ['The Martian']
+    assert titles(search_index.search('comedy space')) == ['Space Jam', 'Galaxy Quest']
+
+def test_prefix_matching(catalogue):
+    assert titles(search_index.search('gala')) == ['Galaxy Quest']
+    assert titles(search_index.search('mart')) == ['The Martian']
+    assert search_index.search('zzz') == []
+
+def test_commit_in_this_process_is_indexed_incrementally(catalogue, monkeypatch):
+    monkeypatch.setattr(search_index, 'build', lambda *args: pytest.fail('expected an incremental update'))
+    db.session.add(Movie(title='Interstellar', overview='Explorers travel through space'))
+    moon = db.session.execute(db.select(Movie).filter_by(title='Moon')).scalar_one()
+    moon.title = 'Moon Base'
+    db.session.commit()
+    assert titles(search_index.search('interstellar')) == ['Interstellar']
+    assert titles(search_index.search('base')) == ['Moon Base']
+
+def test_load_by_another_process_rebuilds(catalogue, make_app):
+    # Core inserts fire no ORM events; the other process only bumps the shared dataset version
+    db.session.execute(Movie.__table__.insert(), [{'title': 'Sunshine', 'overview': 'A crew flies to the sun'}])
+    db.session.commit()
+    assert search_index.search('sunshine') == []  # still the version the index was built at
+
+    other = make_app()
+    with other.app_context():
+        bump_dataset_version()
+    assert titles(search_index.search('sunshine')) == ['Sunshine']
+
+def test_pages_follow_the_cursor_without_rescoring(catalogue, monkeypatch):
+    first, total = search_index.search_page('space', 2)
+    assert total == 3
+    assert [movie_id for movie_id, _ in first] == [movie_id for movie_id, _ in search_index.search('space')][:2]
+    # Later pages slice the ranking kept from the first one
+    monkeypatch.setattr(search_index, '_scores', lambda text: pytest.fail('expected the cached ranking'))
+    rest, total = search_index.search_page('space', 2, after=(first[-1][1], first[-1][0]))
+    assert total == 3
+    assert titles(first + rest)[0] == 'Space Jam' and len({movie_id for movie_id, _ in first + rest}) == 3
+
+def test_popularity_order(catalogue):
+    page, total = search_index.search_page('space', 10, order='popularity')
+    assert titles(page) == ['The Martian', 'Space Jam', 'Galaxy Quest']
@@ -0,0 +1,15 @@
+#Startup time budget: import, create_app() and create_dash_app() timed in fresh interpreters by
+#benchmarks.startup, against STARTUP_BUDGET_SECONDS (default 2.5s)
+from benchmarks import startup
+
+def test_startup_within_budget():
+    report = startup.run(repeat=3)
+    assert startup.check(report) == []
+    assert report['median']['total'] <= startup.DEFAULT_BUDGET
+
+def test_create_app_imports_nothing_heavy():
+    report = startup.run(repeat=1)
+    # Deferred to the first request (or create_dash_app for Dash itself)
+    for name in ('pandas', 'plotly', 'wordcloud', 'scipy'):
+        assert name not in report['create_app_modules']
+    assert report['queries'] == []